@@ -0,0 +1,77 @@
+"""Bulk mailings
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('bulk_mailings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('subject_template', sa.String(), nullable=False),
+        sa.Column('body_template', sa.Text(), nullable=False),
+        sa.Column('html_template', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('scheduled_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_rsvp_id', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_bulk_mailings_id', 'bulk_mailings', ['id'], unique=False)
+    op.create_index('ix_bulk_mailings_event_id', 'bulk_mailings', ['event_id'], unique=False)
+    op.create_index(
+        'ix_bulk_mailings_status_scheduled_at',
+        'bulk_mailings',
+        ['status', 'scheduled_at'],
+        unique=False,
+    )
+
+    op.create_table('bulk_mail_recipients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('mailing_id', sa.Integer(), nullable=False),
+        sa.Column('rsvp_id', sa.Integer(), nullable=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['mailing_id'], ['bulk_mailings.id'], ),
+        sa.ForeignKeyConstraint(['rsvp_id'], ['rsvps.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('mailing_id', 'email', name='uq_bulk_mail_recipients_mailing_email')
+    )
+    op.create_index('ix_bulk_mail_recipients_id', 'bulk_mail_recipients', ['id'], unique=False)
+
+    # Keyset pagination over an event's RSVPs
+    op.create_index('ix_rsvps_event_id_id', 'rsvps', ['event_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rsvps_event_id_id', table_name='rsvps')
+    op.drop_index('ix_bulk_mail_recipients_id', table_name='bulk_mail_recipients')
+    op.drop_table('bulk_mail_recipients')
+    op.drop_index('ix_bulk_mailings_status_scheduled_at', table_name='bulk_mailings')
+    op.drop_index('ix_bulk_mailings_event_id', table_name='bulk_mailings')
+    op.drop_index('ix_bulk_mailings_id', table_name='bulk_mailings')
+    op.drop_table('bulk_mailings')
@@ -0,0 +1,44 @@
+"""Default and backfill donations.created_at
+
+Revision ID: 003a
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003a'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 001 created the column without a default and nothing set it, so
+    # donations made until now have no creation time
+    op.execute("""
+        UPDATE donations
+        SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP)
+        WHERE created_at IS NULL
+    """)
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=True,
+            server_default=sa.func.now(),
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.alter_column(
+            'created_at',
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=True,
+            server_default=None,
+        )
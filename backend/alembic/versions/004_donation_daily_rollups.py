@@ -0,0 +1,50 @@
+"""Donation daily rollups
+
+Revision ID: 004
+Revises: 003a
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('donation_daily_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('is_recurring', sa.Boolean(), nullable=False),
+        sa.Column('total_amount_cents', sa.BigInteger(), nullable=False),
+        sa.Column('donation_count', sa.Integer(), nullable=False),
+        sa.Column(
+            'updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'currency', 'is_recurring', name='uq_donation_daily_rollups_key')
+    )
+    op.create_index('ix_donation_daily_rollups_id', 'donation_daily_rollups', ['id'], unique=False)
+
+    # Backfill from existing donations
+    op.execute("""
+        INSERT INTO donation_daily_rollups
+            (day, currency, is_recurring, total_amount_cents, donation_count)
+        SELECT date(created_at), currency, COALESCE(is_recurring, false),
+               SUM(amount_cents), COUNT(id)
+        FROM donations
+        WHERE status = 'succeeded' AND created_at IS NOT NULL
+        GROUP BY date(created_at), currency, COALESCE(is_recurring, false)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_donation_daily_rollups_id', table_name='donation_daily_rollups')
+    op.drop_table('donation_daily_rollups')
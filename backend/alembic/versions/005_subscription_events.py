@@ -0,0 +1,48 @@
+"""Subscription events ledger
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('subscription_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('stripe_event_id', sa.String(), nullable=False),
+        sa.Column('stripe_subscription_id', sa.String(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('amount_cents', sa.Integer(), nullable=False),
+        sa.Column('currency', sa.String(), nullable=False),
+        sa.Column('donor_email', sa.String(), nullable=True),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('stripe_event_id')
+    )
+    op.create_index('ix_subscription_events_id', 'subscription_events', ['id'], unique=False)
+    op.create_index(
+        'ix_subscription_events_stripe_subscription_id',
+        'subscription_events',
+        ['stripe_subscription_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_subscription_events_stripe_subscription_id', table_name='subscription_events')
+    op.drop_index('ix_subscription_events_id', table_name='subscription_events')
+    op.drop_table('subscription_events')
@@ -0,0 +1,81 @@
+"""Donor profiles
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('donors',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('lifetime_amount_cents', sa.BigInteger(), nullable=False),
+        sa.Column('gift_count', sa.Integer(), nullable=False),
+        sa.Column('first_gift_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_gift_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_donors_email', 'donors', ['email'], unique=True)
+    op.create_index('ix_donors_id', 'donors', ['id'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        # Lets the admin prefix search (LIKE 'abc%') use an index under any collation
+        op.execute('CREATE INDEX ix_donors_email_pattern ON donors (email varchar_pattern_ops)')
+
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.add_column(sa.Column('donor_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_donations_donor_id', 'donors', ['donor_id'], ['id'])
+        batch_op.create_index(
+            'ix_donations_donor_id_created_at', ['donor_id', 'created_at'], unique=False
+        )
+
+    # Backfill profiles and links from existing donations
+    op.execute("""
+        INSERT INTO donors
+            (email, name, lifetime_amount_cents, gift_count, first_gift_at, last_gift_at)
+        SELECT lower(trim(donor_email)),
+               MAX(donor_name),
+               COALESCE(SUM(CASE WHEN status = 'succeeded' THEN amount_cents END), 0),
+               COUNT(CASE WHEN status = 'succeeded' THEN 1 END),
+               MIN(CASE WHEN status = 'succeeded' THEN created_at END),
+               MAX(CASE WHEN status = 'succeeded' THEN created_at END)
+        FROM donations
+        WHERE donor_email IS NOT NULL AND trim(donor_email) <> ''
+        GROUP BY lower(trim(donor_email))
+    """)
+    op.execute("""
+        UPDATE donations
+        SET donor_id = (
+            SELECT donors.id FROM donors
+            WHERE donors.email = lower(trim(donations.donor_email))
+        )
+        WHERE donor_email IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('donations') as batch_op:
+        batch_op.drop_index('ix_donations_donor_id_created_at')
+        batch_op.drop_constraint('fk_donations_donor_id', type_='foreignkey')
+        batch_op.drop_column('donor_id')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX ix_donors_email_pattern')
+    op.drop_index('ix_donors_id', table_name='donors')
+    op.drop_index('ix_donors_email', table_name='donors')
+    op.drop_table('donors')
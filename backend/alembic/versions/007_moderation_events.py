@@ -0,0 +1,40 @@
+"""Moderation queue change feed
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('moderation_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('photo_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column(
+            'created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True
+        ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_moderation_events_id', 'moderation_events', ['id'], unique=False)
+    op.create_index(
+        'ix_moderation_events_created_at', 'moderation_events', ['created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_moderation_events_created_at', table_name='moderation_events')
+    op.drop_index('ix_moderation_events_id', table_name='moderation_events')
+    op.drop_table('moderation_events')
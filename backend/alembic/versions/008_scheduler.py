@@ -0,0 +1,62 @@
+"""Scheduler lease, job schedule and run history
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('scheduler_leases',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('scheduled_jobs',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('schedule', sa.String(), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_name', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_ms', sa.Float(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_runs_id', 'job_runs', ['id'], unique=False)
+    op.create_index('ix_job_runs_started_at', 'job_runs', ['started_at'], unique=False)
+    op.create_index(
+        'ix_job_runs_job_name_started_at',
+        'job_runs',
+        ['job_name', 'started_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_runs_job_name_started_at', table_name='job_runs')
+    op.drop_index('ix_job_runs_started_at', table_name='job_runs')
+    op.drop_index('ix_job_runs_id', table_name='job_runs')
+    op.drop_table('job_runs')
+    op.drop_table('scheduled_jobs')
+    op.drop_table('scheduler_leases')
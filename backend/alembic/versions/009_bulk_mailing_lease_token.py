@@ -0,0 +1,27 @@
+"""Bulk mailing lease token
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('bulk_mailings') as batch_op:
+        batch_op.add_column(sa.Column('lease_token', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bulk_mailings') as batch_op:
+        batch_op.drop_column('lease_token')
@@ -0,0 +1,123 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import async_engine, engine, get_read_db, get_write_db, replica_set
+from app.core.pool_metrics import pool_status
+from app.core.profiler import profiler
+from app.core.resilience import dependency_status
+from app.schemas.admin import DashboardSummary
+from app.services.analytics.dashboard import get_dashboard_summary
+from app.services.auth import ClerkAdmin, get_current_admin
+from app.services.scheduling import scheduler
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+# Shared by every admin on this worker
+dashboard_cache = TTLCache(ttl=settings.ADMIN_DASHBOARD_CACHE_SECONDS)
+
+
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard(
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Get dashboard counts and totals, cached briefly (admin only)"""
+    return await dashboard_cache.get_or_load_async(
+        "summary", lambda: db.run_sync(get_dashboard_summary)
+    )
+
+
+@router.get("/database/pool")
+def get_database_pool(_admin: ClerkAdmin = Depends(get_current_admin)):
+    """Connection pool occupancy, checkout waits and replica health for this worker (admin only)"""
+    return {
+        "async": pool_status(async_engine.sync_engine),
+        "sync": pool_status(engine),
+        "replicas": [
+            {**replica, "pool": pool_status(r.engine.sync_engine)}
+            for replica, r in zip(replica_set.status(), replica_set.replicas)
+        ],
+    }
+
+
+@router.get("/dependencies")
+def get_dependencies(_admin: ClerkAdmin = Depends(get_current_admin)):
+    """Breaker state and bulkhead usage of each external service in this worker (admin only)"""
+    return dependency_status()
+
+
+@router.get("/jobs")
+async def get_jobs(
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin),
+):
+    """Scheduler leader, and each job's schedule, next run and latest run (admin only)"""
+    return await db.run_sync(scheduler.status)
+
+
+@router.get("/jobs/{name}/runs")
+async def get_job_runs(
+    name: str,
+    limit: int = Query(20, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin),
+):
+    """Recent runs of a job, newest first, with durations and results (admin only)"""
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await db.run_sync(scheduler.history, name, limit)
+
+
+@router.post("/jobs/{name}/run", status_code=202)
+async def run_job(
+    name: str,
+    db: AsyncSession = Depends(get_write_db),
+    _admin: ClerkAdmin = Depends(get_current_admin),
+):
+    """Run a job now; the leader starts it within a scheduler tick (admin only)"""
+    if not await db.run_sync(scheduler.trigger, name):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "queued"}
+
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    route: Optional[str] = None,
+    requests: int = Query(0, ge=0, le=10000),
+    _admin: ClerkAdmin = Depends(get_current_admin),
+):
+    """Sample this worker's stacks and return a collapsed-stack flamegraph file (admin only).
+
+    Profiles everything for ``seconds``, or with ``route`` (a path prefix)
+    and ``requests``, the next that many matching requests, giving up after
+    ``seconds``. Only the worker that serves this request is profiled.
+    """
+    if bool(route) != bool(requests):
+        raise HTTPException(status_code=400, detail="route and requests must be given together")
+    session = profiler.start(seconds, interval_ms / 1000, route or None, requests)
+    if session is None:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    await asyncio.to_thread(session.done.wait)
+
+    summary = session.summary()
+    filename = f"profile-{os.getpid()}-{int(session.started_at)}.collapsed"
+    return Response(
+        content=session.collapsed(),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Worker": str(os.getpid()),
+            **{
+                f"X-Profile-{key.replace('_', '-').title()}": str(value)
+                for key, value in summary.items()
+            },
+        },
+    )
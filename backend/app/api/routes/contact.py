@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_write_db
+from app.core.rate_limit import rate_limiter
 from app.models.contact_message import ContactMessage
 from app.schemas.contact import ContactMessageCreate
 from app.services.webhooks.email_service import email_service
+from app.services.webhooks.outbox_dispatcher import outbox_dispatcher
 
 router = APIRouter(prefix="/api/contact", tags=["contact"])
 
@@ -12,21 +14,21 @@ router = APIRouter(prefix="/api/contact", tags=["contact"])
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_contact_message(
     message_data: ContactMessageCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Submit contact form"""
-    # Store message
+    rate_limiter.check_email("contact", message_data.email)
+    # Store message and queue the notification in the same transaction
     message = ContactMessage(**message_data.model_dump())
     db.add(message)
-    db.commit()
-    
-    # Send email notification
-    await email_service.send_contact_notification(
+    email_service.queue_contact_notification(
+        db,
         name=message_data.name,
         email=message_data.email,
         subject=message_data.subject or "No subject",
         message=message_data.message
     )
+    await db.commit()
+    outbox_dispatcher.notify()
     
     return {"message": "Message sent successfully"}
-
@@ -1,79 +1,180 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
-
-from app.core.database import get_db
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+
+from app.core.config import settings
+from app.core.database import get_read_db, get_write_db
+from app.core.rate_limit import rate_limiter
 from app.models.donation import Donation
 from app.schemas.donation import (
     DonationCheckout,
     DonationResponse,
     DonationStats,
     DonationVerifyResponse,
+    RecurringAnalytics,
 )
+from app.services.analytics import donation_rollups, recurring_giving
 from app.services.auth import ClerkAdmin, get_current_admin
+from app.services.donors import get_or_create_donor, record_gift_status_change
+from app.services.realtime.campaign_totals import campaign_totals
+from app.services.realtime.sse import SSE_HEADERS
 from app.services.webhooks.stripe_service import stripe_service
 from app.services.webhooks.email_service import email_service
-import stripe
+from app.services.webhooks.outbox_dispatcher import outbox_dispatcher
 
 router = APIRouter(prefix="/api/donations", tags=["donations"])
 
 
-def _find_donation_by_payment_intent(db: Session, payment_intent_id: str) -> Donation | None:
-    donation = db.query(Donation).filter(
-        Donation.stripe_payment_intent_id == payment_intent_id
-    ).first()
+async def _find_donation_by_payment_intent(
+    db: AsyncSession, payment_intent_id: str
+) -> Donation | None:
+    donation = await db.scalar(
+        select(Donation).where(Donation.stripe_payment_intent_id == payment_intent_id)
+    )
     if donation:
         return donation
 
-    intent = stripe_service.retrieve_payment_intent(payment_intent_id)
+    intent = await run_in_threadpool(stripe_service.retrieve_payment_intent, payment_intent_id)
     if not intent or not intent.invoice:
         return None
 
-    invoice = stripe.Invoice.retrieve(intent.invoice)
+    invoice = await run_in_threadpool(stripe_service.retrieve_invoice, intent.invoice)
     if not invoice.subscription:
         return None
 
-    return db.query(Donation).filter(
-        Donation.stripe_subscription_id == invoice.subscription
-    ).first()
+    return await db.scalar(
+        select(Donation).where(Donation.stripe_subscription_id == invoice.subscription)
+    )
 
 
-async def _mark_donation_succeeded(donation: Donation, db: Session) -> None:
+def _set_donation_status(db: Session, donation: Donation, status: str) -> bool:
+    """Move a donation to a new status and update the totals, without committing.
+
+    The conditional UPDATE makes the transition happen exactly once even when
+    Stripe delivers the same event to two workers, so the rollups, donor
+    totals and live campaign total are adjusted exactly once too; returns
+    False if the donation was already in ``status``. Runs on the sync
+    session, via ``run_sync`` from async routes.
+    """
+    previous_status = donation.status
+    changed = db.execute(
+        update(Donation)
+        .where(Donation.id == donation.id, Donation.status != status)
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not changed:
+        return False
+    set_committed_value(donation, "status", status)
+    donation_rollups.record_status_change(db, donation, previous_status)
+    record_gift_status_change(db, donation, previous_status)
+    campaign_totals.record_status_change(db, donation, previous_status)
+    return True
+
+
+def _mark_donation_succeeded(db: Session, donation: Donation) -> None:
     if donation.status == "succeeded":
         return
 
-    donation.status = "succeeded"
-    db.commit()
-
+    if not _set_donation_status(db, donation, "succeeded"):
+        db.rollback()
+        return
     if donation.donor_email:
-        await email_service.send_donation_receipt(
+        email_service.queue_donation_receipt(
+            db,
             donation.donor_email,
             donation.amount_cents / 100,
             donation.id,
         )
+    db.commit()
+    outbox_dispatcher.notify()
+
+
+def reconcile_pending_donations(db: Session, older_than_minutes: float, limit: int = 100) -> dict:
+    """Settle pending donations whose Stripe webhook never arrived.
+
+    Run by the scheduler. Donations still pending ``older_than_minutes``
+    after checkout are looked up by payment intent, newest first: succeeded
+    ones are marked succeeded (and get their receipt) and canceled ones
+    failed, as the webhook would have. Checkouts older than two days are
+    left alone; those were abandoned.
+    """
+    now = datetime.utcnow()
+    pending = db.scalars(
+        select(Donation)
+        .where(
+            Donation.status == "pending",
+            Donation.stripe_payment_intent_id.isnot(None),
+            Donation.created_at < now - timedelta(minutes=older_than_minutes),
+            Donation.created_at > now - timedelta(days=2),
+        )
+        .order_by(Donation.created_at.desc())
+        .limit(limit)
+    ).all()
+    settled = {"checked": len(pending), "succeeded": 0, "failed": 0}
+    for donation in pending:
+        intent = stripe_service.retrieve_payment_intent(donation.stripe_payment_intent_id)
+        if intent is None:
+            continue
+        if intent.status == "succeeded":
+            _mark_donation_succeeded(db, donation)
+            settled["succeeded"] += 1
+        elif intent.status == "canceled" and _set_donation_status(db, donation, "failed"):
+            db.commit()
+            settled["failed"] += 1
+    return settled
+
+
+async def _record_subscription_event(
+    db: AsyncSession, event, subscription_id: str, event_type: str, **details
+) -> None:
+    recorded = await db.run_sync(
+        lambda session: recurring_giving.record_subscription_event(
+            session,
+            stripe_event_id=event.id,
+            stripe_subscription_id=subscription_id,
+            event_type=event_type,
+            occurred_at=datetime.utcfromtimestamp(event.created),
+            **details,
+        )
+    )
+    if recorded:
+        await db.commit()
 
 
 @router.post("/checkout")
-async def create_checkout(donation_data: DonationCheckout, db: Session = Depends(get_db)):
+async def create_checkout(
+    donation_data: DonationCheckout,
+    db: AsyncSession = Depends(get_write_db)
+):
     """Create Stripe payment intent or subscription"""
+    rate_limiter.check_email("checkout", donation_data.donor_email)
 
     if donation_data.is_recurring:
-        customer = stripe_service.create_customer(
+        customer = await run_in_threadpool(
+            stripe_service.create_customer,
             email=donation_data.donor_email,
             name=donation_data.donor_name,
         )
         if not customer:
             raise HTTPException(status_code=500, detail="Failed to create customer")
 
-        price = stripe_service.create_price(
+        price = await run_in_threadpool(
+            stripe_service.create_price,
             amount_cents=donation_data.amount_cents,
             recurring=True,
         )
         if not price:
             raise HTTPException(status_code=500, detail="Failed to create price")
 
-        subscription = stripe_service.create_subscription(
+        subscription = await run_in_threadpool(
+            stripe_service.create_subscription,
             customer_id=customer.id,
             price_id=price.id,
             metadata={
@@ -88,25 +189,31 @@ async def create_checkout(donation_data: DonationCheckout, db: Session = Depends
         if not payment_intent or not payment_intent.client_secret:
             raise HTTPException(status_code=500, detail="Failed to initialize subscription payment")
 
+        donor = await db.run_sync(
+            get_or_create_donor, donation_data.donor_email, donation_data.donor_name
+        )
         donation = Donation(
             amount_cents=donation_data.amount_cents,
             donor_email=donation_data.donor_email,
             donor_name=donation_data.donor_name,
+            donor_id=donor.id if donor else None,
             stripe_payment_intent_id=payment_intent.id,
             stripe_subscription_id=subscription.id,
             is_recurring=True,
             dedication_note=donation_data.dedication_note,
             status="pending",
+            created_at=datetime.utcnow(),
         )
         db.add(donation)
-        db.commit()
+        await db.commit()
 
         return {
             "client_secret": payment_intent.client_secret,
             "subscription_id": subscription.id,
         }
 
-    intent = stripe_service.create_payment_intent(
+    intent = await run_in_threadpool(
+        stripe_service.create_payment_intent,
         amount_cents=donation_data.amount_cents,
         metadata={
             "donor_email": donation_data.donor_email or "",
@@ -117,17 +224,22 @@ async def create_checkout(donation_data: DonationCheckout, db: Session = Depends
     if not intent:
         raise HTTPException(status_code=500, detail="Failed to create payment intent")
 
+    donor = await db.run_sync(
+        get_or_create_donor, donation_data.donor_email, donation_data.donor_name
+    )
     donation = Donation(
         amount_cents=donation_data.amount_cents,
         donor_email=donation_data.donor_email,
         donor_name=donation_data.donor_name,
+        donor_id=donor.id if donor else None,
         stripe_payment_intent_id=intent.id,
         is_recurring=False,
         dedication_note=donation_data.dedication_note,
         status="pending",
+        created_at=datetime.utcnow(),
     )
     db.add(donation)
-    db.commit()
+    await db.commit()
 
     return {
         "client_secret": intent.client_secret,
@@ -136,13 +248,13 @@ async def create_checkout(donation_data: DonationCheckout, db: Session = Depends
 
 
 @router.get("/verify", response_model=DonationVerifyResponse)
-def verify_donation(payment_intent: str, db: Session = Depends(get_db)):
+async def verify_donation(payment_intent: str, db: AsyncSession = Depends(get_read_db)):
     """Verify a donation after Stripe redirect"""
-    intent = stripe_service.retrieve_payment_intent(payment_intent)
+    intent = await run_in_threadpool(stripe_service.retrieve_payment_intent, payment_intent)
     if not intent or intent.status != "succeeded":
         raise HTTPException(status_code=400, detail="Payment not completed")
 
-    donation = _find_donation_by_payment_intent(db, payment_intent)
+    donation = await _find_donation_by_payment_intent(db, payment_intent)
     if not donation:
         raise HTTPException(status_code=404, detail="Donation not found")
 
@@ -155,7 +267,7 @@ def verify_donation(payment_intent: str, db: Session = Depends(get_db)):
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_write_db)):
     """Handle Stripe webhooks"""
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
@@ -166,60 +278,108 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
 
     if event.type == "payment_intent.succeeded":
         payment_intent = event.data.object
-        donation = _find_donation_by_payment_intent(db, payment_intent.id)
+        donation = await _find_donation_by_payment_intent(db, payment_intent.id)
         if donation:
-            await _mark_donation_succeeded(donation, db)
+            await db.run_sync(_mark_donation_succeeded, donation)
 
     elif event.type == "payment_intent.payment_failed":
         payment_intent = event.data.object
-        donation = _find_donation_by_payment_intent(db, payment_intent.id)
-        if donation:
-            donation.status = "failed"
-            db.commit()
+        donation = await _find_donation_by_payment_intent(db, payment_intent.id)
+        if donation and await db.run_sync(_set_donation_status, donation, "failed"):
+            await db.commit()
 
     elif event.type == "invoice.payment_succeeded":
         invoice = event.data.object
+        if invoice.subscription:
+            await _record_subscription_event(
+                db,
+                event,
+                invoice.subscription,
+                recurring_giving.INVOICE_EVENT_TYPES.get(invoice.billing_reason, "renewed"),
+                amount_cents=invoice.amount_paid,
+                currency=invoice.currency,
+                donor_email=invoice.customer_email,
+            )
         if invoice.subscription and invoice.billing_reason == "subscription_create":
-            donation = db.query(Donation).filter(
-                Donation.stripe_subscription_id == invoice.subscription
-            ).first()
+            donation = await db.scalar(
+                select(Donation).where(Donation.stripe_subscription_id == invoice.subscription)
+            )
             if donation:
-                await _mark_donation_succeeded(donation, db)
+                await db.run_sync(_mark_donation_succeeded, donation)
+
+    elif event.type == "invoice.payment_failed":
+        invoice = event.data.object
+        if invoice.subscription:
+            await _record_subscription_event(
+                db,
+                event,
+                invoice.subscription,
+                "payment_failed",
+                amount_cents=invoice.amount_due,
+                currency=invoice.currency,
+                donor_email=invoice.customer_email,
+            )
+
+    elif event.type == "customer.subscription.deleted":
+        subscription = event.data.object
+        await _record_subscription_event(
+            db,
+            event,
+            subscription.id,
+            "canceled",
+            currency=subscription.currency,
+        )
 
     return {"status": "success"}
 
 
 @router.get("/stats", response_model=DonationStats)
-def get_donation_stats(
-    db: Session = Depends(get_db),
+async def get_donation_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    currency: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     _admin: ClerkAdmin = Depends(get_current_admin),
 ):
-    """Get donation statistics (admin only)"""
-    total_amount = db.query(func.sum(Donation.amount_cents)).filter(
-        Donation.status == "succeeded"
-    ).scalar() or 0
+    """Get donation statistics and a daily series (admin only)
+
+    The series covers at most DONATION_STATS_MAX_DAYS days, by default the
+    last ones up to end_date or today; series_start is its first day.
+    """
+    max_days = settings.DONATION_STATS_MAX_DAYS
+    last_day = end_date or datetime.utcnow().date()
+    if start_date and last_day - start_date >= timedelta(days=max_days):
+        raise HTTPException(status_code=400, detail=f"Date range is longer than {max_days} days")
+    return await db.run_sync(
+        donation_rollups.get_donation_stats, start_date, end_date, currency, max_days
+    )
 
-    total_count = db.query(func.count(Donation.id)).filter(
-        Donation.status == "succeeded"
-    ).scalar() or 0
 
-    recurring_count = db.query(func.count(Donation.id)).filter(
-        Donation.status == "succeeded",
-        Donation.is_recurring == True,
-    ).scalar() or 0
+@router.get("/stats/live")
+async def stream_campaign_total():
+    """Stream the running donation total as Server-Sent Events"""
+    if campaign_totals.is_full():
+        raise HTTPException(status_code=503, detail="Too many listeners, try again later")
+    return StreamingResponse(
+        campaign_totals.stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
 
-    return {
-        "total_amount_cents": total_amount,
-        "total_count": total_count,
-        "recurring_count": recurring_count,
-    }
+
+@router.get("/recurring/analytics", response_model=RecurringAnalytics)
+async def get_recurring_analytics(
+    currency: str = "usd",
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin),
+):
+    """Monthly recurring giving, churn and retention cohorts (admin only)"""
+    return await db.run_sync(recurring_giving.compute_recurring_analytics, currency.lower())
 
 
 @router.get("/list", response_model=List[DonationResponse])
-def list_donations(
-    db: Session = Depends(get_db),
+async def list_donations(
+    db: AsyncSession = Depends(get_read_db),
     _admin: ClerkAdmin = Depends(get_current_admin),
 ):
     """List all donations (admin only)"""
-    donations = db.query(Donation).order_by(Donation.created_at.desc()).all()
-    return donations
+    donations = await db.scalars(select(Donation).order_by(Donation.created_at.desc()))
+    return donations.all()
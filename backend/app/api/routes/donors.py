@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.core.database import get_read_db
+from app.models.donation import Donation
+from app.models.donor import Donor
+from app.schemas.donor import DonorDetailResponse, DonorResponse
+from app.services.auth import ClerkAdmin, get_current_admin
+from app.services.donors import canonical_email
+
+router = APIRouter(prefix="/api/donors", tags=["donors"])
+
+RECENT_DONATIONS_LIMIT = 10
+
+
+# Admin routes
+@router.get("/admin", response_model=List[DonorResponse])
+async def search_donors(
+    q: Optional[str] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Search donors by email prefix, or list top donors (admin only)"""
+    limit = min(limit, 100)
+    query = select(Donor)
+    prefix = canonical_email(q)
+    if prefix:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Donor.email.like(f"{escaped}%", escape="\\")).order_by(Donor.email)
+    else:
+        query = query.order_by(Donor.lifetime_amount_cents.desc())
+    donors = await db.scalars(query.limit(limit))
+    return donors.all()
+
+
+@router.get("/admin/{donor_id}", response_model=DonorDetailResponse)
+async def get_donor(
+    donor_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Get a donor's lifetime totals and most recent donations (admin only)"""
+    donor = await db.get(Donor, donor_id)
+    if not donor:
+        raise HTTPException(status_code=404, detail="Donor not found")
+
+    recent_donations = await db.scalars(
+        select(Donation).where(
+            Donation.donor_id == donor_id
+        ).order_by(Donation.created_at.desc()).limit(RECENT_DONATIONS_LIMIT)
+    )
+
+    response = DonorResponse.model_validate(donor).model_dump()
+    response["recent_donations"] = recent_donations.all()
+    return response
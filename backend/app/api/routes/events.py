@@ -1,41 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_read_db, get_write_db
+from app.core.rate_limit import rate_limiter
 from app.models.event import Event
 from app.models.rsvp import RSVP
 from app.schemas.event import EventCreate, EventUpdate, EventResponse
 from app.schemas.rsvp import RSVPCreate
 from app.services.auth import ClerkAdmin, get_current_admin
+from app.services.webhooks.bulk_mail import queue_rsvp_confirmation
+from app.services.webhooks.outbox_dispatcher import outbox_dispatcher
 
 router = APIRouter(tags=["events"])
 
 
 @router.get("/api/events", response_model=List[EventResponse])
-def get_events(db: Session = Depends(get_db)):
+async def get_events(db: AsyncSession = Depends(get_read_db)):
     """Get all published upcoming events"""
-    events = db.query(Event).filter(
-        Event.is_published == True,
-        Event.start_at >= datetime.utcnow()
-    ).order_by(Event.start_at).all()
-    return events
+    events = await db.scalars(
+        select(Event).where(
+            Event.is_published == True,
+            Event.start_at >= datetime.utcnow()
+        ).order_by(Event.start_at)
+    )
+    return events.all()
 
 
 @router.get("/api/events/{event_id}", response_model=EventResponse)
-def get_event(event_id: int, db: Session = Depends(get_db)):
+async def get_event(event_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get single event by ID"""
-    event = db.query(Event).filter(Event.id == event_id, Event.is_published == True).first()
+    event = await db.scalar(select(Event).where(Event.id == event_id, Event.is_published == True))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     return event
 
 
 @router.post("/api/events/{event_id}/rsvp", status_code=status.HTTP_201_CREATED)
-def create_rsvp(event_id: int, rsvp_data: RSVPCreate, db: Session = Depends(get_db)):
+async def create_rsvp(
+    event_id: int,
+    rsvp_data: RSVPCreate,
+    db: AsyncSession = Depends(get_write_db)
+):
     """Create RSVP for an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    rate_limiter.check_email("rsvp", rsvp_data.email)
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -43,74 +54,75 @@ def create_rsvp(event_id: int, rsvp_data: RSVPCreate, db: Session = Depends(get_
     if event.external_registration_url:
         return {"external_url": event.external_registration_url}
     
-    # Otherwise, store RSVP
+    # Otherwise, store RSVP and queue its confirmation in the same transaction
     rsvp = RSVP(
         event_id=event_id,
         name=rsvp_data.name,
         email=rsvp_data.email
     )
     db.add(rsvp)
-    db.commit()
+    queue_rsvp_confirmation(db, event, rsvp_data.name, rsvp_data.email)
+    await db.commit()
+    outbox_dispatcher.notify()
     return {"message": "RSVP created successfully"}
 
 
 # Admin routes
 @router.post("/api/admin/events", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-def create_event(
+async def create_event(
     event_data: EventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Create new event (admin only)"""
     event = Event(**event_data.model_dump())
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.get("/api/admin/events", response_model=List[EventResponse])
-def get_all_events_admin(
-    db: Session = Depends(get_db),
+async def get_all_events_admin(
+    db: AsyncSession = Depends(get_read_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Get all events including unpublished (admin only)"""
-    events = db.query(Event).order_by(Event.start_at.desc()).all()
-    return events
+    events = await db.scalars(select(Event).order_by(Event.start_at.desc()))
+    return events.all()
 
 
 @router.put("/api/admin/events/{event_id}", response_model=EventResponse)
-def update_event(
+async def update_event(
     event_id: int,
     event_data: EventUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Update event (admin only)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     for key, value in event_data.model_dump(exclude_unset=True).items():
         setattr(event, key, value)
     
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    await db.refresh(event)
     return event
 
 
 @router.delete("/api/admin/events/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+async def delete_event(
     event_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Delete event (admin only)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    event = await db.get(Event, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
     return None
-
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status, Request
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Response, status, Request
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 import uuid
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_read_db, get_write_db
+from app.core.rate_limit import rate_limiter
 from app.models.gallery_photo import GalleryPhoto
 from app.schemas.gallery import GalleryPhotoResponse, GalleryPhotoApprove
-from app.services.auth import ClerkAdmin, get_current_admin
-from app.services.storage.s3_service import s3_service
+from app.services.auth import ClerkAdmin, create_stream_token, get_current_admin, stream_admin
+from app.services.realtime.moderation_feed import (
+    latest_event_id,
+    moderation_feed,
+    record_moderation_event,
+)
+from app.services.realtime.sse import SSE_HEADERS
+from app.services.storage.s3_service import get_s3_service
 
 router = APIRouter(prefix="/api/gallery", tags=["gallery"])
 
@@ -26,21 +39,23 @@ def validate_image_file(file: UploadFile) -> bool:
 
 
 @router.get("", response_model=List[GalleryPhotoResponse])
-def get_gallery_photos(
+async def get_gallery_photos(
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get approved gallery photos"""
-    photos = db.query(GalleryPhoto).filter(
-        GalleryPhoto.approved == True
-    ).order_by(GalleryPhoto.submitted_at.desc()).offset(skip).limit(limit).all()
+    photos = await db.scalars(
+        select(GalleryPhoto).where(
+            GalleryPhoto.approved == True
+        ).order_by(GalleryPhoto.submitted_at.desc()).offset(skip).limit(limit)
+    )
     
     # Add signed URLs
     result = []
     for photo in photos:
         photo_dict = GalleryPhotoResponse.model_validate(photo).model_dump()
-        photo_dict["url"] = s3_service.get_signed_url(photo.s3_key) or ""
+        photo_dict["url"] = get_s3_service().get_signed_url(photo.s3_key) or ""
         result.append(GalleryPhotoResponse(**photo_dict))
     
     return result
@@ -55,9 +70,10 @@ async def submit_photo(
     description: Optional[str] = Form(None),
     consent_signed: bool = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """Submit a photo to the gallery"""
+    rate_limiter.check_email("gallery_submit", uploader_email)
     if not consent_signed:
         raise HTTPException(status_code=400, detail="Consent must be signed")
     
@@ -75,7 +91,7 @@ async def submit_photo(
     
     # Upload to S3
     content_type = file.content_type or "image/jpeg"
-    success = s3_service.upload_file(content, s3_key, content_type)
+    success = await run_in_threadpool(get_s3_service().upload_file, content, s3_key, content_type)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to upload file")
     
@@ -94,72 +110,128 @@ async def submit_photo(
         approved=False
     )
     db.add(photo)
-    db.commit()
+    await db.flush()
+    await db.refresh(photo)
+    record_moderation_event(db, photo, "added")
+    await db.commit()
+    moderation_feed.notify()
     
     return {"message": "Photo submitted successfully", "id": photo.id}
 
 
 # Admin routes
 @router.get("/admin/pending", response_model=List[GalleryPhotoResponse])
-def get_pending_photos(
-    db: Session = Depends(get_db),
+async def get_pending_photos(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
-    """Get pending gallery photos (admin only)"""
-    photos = db.query(GalleryPhoto).filter(
-        GalleryPhoto.approved == False
-    ).order_by(GalleryPhoto.submitted_at.desc()).all()
+    """Get pending gallery photos (admin only)
+
+    X-Moderation-Event-Id is the feed position this snapshot is current to;
+    pass it as last_event_id to /admin/events to receive later changes.
+    """
+    response.headers["X-Moderation-Event-Id"] = str(await db.run_sync(latest_event_id))
+    photos = await db.scalars(
+        select(GalleryPhoto).where(
+            GalleryPhoto.approved == False
+        ).order_by(GalleryPhoto.submitted_at.desc())
+    )
     
     # Add signed URLs
     result = []
     for photo in photos:
         photo_dict = GalleryPhotoResponse.model_validate(photo).model_dump()
-        photo_dict["url"] = s3_service.get_signed_url(photo.s3_key) or ""
+        photo_dict["url"] = get_s3_service().get_signed_url(photo.s3_key) or ""
         result.append(GalleryPhotoResponse(**photo_dict))
     
     return result
 
 
 @router.put("/admin/{photo_id}/approve", response_model=GalleryPhotoResponse)
-def approve_photo(
+async def approve_photo(
     photo_id: int,
     approve_data: GalleryPhotoApprove,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Approve or reject a photo (admin only)"""
-    photo = db.query(GalleryPhoto).filter(GalleryPhoto.id == photo_id).first()
+    photo = await db.get(GalleryPhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     
+    was_approved = bool(photo.approved)
     photo.approved = approve_data.approved
     if approve_data.approved:
         photo.approved_at = datetime.utcnow()
+    if approve_data.approved and not was_approved:
+        record_moderation_event(db, photo, "approved")
+    elif was_approved and not approve_data.approved:
+        record_moderation_event(db, photo, "added")
     
-    db.commit()
-    db.refresh(photo)
+    await db.commit()
+    moderation_feed.notify()
+    await db.refresh(photo)
     
     photo_dict = GalleryPhotoResponse.model_validate(photo).model_dump()
-    photo_dict["url"] = s3_service.get_signed_url(photo.s3_key) or ""
+    photo_dict["url"] = get_s3_service().get_signed_url(photo.s3_key) or ""
     return GalleryPhotoResponse(**photo_dict)
 
 
 @router.delete("/admin/{photo_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_photo(
+async def delete_photo(
     photo_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     _admin: ClerkAdmin = Depends(get_current_admin)
 ):
     """Delete a photo (admin only)"""
-    photo = db.query(GalleryPhoto).filter(GalleryPhoto.id == photo_id).first()
+    photo = await db.get(GalleryPhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     
     # Delete from S3
-    s3_service.delete_file(photo.s3_key)
+    await run_in_threadpool(get_s3_service().delete_file, photo.s3_key)
     
     # Delete from database
-    db.delete(photo)
-    db.commit()
+    if not photo.approved:
+        record_moderation_event(db, photo, "deleted")
+    await db.delete(photo)
+    await db.commit()
+    moderation_feed.notify()
     return None
 
+
+MODERATION_STREAM = "moderation"
+
+
+@router.post("/admin/events/token")
+async def create_moderation_stream_token(admin: ClerkAdmin = Depends(get_current_admin)):
+    """Short-lived token for opening /admin/events with EventSource (admin only)"""
+    return {
+        "token": create_stream_token(admin, MODERATION_STREAM),
+        "expires_in": int(settings.SSE_TOKEN_SECONDS),
+    }
+
+
+@router.get("/admin/events")
+async def stream_moderation_events(
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+    _admin: ClerkAdmin = Depends(stream_admin(MODERATION_STREAM))
+):
+    """Stream moderation queue changes as Server-Sent Events (admin only)
+
+    Events are added, approved and deleted, each carrying the photo id.
+    Resume with the Last-Event-ID header or the last_event_id parameter.
+    EventSource cannot send an Authorization header: get a token from
+    /admin/events/token and pass it as ?token=. The token is checked when
+    the stream opens, so fetch a new one before reconnecting after it expires.
+    """
+    if moderation_feed.is_full():
+        raise HTTPException(status_code=503, detail="Too many listeners, try again later")
+    if last_event_id_header is not None:
+        last_event_id = last_event_id_header
+    return StreamingResponse(
+        moderation_feed.stream(last_event_id), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
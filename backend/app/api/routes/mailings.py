@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.core.database import get_read_db, get_write_db
+from app.models.bulk_mail_recipient import BulkMailRecipient
+from app.models.bulk_mailing import BulkMailing
+from app.models.event import Event
+from app.schemas.bulk_mail import (
+    BulkMailingCreate,
+    BulkMailingResponse,
+    BulkMailRecipientResponse,
+)
+from app.services.auth import ClerkAdmin, get_current_admin
+from app.services.webhooks.bulk_mail import DEFAULT_TEMPLATES, default_scheduled_at
+
+router = APIRouter(tags=["mailings"])
+
+
+@router.post(
+    "/api/admin/events/{event_id}/mailings",
+    response_model=BulkMailingResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_mailing(
+    event_id: int,
+    mailing_data: BulkMailingCreate,
+    db: AsyncSession = Depends(get_write_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Schedule an email to everyone who RSVP'd to an event (admin only)"""
+    event = await db.get(Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    defaults = DEFAULT_TEMPLATES[mailing_data.kind]
+    mailing = BulkMailing(
+        event_id=event_id,
+        kind=mailing_data.kind,
+        subject_template=mailing_data.subject_template or defaults["subject"],
+        body_template=mailing_data.body_template or defaults["body"],
+        html_template=mailing_data.html_template,
+        status="scheduled",
+        scheduled_at=mailing_data.send_at
+        or default_scheduled_at(event, mailing_data.hours_before_start),
+        last_rsvp_id=0,
+        sent_count=0,
+        failed_count=0,
+    )
+    db.add(mailing)
+    await db.commit()
+    await db.refresh(mailing)
+    return mailing
+
+
+@router.get("/api/admin/events/{event_id}/mailings", response_model=List[BulkMailingResponse])
+async def get_event_mailings(
+    event_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """List mailings for an event (admin only)"""
+    mailings = await db.scalars(
+        select(BulkMailing).where(
+            BulkMailing.event_id == event_id
+        ).order_by(BulkMailing.scheduled_at.desc())
+    )
+    return mailings.all()
+
+
+@router.get("/api/admin/mailings/{mailing_id}", response_model=BulkMailingResponse)
+async def get_mailing(
+    mailing_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Get mailing progress (admin only)"""
+    mailing = await db.get(BulkMailing, mailing_id)
+    if not mailing:
+        raise HTTPException(status_code=404, detail="Mailing not found")
+    return mailing
+
+
+@router.get(
+    "/api/admin/mailings/{mailing_id}/recipients",
+    response_model=List[BulkMailRecipientResponse],
+)
+async def get_mailing_recipients(
+    mailing_id: int,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_read_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Get per-recipient delivery status for a mailing (admin only)"""
+    query = select(BulkMailRecipient).where(BulkMailRecipient.mailing_id == mailing_id)
+    if status:
+        query = query.where(BulkMailRecipient.status == status)
+    recipients = await db.scalars(query.order_by(BulkMailRecipient.id).offset(skip).limit(limit))
+    return recipients.all()
+
+
+@router.post("/api/admin/mailings/{mailing_id}/cancel", response_model=BulkMailingResponse)
+async def cancel_mailing(
+    mailing_id: int,
+    db: AsyncSession = Depends(get_write_db),
+    _admin: ClerkAdmin = Depends(get_current_admin)
+):
+    """Cancel a scheduled or running mailing (admin only)"""
+    mailing = await db.get(BulkMailing, mailing_id)
+    if not mailing:
+        raise HTTPException(status_code=404, detail="Mailing not found")
+    if mailing.status not in ("scheduled", "running"):
+        raise HTTPException(status_code=400, detail=f"Mailing is already {mailing.status}")
+
+    mailing.status = "canceled"
+    mailing.lease_expires_at = None
+    await db.commit()
+    await db.refresh(mailing)
+    return mailing
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from .config import settings
+from .metrics import HTTP_REQUESTS_SHED
+
+PUBLIC = "public"
+CHECKOUT = "checkout"
+WEBHOOK = "webhook"
+ADMIN = "admin"
+ROUTE_CLASSES = (PUBLIC, CHECKOUT, WEBHOOK, ADMIN)
+
+# The class of the request being handled, so pool waits can be attributed
+_route_class: ContextVar[Optional[str]] = ContextVar("route_class", default=None)
+
+
+class WaitAverage:
+    """Exponentially weighted average of pool checkout waits.
+
+    Each wait moves the average ``weight`` of the way towards it, and the
+    average halves every ``half_life`` seconds in between, so a pool that
+    has stopped making anyone wait stops looking saturated.
+    """
+
+    def __init__(self, weight: float = 0.2, half_life: float = 2.0):
+        self.weight = weight
+        self.half_life = half_life
+        self._value = 0.0
+        self._at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * 0.5 ** ((now - self._at) / self.half_life)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._value = self._decayed(now) * (1 - self.weight) + seconds * self.weight
+            self._at = now
+
+    def value(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+
+class RouteClassifier:
+    """Maps a request path to its route class by the first matching prefix.
+
+    A rule with class None exempts its paths from admission control
+    (health checks, metrics, long-lived streams); unmatched paths are
+    ``default``.
+    """
+
+    def __init__(self, rules: list[tuple[str, Optional[str]]], default: str = PUBLIC):
+        self.rules = rules
+        self.default = default
+
+    def __call__(self, path: str) -> Optional[str]:
+        for prefix, route_class in self.rules:
+            if path.startswith(prefix):
+                return route_class
+        return self.default
+
+
+class AdmissionController:
+    """Turns requests away early when the worker is overloaded.
+
+    Tracks in-flight requests per route class, and how long checkouts wait
+    for a database connection (overall and per class). A class with a
+    limit is shed once its in-flight count reaches the limit or its own
+    requests' average checkout wait passes its wait limit, so waits of
+    background jobs and other classes do not count against it; classes
+    without limits (checkout and webhooks) are always admitted, and get
+    the connections the shed requests would have queued for.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: dict[str, int],
+        max_pool_wait: dict[str, float],
+        retry_after: int = 2,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.retry_after = retry_after
+        self.in_flight = dict.fromkeys(ROUTE_CLASSES, 0)
+        self.shed = dict.fromkeys(ROUTE_CLASSES, 0)
+        self.pool_wait = WaitAverage()
+        self.class_pool_wait = {route_class: WaitAverage() for route_class in ROUTE_CLASSES}
+
+    def watch_pool(self, engine) -> None:
+        """Count checkout waits of ``engine``'s pool towards saturation"""
+        stats = getattr(engine.pool, "wait_stats", None)
+        if stats is not None:
+            stats.listeners.append(self._observe_wait)
+
+    def _observe_wait(self, seconds: float, timed_out: bool) -> None:
+        self.pool_wait.observe(seconds)
+        route_class = _route_class.get()
+        if route_class is not None:
+            self.class_pool_wait[route_class].observe(seconds)
+
+    def overloaded(self, route_class: str) -> Optional[str]:
+        """Why a new request of ``route_class`` should be shed, or None to admit it"""
+        limit = self.max_in_flight.get(route_class)
+        if limit is not None and self.in_flight[route_class] >= limit:
+            return "in_flight"
+        wait_limit = self.max_pool_wait.get(route_class)
+        if wait_limit is not None and self.class_pool_wait[route_class].value() > wait_limit:
+            return "pool_wait"
+        return None
+
+    def saturated(self) -> list[str]:
+        """Route classes currently being shed"""
+        return [route_class for route_class in ROUTE_CLASSES if self.overloaded(route_class)]
+
+    def status(self) -> dict:
+        return {
+            "saturated": self.saturated(),
+            "in_flight": dict(self.in_flight),
+            "shed": dict(self.shed),
+            "pool_wait_ms": round(self.pool_wait.value() * 1000, 3),
+            "pool_wait_ms_by_class": {
+                route_class: round(average.value() * 1000, 3)
+                for route_class, average in self.class_pool_wait.items()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    """Answers 503 with Retry-After, before any work, for requests to shed"""
+
+    def __init__(
+        self, app, controller: AdmissionController, classify: Callable[[str], Optional[str]]
+    ):
+        self.app = app
+        self.controller = controller
+        self.classify = classify
+
+    async def _shed(self, send, route_class: str, reason: str) -> None:
+        self.controller.shed[route_class] += 1
+        HTTP_REQUESTS_SHED.labels(route_class, reason).inc()
+        body = json.dumps({"detail": "Server is busy, please try again shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = self.classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.controller.overloaded(route_class)
+        if reason is not None:
+            await self._shed(send, route_class, reason)
+            return
+
+        in_flight = self.controller.in_flight
+        in_flight[route_class] += 1
+        token = _route_class.set(route_class)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _route_class.reset(token)
+            in_flight[route_class] -= 1
+
+
+admission = AdmissionController(
+    max_in_flight={
+        PUBLIC: settings.ADMISSION_PUBLIC_MAX_IN_FLIGHT,
+        ADMIN: settings.ADMISSION_ADMIN_MAX_IN_FLIGHT,
+    },
+    max_pool_wait={
+        PUBLIC: settings.ADMISSION_PUBLIC_MAX_POOL_WAIT_MS / 1000,
+        ADMIN: settings.ADMISSION_ADMIN_MAX_POOL_WAIT_MS / 1000,
+    },
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
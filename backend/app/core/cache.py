@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Small in-process cache whose entries expire after ``ttl`` seconds.
+
+    ``get_or_load`` lets one caller per key run the loader while concurrent
+    callers for the same key wait for its result, so an expired entry is
+    recomputed once rather than once per request.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._async_locks: Dict[Hashable, asyncio.Lock] = {}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = loader()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+    def invalidate(self, key: Hashable = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """``get_or_load`` for coroutine loaders, for use from async routes"""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        key_lock = self._async_locks.setdefault(key, asyncio.Lock())
+        async with key_lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+            value = await loader()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
@@ -2,8 +2,139 @@ from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    # Debug mode: adds diagnostic response headers
+    DEBUG: bool = False
+
+    # Logging: LOG_FORMAT is "json" or "text"; LOG_SAMPLING keeps a fraction
+    # of a logger's records below ERROR, e.g. "app.sql=0.1,uvicorn.access=0.05"
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLING: str = ""
+    LOG_QUEUE_SIZE: int = 10000
+
     # Database
     DATABASE_URL: str = "sqlite:///./tdrmf.db"
+    # Comma-separated read replica URLs; reads use the primary when empty
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 10.0
+    REPLICA_CHECK_SECONDS: float = 5.0
+    READ_YOUR_WRITES_SECONDS: float = 15.0
+
+    # Database engine (pool settings apply per engine, per worker process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 65536
+
+    # SQL instrumentation (per-request query stats, slow query and slow
+    # request logs, N+1 warnings). A request is logged as slow when its
+    # statements took SQL_SLOW_REQUEST_MS in total.
+    SQL_INSTRUMENTATION: bool = True
+    SQL_SLOW_QUERY_MS: float = 250.0
+    SQL_SLOW_REQUEST_MS: float = 500.0
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Prometheus metrics (/metrics). With several workers, point
+    # PROMETHEUS_MULTIPROC_DIR at a directory shared by all of them and
+    # emptied before they start; scrapes then report the sum over workers.
+    METRICS_ENABLED: bool = True
+    PROMETHEUS_MULTIPROC_DIR: str = ""
+    # Scrapers must send this as a bearer token when set
+    METRICS_BEARER_TOKEN: str = ""
+
+    # Request tracing, on when an exporter is set: "jsonl" appends spans to
+    # TRACING_JSONL_PATH ({pid} is replaced per worker), "otlp" posts them
+    # to an OTLP/HTTP collector. TRACE_SAMPLE_RATE of requests are traced,
+    # plus those whose traceparent asks for it, up to TRACE_MAX_PER_SECOND
+    # per worker in all (0 for no cap).
+    TRACING_EXPORTER: str = ""
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_MAX_PER_SECOND: float = 10.0
+    TRACING_SERVICE_NAME: str = "tdrmf-api"
+    TRACING_JSONL_PATH: str = "traces-{pid}.jsonl"
+    TRACING_JSONL_MAX_BYTES: int = 50_000_000
+    TRACING_JSONL_BACKUPS: int = 3
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_QUEUE_SIZE: int = 10000
+
+    # Admin sampling profiler (POST /api/admin/profile)
+    PROFILER_MAX_SECONDS: float = 120.0
+
+    # Startup warm-up; /health answers 503 until it is done. Opens
+    # WARMUP_DB_CONNECTIONS per pool (capped at DB_POOL_SIZE), requests
+    # WARMUP_PATHS in-process, and with WARMUP_OUTBOUND connects to S3 and
+    # Clerk so the first real calls reuse those connections.
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 2
+    WARMUP_PATHS: str = "/api/events,/api/sponsors,/api/gallery"
+    WARMUP_OUTBOUND: bool = True
+    WARMUP_STEP_TIMEOUT_SECONDS: float = 10.0
+
+    # Admission control: public and admin requests get a 503 with
+    # Retry-After once that many are in flight, or once the average wait for
+    # a database connection passes the limit; checkout and webhooks are
+    # never shed. GET /health/ready reports 503 while public reads are shed.
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_PUBLIC_MAX_IN_FLIGHT: int = 64
+    ADMISSION_ADMIN_MAX_IN_FLIGHT: int = 16
+    ADMISSION_PUBLIC_MAX_POOL_WAIT_MS: float = 50.0
+    ADMISSION_ADMIN_MAX_POOL_WAIT_MS: float = 500.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+
+    # Outbound calls (Stripe, S3, Clerk, SMTP): each service gets at most
+    # OUTBOUND_MAX_CONCURRENT calls at once (callers wait up to
+    # OUTBOUND_QUEUE_TIMEOUT_SECONDS for a slot), idempotent calls are
+    # retried OUTBOUND_RETRIES times within OUTBOUND_CALL_BUDGET_SECONDS,
+    # and BREAKER_FAILURE_THRESHOLD failures in a row open the service's
+    # circuit for BREAKER_RESET_SECONDS. Per-attempt timeouts are per service.
+    OUTBOUND_MAX_CONCURRENT: int = 8
+    OUTBOUND_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    OUTBOUND_RETRIES: int = 2
+    OUTBOUND_RETRY_BACKOFF_SECONDS: float = 0.2
+    OUTBOUND_CALL_BUDGET_SECONDS: float = 15.0
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_SECONDS: float = 30.0
+    STRIPE_TIMEOUT_SECONDS: float = 10.0
+    S3_TIMEOUT_SECONDS: float = 5.0
+    CLERK_TIMEOUT_SECONDS: float = 5.0
+
+    # Rate limits on the public forms, as "<count>/<second|minute|hour|day>"
+    # (empty for no limit), per client IP and per email address. Buckets
+    # live in a SQLite file shared by the workers on a host, by default in
+    # the temp directory. Behind a proxy, set SERVE_FORWARDED_ALLOW_IPS so
+    # the client IP is the caller's and not the proxy's.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DB_PATH: str = ""
+    RATE_LIMIT_BUSY_TIMEOUT_MS: int = 50
+    RATE_LIMIT_CONTACT_PER_IP: str = "10/hour"
+    RATE_LIMIT_CONTACT_PER_EMAIL: str = "5/hour"
+    RATE_LIMIT_GALLERY_SUBMIT_PER_IP: str = "20/hour"
+    RATE_LIMIT_GALLERY_SUBMIT_PER_EMAIL: str = "10/hour"
+    RATE_LIMIT_RSVP_PER_IP: str = "30/hour"
+    RATE_LIMIT_RSVP_PER_EMAIL: str = "10/hour"
+    RATE_LIMIT_CHECKOUT_PER_IP: str = "60/hour"
+    RATE_LIMIT_CHECKOUT_PER_EMAIL: str = "10/hour"
+
+    # python -m app.serve. SERVE_WORKERS=0 runs one worker per CPU of the
+    # container's quota; SERVE_MIGRATIONS is "check", "upgrade" or "skip".
+    SERVE_BIND: str = "0.0.0.0:8000"
+    SERVE_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SERVE_WORKERS: int = 0
+    SERVE_PRELOAD: bool = True
+    SERVE_MAX_REQUESTS: int = 10000
+    SERVE_MAX_REQUESTS_JITTER: int = 1000
+    SERVE_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVE_WORKER_TIMEOUT_SECONDS: int = 60
+    SERVE_KEEPALIVE_SECONDS: int = 5
+    SERVE_ROLLING_RESTART_DELAY_SECONDS: float = 5.0
+    SERVE_MIGRATIONS: str = "check"
     
     # Clerk
     CLERK_SECRET_KEY: str = "sk_test_placeholder"
@@ -26,6 +157,60 @@ class Settings(BaseSettings):
     SMTP_USER: str = "placeholder@example.com"
     SMTP_PASS: str = "placeholder"
     CONTACT_TO_EMAIL: str = "info@tdrmf.org"
+    SMTP_START_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_KEEPALIVE_SECONDS: float = 30.0
+    SMTP_POOL_MAX_IDLE_SECONDS: float = 300.0
+
+    # Email outbox
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30.0
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = 3600.0
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 300.0
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 30
+
+    # Bulk mail (event reminders, RSVP confirmations)
+    BULK_MAIL_POOL_SIZE: int = 2
+    BULK_MAIL_RATE_PER_SECOND: float = 5.0
+    BULK_MAIL_CHUNK_SIZE: int = 100
+    BULK_MAIL_POLL_SECONDS: float = 30.0
+    BULK_MAIL_LEASE_SECONDS: float = 300.0
+    BULK_MAIL_REMINDER_LEAD_HOURS: float = 24.0
+
+    # Scheduled jobs. One worker of the deployment holds the scheduler lease
+    # (renewed every SCHEDULER_TICK_SECONDS) and runs the jobs; the others
+    # take over within SCHEDULER_LEASE_SECONDS if it goes away.
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LEASE_SECONDS: float = 30.0
+    SCHEDULER_TICK_SECONDS: float = 5.0
+    SCHEDULER_HISTORY_RETENTION_DAYS: int = 30
+    DONATION_RECONCILE_AFTER_MINUTES: float = 15.0
+    GALLERY_ORPHAN_MIN_AGE_HOURS: float = 24.0
+
+    # Live campaign total (SSE)
+    CAMPAIGN_TOTALS_CURRENCY: str = "usd"
+    CAMPAIGN_TOTALS_PUSH_SECONDS: float = 1.0
+    CAMPAIGN_TOTALS_RESEED_SECONDS: float = 60.0
+    CAMPAIGN_TOTALS_MAX_LISTENERS: int = 5000
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    # Lifetime of the ?token= that admin EventSource streams connect with
+    SSE_TOKEN_SECONDS: float = 60.0
+
+    # Admin dashboard
+    ADMIN_DASHBOARD_CACHE_SECONDS: float = 15.0
+    # Longest daily series /api/donations/stats returns. Without start_date
+    # it covers the last that many days; the totals still cover all time.
+    DONATION_STATS_MAX_DAYS: int = 366
+
+    # Moderation queue feed (SSE)
+    MODERATION_FEED_POLL_SECONDS: float = 1.0
+    MODERATION_FEED_BUFFER_SIZE: int = 1000
+    MODERATION_FEED_RETENTION_DAYS: int = 7
+    MODERATION_FEED_MAX_LISTENERS: int = 100
     
     # CORS — comma-separated list of allowed frontend origins
     CORS_ORIGINS: str = "http://localhost:3000"
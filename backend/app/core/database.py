@@ -1,12 +1,328 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.requests import Request
+from sqlalchemy import Delete, Insert, Update, create_engine, event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
+from .metrics import instrument_pool
+from .pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from .query_stats import instrument_engine
+from .tracing import instrument_engine as trace_engine
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """The DATABASE_URL with its driver swapped for the asyncio one"""
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+    if drivername == "postgresql+asyncpg" and "sslmode" in query:
+        # asyncpg spells libpq's sslmode as ssl
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername=drivername, query=query)
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+
+def _sqlite_pragmas() -> list[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def engine_options(url: URL, is_async: bool = False) -> dict:
+    """create_engine keyword arguments for the database behind ``url``.
+
+    Postgres gets a sized, pre-pinged, recycled pool and a server-side
+    statement timeout. SQLite gets a busy timeout at the driver level (the
+    pragmas are applied per connection by ``_configure_sqlite``). File
+    databases on either backend use a pool that records checkout waits.
+    """
+    pool_class = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    backend = url.get_backend_name()
+
+    if backend == "postgresql":
+        statement_timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            connect_args = {"server_settings": {"statement_timeout": statement_timeout}}
+        else:
+            connect_args = {"options": f"-c statement_timeout={statement_timeout}"}
+        return {
+            "poolclass": pool_class,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+            "connect_args": connect_args,
+        }
+
+    if backend == "sqlite":
+        options = {"connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not _is_sqlite_memory(url):
+            options.update(
+                poolclass=pool_class,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            )
+        return options
+
+    return {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
 
-engine = create_engine(settings.DATABASE_URL)
+def _configure_sqlite(engine) -> None:
+    pragmas = _sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def build_engine(url: str, name: str = "primary"):
+    url = make_url(url)
+    engine = create_engine(url, **engine_options(url))
+    if url.get_backend_name() == "sqlite":
+        _configure_sqlite(engine)
+    instrument_engine(engine)
+    trace_engine(engine)
+    if settings.METRICS_ENABLED:
+        instrument_pool(engine, name)
+    return engine
+
+
+def build_async_engine(url: str, name: str = "primary_async"):
+    url = async_database_url(url)
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    if url.get_backend_name() == "sqlite":
+        _configure_sqlite(engine.sync_engine)
+    instrument_engine(engine.sync_engine)
+    trace_engine(engine.sync_engine)
+    if settings.METRICS_ENABLED:
+        instrument_pool(engine.sync_engine, name)
+    return engine
+
+
+# Sync engine for background tasks, scripts and migrations
+engine = build_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for request handlers
+async_engine = build_async_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+REPLICA_LAG_SQL = {
+    # Zero when the replica has replayed everything it received, so an idle
+    # primary does not make a caught-up replica look stale
+    "postgresql": """
+        SELECT CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END
+    """,
+}
+
+
+class Replica:
+    def __init__(self, url: str, pool_name: str = "replica"):
+        self.engine: AsyncEngine = build_async_engine(url, name=pool_name)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+
+class ReplicaSet:
+    """Read replicas in rotation, kept healthy by a background check.
+
+    Every ``check_interval`` each replica is asked for its replication lag
+    (``SELECT 1`` on backends without one); a replica that errors, times out
+    or lags more than ``max_lag`` is taken out of rotation until a later
+    check passes. Replicas start out of rotation until their first check.
+    """
+
+    def __init__(self, urls: list[str], max_lag: float = 10.0, check_interval: float = 5.0):
+        self.replicas = [Replica(url, f"replica{i}") for i, url in enumerate(urls)]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def pick(self) -> Optional[Replica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    @staticmethod
+    async def _lag(replica: Replica) -> float:
+        lag_sql = REPLICA_LAG_SQL.get(replica.engine.url.get_backend_name(), "SELECT 0")
+        async with replica.engine.connect() as connection:
+            return float(await connection.scalar(text(lag_sql)) or 0)
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            # The timeout covers connecting too: an unreachable replica can
+            # hang in connect long after a query would have timed out
+            replica.lag_seconds = await asyncio.wait_for(
+                self._lag(replica), timeout=self.check_interval
+            )
+            replica.last_error = None if replica.lag_seconds <= self.max_lag else "lagging"
+        except Exception as e:
+            replica.lag_seconds = None
+            replica.last_error = f"{type(e).__name__}: {e}"
+        replica.checked_at = time.time()
+        healthy = replica.last_error is None
+        if healthy != replica.healthy:
+            logger.warning(
+                "Replica %s %s rotation (%s)",
+                replica.name,
+                "added to" if healthy else "dropped from",
+                replica.last_error or f"lag {replica.lag_seconds:.1f}s",
+            )
+        replica.healthy = healthy
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
+
+    async def start(self) -> None:
+        if self.replicas:
+            await self.check_all()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "last_error": replica.last_error,
+                "checked_at": replica.checked_at,
+            }
+            for replica in self.replicas
+        ]
+
+
+replica_set = ReplicaSet(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_CHECK_SECONDS,
+)
+
+
+class RoutingSession(Session):
+    """Reads go to the session's replica until it writes, then to the primary.
+
+    Once the session flushes or runs an INSERT/UPDATE/DELETE it stays on the
+    primary for the rest of its life, so it always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.info["use_primary"] = True
+        replica = self.info.get("replica")
+        if replica is None or self.info.get("use_primary"):
+            return async_engine.sync_engine
+        return replica.engine.sync_engine
+
+
+ReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Sent after a write, and echoed back by the client, so that it reads from
+# the primary until replicas have had time to catch up
+PRIMARY_HEADER = "X-DB-Primary-Until"
+
+_primary_until: ContextVar[Optional[list]] = ContextVar("db_primary_until", default=None)
+
+
+class ReadYourWritesMiddleware:
+    """Adds ``PRIMARY_HEADER`` to the response of any request that committed.
+
+    Done here rather than on the route's response so it is sent whatever
+    kind of response the route returns.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        until = []
+        token = _primary_until.set(until)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start" and until:
+                headers = list(message.get("headers", []))
+                headers.append((PRIMARY_HEADER.lower().encode(), f"{until[-1]:.3f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _primary_until.reset(token)
+
 
 def get_db():
     db = SessionLocal()
@@ -15,3 +331,39 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_write_db():
+    """Primary session for routes that write"""
+    async with AsyncSessionLocal() as db:
+        until = _primary_until.get()
+        if until is not None:
+            @event.listens_for(db.sync_session, "after_commit")
+            def pin_client_to_primary(session):
+                until.append(time.time() + settings.READ_YOUR_WRITES_SECONDS)
+
+        yield db
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes, served by a replica when one is healthy.
+
+    Falls back to the primary when no replica is in rotation or when this
+    client wrote within the last ``READ_YOUR_WRITES_SECONDS``, as told by
+    the ``PRIMARY_HEADER`` it echoes back from its last write.
+    """
+    replica = replica_set.pick()
+    if replica is not None:
+        try:
+            until = float(request.headers.get(PRIMARY_HEADER, 0))
+        except ValueError:
+            until = 0.0
+        now = time.time()
+        # Ignore made-up times further out than a write could have set
+        if now < until <= now + settings.READ_YOUR_WRITES_SECONDS:
+            replica = None
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with ReadSessionLocal(info={"replica": replica}) as db:
+        yield db
@@ -0,0 +1,255 @@
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from .config import settings
+from .tracing import current_span
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Incoming request ids are reused only if they look like an id
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message", "asctime", "request_id", "trace_id", "color_message",
+}
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def parse_sampling(spec: str) -> dict[str, float]:
+    """``"app.sql=0.1,uvicorn.access=0.05"`` -> {"app.sql": 0.1, "uvicorn.access": 0.05}"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the request and trace id of the code that logged them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        span = current_span()
+        record.trace_id = span.trace_id if span else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records below ERROR, per logger.
+
+    A rate set for a logger also applies to its children unless they have
+    their own, as with log levels; loggers without a rate keep everything.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with any ``extra`` fields alongside the message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.fromtimestamp(record.created, UTC)
+        entry = {
+            "ts": created.isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "trace_id": getattr(record, "trace_id", None),
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Puts records on a bounded queue for a listener thread to write.
+
+    The caller only formats the message and enqueues it; a full queue drops
+    the record and counts it instead of blocking. The listener thread is
+    (re)started in whichever process logs, so forked workers get their own.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers: list[logging.Handler]):
+        super().__init__(log_queue)
+        self.handlers = handlers
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._stopped = False
+        self._start_lock = threading.Lock()
+        # A thread may hold the lock while another one forks
+        os.register_at_fork(after_in_child=self._reset_start_lock)
+
+    def _reset_start_lock(self) -> None:
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            # Threads that log first in a new process race to get here
+            if self._pid == os.getpid():
+                return
+            self._stopped = False
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+            self._listener.start()
+            # Only now may other threads skip start() and use the new queue
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        """Write out queued records and stop the listener thread.
+
+        Anything logged afterwards, during interpreter shutdown, is written
+        directly.
+        """
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._stopped = True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, while the arguments are
+        # still what they were, but leave formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self.start()
+        elif self._stopped:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging() -> None:
+    """Send all logging, including uvicorn's, through the queue handler"""
+    global _handler
+    if _handler is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+        )
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE), [output])
+    rates = parse_sampling(settings.LOG_SAMPLING)
+    if rates:
+        _handler.addFilter(SamplingFilter(rates))
+    _handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access"):
+        server_logger = logging.getLogger(name)
+        server_logger.handlers = []
+        server_logger.propagate = True
+
+
+def shutdown_logging() -> None:
+    if _handler is not None:
+        _handler.stop()
+
+
+class RequestIdMiddleware:
+    """Gives every request an id, reusing a well-formed incoming X-Request-ID"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                value = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(value):
+                    request_id = value
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"x-request-id", request_id.encode()),
+                    ],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_id.reset(token)
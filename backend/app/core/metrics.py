@@ -0,0 +1,224 @@
+import os
+import time
+from contextlib import contextmanager
+
+from .config import settings
+from .routes import route_template
+from .tracing import span
+
+# prometheus_client picks its value storage when it is first imported, so the
+# multiprocess directory has to be in the environment before that
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the response headers",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUESTS_SHED = Counter(
+    "http_requests_shed_total",
+    "Requests turned away with 503 by admission control",
+    ["route_class", "reason"],
+)
+HTTP_REQUESTS_RATE_LIMITED = Counter(
+    "http_requests_rate_limited_total",
+    "Requests turned away with 429 by rate limiting",
+    ["rule", "key"],
+)
+
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity",
+    "Connections the pool may open (pool size plus overflow)",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up waiting for a connection",
+    ["pool"],
+)
+
+OUTBOUND_DURATION = Histogram(
+    "outbound_request_duration_seconds",
+    "Calls to external services",
+    ["service", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+OUTBOUND_REJECTED = Counter(
+    "outbound_rejected_total",
+    "Calls to external services refused without being attempted",
+    ["service", "reason"],
+)
+OUTBOUND_CIRCUIT_STATE = Gauge(
+    "outbound_circuit_state",
+    "Circuit breaker state of an external service: 0 closed, 1 half open, 2 open (worst worker)",
+    ["service"],
+    multiprocess_mode="livemax",
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Scheduled job runs",
+    ["job", "status"],
+    buckets=JOB_DURATION_BUCKETS,
+)
+SCHEDULER_LEADER = Gauge(
+    "scheduler_leader",
+    "1 in the worker holding the scheduler lease",
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def outbound_call(service: str, operation: str):
+    """Time a call to an external service (stripe, s3, smtp, clerk).
+
+    Works around both blocking and awaited calls; the outcome is ``error``
+    if the block raises, and the exception is re-raised. Sampled requests
+    also get a child span for the call.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"{service} {operation}", kind="client", **{"peer.service": service}):
+            yield
+        outcome = "ok"
+    finally:
+        OUTBOUND_DURATION.labels(service, operation, outcome).observe(time.perf_counter() - start)
+
+
+# Capacity of each instrumented pool, published by every worker at startup
+_pool_capacities: dict[str, int] = {}
+
+
+def instrument_pool(engine, name: str) -> None:
+    """Report occupancy and checkout waits of ``engine``'s pool as ``pool=name``"""
+    from sqlalchemy import event
+    from sqlalchemy.pool import QueuePool
+
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        _pool_capacities[name] = pool.size() + max(pool._max_overflow, 0)
+
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    event.listen(engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(engine, "checkin", lambda *args: checked_out.dec())
+
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+        timeouts = DB_POOL_CHECKOUT_TIMEOUTS.labels(name)
+
+        def observe(seconds: float, timed_out: bool) -> None:
+            wait.observe(seconds)
+            if timed_out:
+                timeouts.inc()
+
+        stats.listeners.append(observe)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """The exposition text and its content type, summed over workers in multiprocess mode"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_started() -> None:
+    """Publish this worker's pool capacity.
+
+    Engines are built at import, which with a preloaded app happens once
+    in the gunicorn master. Set there, the livesum gauge would count the
+    master's pools once instead of each worker's.
+    """
+    for name, capacity in _pool_capacities.items():
+        DB_POOL_CAPACITY.labels(name).set(capacity)
+
+
+def mark_worker_stopped() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """Counts requests and records their latency per route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_with_timing(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_progress.dec()
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            route = route_template(scope)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_REQUEST_DURATION.labels(method, route, status).observe(elapsed)
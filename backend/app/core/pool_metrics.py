@@ -0,0 +1,130 @@
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds of the checkout wait histogram buckets, in milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolWaitStats:
+    """How long connection checkouts waited for the pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Called with (seconds, timed_out) after each checkout
+        self.listeners = []
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self.buckets[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+        for listener in self.listeners:
+            listener(seconds, timed_out)
+
+    def _percentile_ms(self, pct: float):
+        """Upper bound of the bucket holding the pct-th wait; None if past the last bound"""
+        target = self.checkouts * pct / 100
+        seen = 0
+        for bound, count in zip(WAIT_BUCKETS_MS + (None,), self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "checkouts": checkouts,
+                "timeouts": self.timeouts,
+                "mean_wait_ms": round(self.total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "p50_wait_ms_le": self._percentile_ms(50) if checkouts else 0,
+                "p95_wait_ms_le": self._percentile_ms(95) if checkouts else 0,
+                "p99_wait_ms_le": self._percentile_ms(99) if checkouts else 0,
+                "buckets_ms": {
+                    (f"le_{bound}" if bound is not None else "inf"): count
+                    for bound, count in zip(WAIT_BUCKETS_MS + (None,), self.buckets)
+                },
+            }
+
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited.
+
+    Only a checkout that finds the pool exhausted (no idle connection and
+    no overflow left) is timed; one that gets an idle connection or opens
+    a new one counts as no wait, so slow connects do not look like a
+    saturated pool.
+    """
+
+    wait_stats: PoolWaitStats
+
+    def _exhausted(self) -> bool:
+        return self._pool.empty() and -1 < self._max_overflow <= self._overflow
+
+    def _do_get(self):
+        if not self._exhausted():
+            checkouts = self.wait_stats.checkouts
+            connection = super()._do_get()
+            # Unless the pool ran out meanwhile and the retry recorded a wait
+            if self.wait_stats.checkouts == checkouts:
+                self.wait_stats.observe(0.0)
+            return connection
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+def pool_status(engine) -> dict:
+    """Current occupancy and checkout wait stats for an engine's pool"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        status["wait"] = stats.snapshot()
+    return status
@@ -0,0 +1,252 @@
+import dis
+import linecache
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# C calls that a thread waiting for work is blocked in: queue gets (thread
+# pool workers, the aiosqlite connection thread), lock acquires (Condition.wait,
+# Thread.join) and the event loop's epoll/kqueue/select. Matched on the call
+# itself, so it does not matter which Python code is waiting
+IDLE_CALLS = {"get", "acquire", "poll", "control", "select"}
+
+_CALLEE = re.compile(r"(\w+)\s*$")
+_instructions: dict = {}
+_call_names: dict = {}
+
+_PATH_PREFIXES = sorted(
+    {sysconfig.get_path("purelib"), sysconfig.get_path("stdlib"), os.getcwd()},
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(path: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if prefix and path.startswith(prefix):
+            return path[len(prefix):].lstrip(os.sep)
+    return path
+
+
+def _call_source(code, instruction) -> str:
+    positions = instruction.positions
+    if positions is None or positions.lineno is None or positions.end_lineno is None:
+        return ""
+    lines = [
+        linecache.getline(code.co_filename, lineno)
+        for lineno in range(positions.lineno, positions.end_lineno + 1)
+    ]
+    lines[-1] = lines[-1][: positions.end_col_offset]
+    lines[0] = lines[0][positions.col_offset :]
+    return "".join(lines)
+
+
+def _callee_name(source: str) -> Optional[str]:
+    # The call's argument list is the parenthesised group ending the
+    # expression; the callee is the name just before it
+    depth = 0
+    for index in range(len(source) - 1, -1, -1):
+        if source[index] == ")":
+            depth += 1
+        elif source[index] == "(":
+            depth -= 1
+            if depth == 0:
+                match = _CALLEE.search(source[:index])
+                return match.group(1) if match else None
+    return None
+
+
+def _blocking_call(frame) -> Optional[str]:
+    """Name of the C function the innermost frame ``frame`` is in, if any.
+
+    A frame whose last instruction is a call but that has no callee frame
+    is inside a builtin; the callee's name comes from the call's source.
+    """
+    code = frame.f_code
+    key = (code, frame.f_lasti)
+    if key in _call_names:
+        return _call_names[key]
+    offsets = _instructions.get(code)
+    if offsets is None:
+        offsets = _instructions[code] = {
+            instruction.offset: instruction for instruction in dis.get_instructions(code)
+        }
+    instruction = offsets.get(frame.f_lasti)
+    name = None
+    if instruction is not None and instruction.opname.startswith("CALL"):
+        name = _callee_name(_call_source(code, instruction))
+    _call_names[key] = name
+    return name
+
+
+class ProfileSession:
+    """One profiling run: a time window, or the next ``max_requests`` matching requests"""
+
+    def __init__(
+        self, interval: float, deadline: float, route_prefix: Optional[str], max_requests: int
+    ):
+        self.interval = interval
+        self.deadline = deadline
+        self.route_prefix = route_prefix
+        self.max_requests = max_requests
+        self.started_at = time.time()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sample_time = 0.0
+        self.claimed = 0
+        self.active = 0
+        self.completed = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def claim(self, path: str) -> bool:
+        """Whether a request for ``path`` is one of the requests to profile"""
+        if self.route_prefix is None or not path.startswith(self.route_prefix):
+            return False
+        with self._lock:
+            if self.claimed >= self.max_requests or self.done.is_set():
+                return False
+            self.claimed += 1
+            self.active += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            if self.completed >= self.max_requests:
+                self.done.set()
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "requests": self.completed,
+            "seconds": round(time.time() - self.started_at, 3),
+            "sampling_overhead_ms": round(self.sample_time * 1000, 1),
+        }
+
+
+async def _profiled_request(app, scope, receive, send):
+    # Samples of the event loop thread are attributed to a profiled request
+    # when this frame is on the stack
+    await app(scope, receive, send)
+
+
+_MARKER = _profiled_request.__code__
+
+
+class SamplingProfiler:
+    """Statistical profiler for a live worker, one session at a time.
+
+    A daemon thread snapshots every thread's Python stack with
+    ``sys._current_frames()`` every ``interval`` seconds and counts each
+    distinct stack; nothing is hooked into function calls, so the cost is
+    the sampling itself and the app runs at full speed in between. Idle
+    threads are skipped: those blocked in a queue get, a lock acquire or
+    the event loop's select (see ``IDLE_CALLS``), whichever Python code
+    made the call.
+
+    In request mode only samples taken while a profiled request is in
+    flight are kept: event loop samples must be inside one of those
+    requests, thread pool samples (sync endpoints, run_in_threadpool) are
+    kept as they are and may include concurrent unprofiled requests.
+    """
+
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+        self._loop_thread: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        seconds: float,
+        interval: float = 0.01,
+        route_prefix: Optional[str] = None,
+        max_requests: int = 0,
+    ) -> Optional[ProfileSession]:
+        """Begin a session, or return None if one is already running"""
+        with self._lock:
+            if self.session is not None:
+                return None
+            session = ProfileSession(
+                interval, time.monotonic() + seconds, route_prefix, max_requests
+            )
+            self.session = session
+        self._loop_thread = threading.get_ident()
+        threading.Thread(
+            target=self._run, args=(session,), name="sampling-profiler", daemon=True
+        ).start()
+        return session
+
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self, session: ProfileSession, own_thread: int) -> None:
+        request_mode = session.route_prefix is not None
+        if request_mode and not session.active:
+            return
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            if _blocking_call(frame) in IDLE_CALLS:
+                continue
+            labels = []
+            in_request = False
+            while frame is not None:
+                if frame.f_code is _MARKER:
+                    in_request = True
+                labels.append(self._label(frame))
+                frame = frame.f_back
+            if request_mode and thread_id == self._loop_thread and not in_request:
+                continue
+            labels.append(names.get(thread_id, "thread"))
+            session.stacks[";".join(reversed(labels))] += 1
+        session.samples += 1
+
+    def _run(self, session: ProfileSession) -> None:
+        own_thread = threading.get_ident()
+        next_sample = time.monotonic()
+        try:
+            while not session.done.is_set() and time.monotonic() < session.deadline:
+                started = time.perf_counter()
+                self._sample(session, own_thread)
+                session.sample_time += time.perf_counter() - started
+                next_sample += session.interval
+                time.sleep(max(next_sample - time.monotonic(), 0))
+        finally:
+            session.done.set()
+            with self._lock:
+                self.session = None
+
+
+class ProfilerMiddleware:
+    """Marks requests that the running profile session wants to sample"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        session = self.profiler.session
+        if session is None or scope["type"] != "http" or not session.claim(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await _profiled_request(self.app, scope, receive, send)
+        finally:
+            session.release()
+
+
+profiler = SamplingProfiler()
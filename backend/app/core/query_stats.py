@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger("app.sql")
+
+DEBUG_HEADERS = (
+    "X-DB-Query-Count",
+    "X-DB-Time-Ms",
+    "X-DB-Slowest-Ms",
+    "X-DB-N-Plus-One",
+)
+
+# Longest statement text written to the slow request log
+MAX_LOGGED_STATEMENT_CHARS = 1000
+
+
+class RequestQueryStats:
+    """SQL executed while handling one request"""
+
+    __slots__ = ("count", "total_time", "slowest_time", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times, most repeated first"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on ``engine`` (the sync engine of async engines).
+
+    Nothing is registered when SQL_INSTRUMENTATION is off, so the disabled
+    cost is zero; when on, statements outside a request are only checked
+    against the slow-query threshold.
+    """
+    if not settings.SQL_INSTRUMENTATION:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """Collects per-request SQL stats, reports them as headers and logs N+1s.
+
+    Requests whose statements took ``slow_request_ms`` in total are logged
+    with their counts and their slowest statement.
+    """
+
+    def __init__(
+        self,
+        app,
+        debug_headers: bool = False,
+        n_plus_one_threshold: int = 5,
+        slow_request_ms: float = 500.0,
+    ):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                repeated = stats.repeated(self.n_plus_one_threshold)
+                values = (
+                    stats.count,
+                    f"{stats.total_time * 1000:.1f}",
+                    f"{stats.slowest_time * 1000:.1f}",
+                    len(repeated),
+                )
+                headers.extend(
+                    (name.lower().encode(), str(value).encode())
+                    for name, value in zip(DEBUG_HEADERS, values)
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.debug_headers else send)
+        finally:
+            _current.reset(token)
+            for statement, n in stats.repeated(self.n_plus_one_threshold):
+                logger.warning(
+                    "Possible N+1 in %s %s: statement ran %d times: %s",
+                    scope["method"],
+                    scope["path"],
+                    n,
+                    " ".join(statement.split()),
+                )
+            if stats.total_time * 1000 >= self.slow_request_ms:
+                self._log_slow_request(scope, stats)
+
+    def _log_slow_request(self, scope, stats: RequestQueryStats) -> None:
+        statement = " ".join((stats.slowest_statement or "").split())
+        if len(statement) > MAX_LOGGED_STATEMENT_CHARS:
+            statement = statement[:MAX_LOGGED_STATEMENT_CHARS] + "..."
+        logger.warning(
+            "Slow request %s %s: %d statements took %.1f ms, slowest %.1f ms: %s",
+            scope["method"],
+            scope["path"],
+            stats.count,
+            stats.total_time * 1000,
+            stats.slowest_time * 1000,
+            statement,
+            extra={
+                "db_query_count": stats.count,
+                "db_time_ms": round(stats.total_time * 1000, 1),
+                "db_slowest_ms": round(stats.slowest_time * 1000, 1),
+            },
+        )
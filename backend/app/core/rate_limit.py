@@ -0,0 +1,248 @@
+import hashlib
+import ipaddress
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from .config import settings
+from .metrics import HTTP_REQUESTS_RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Expired buckets are deleted at most this often, per worker
+_PRUNE_INTERVAL_SECONDS = 60
+
+RATE_LIMITED_DETAIL = "Too many requests, please try again later"
+
+
+class Rate:
+    """``count`` requests per ``period`` seconds, in bursts of up to ``count``"""
+
+    def __init__(self, count: int, period: float):
+        self.count = count
+        self.period = period
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["Rate"]:
+        """``"5/hour"`` and the like; None for an empty string (no limit)"""
+        if not text:
+            return None
+        count, _, unit = text.partition("/")
+        unit = unit.strip().rstrip("s")
+        if unit not in _PERIODS or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Invalid rate {text!r}, expected e.g. '10/minute'")
+        return cls(int(count), _PERIODS[unit])
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    def __repr__(self) -> str:
+        return f"Rate({self.count}/{self.period:g}s)"
+
+
+class RateLimitedError(Exception):
+    def __init__(self, rule: str, key: str, retry_after: float):
+        super().__init__(f"Rate limit {rule} exceeded by {key}")
+        self.rule = rule
+        self.key = key
+        self.retry_after = retry_after
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, shared by every process that opens it.
+
+    Each bucket is one row holding its theoretical arrival time (GCRA): a
+    request is allowed if it would not push that time more than a full
+    bucket's worth into the future, and then pushes it one interval on.
+    The check and the update are a single UPSERT, so concurrent workers
+    cannot both take the last token. The file holds nothing worth keeping,
+    so it is written without fsync.
+
+    If the file stays locked for longer than ``busy_timeout_ms`` the
+    request is let through: a slow limiter must not take the forms down.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 50):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._pruned_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        # Never use a connection opened before a fork
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, timeout=self.busy_timeout_ms / 1000
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def take(self, key: str, rate: Rate) -> float:
+        """Take a token from ``key``'s bucket: 0 if allowed, else seconds until one is free"""
+        now = time.time()
+        interval = rate.interval
+        tolerance = rate.period - interval
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "INSERT INTO buckets (key, tat) VALUES (:key, :now + :interval) "
+                "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+                "WHERE max(tat, :now) - :now <= :tolerance "
+                "RETURNING tat",
+                {"key": key, "now": now, "interval": interval, "tolerance": tolerance},
+            ).fetchone()
+            if row is not None:
+                self._prune(connection, now)
+                return 0.0
+            (tat,) = connection.execute("SELECT tat FROM buckets WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Rate limit store unavailable, allowing request: %s", e)
+            return 0.0
+        return max(tat - now - tolerance, 0.001)
+
+    def _prune(self, connection: sqlite3.Connection, now: float) -> None:
+        if now - self._pruned_at < _PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = now
+        connection.execute("DELETE FROM buckets WHERE tat < ?", (now,))
+
+
+class RateLimitRule:
+    def __init__(self, per_ip: Optional[Rate] = None, per_email: Optional[Rate] = None):
+        self.per_ip = per_ip
+        self.per_email = per_email
+
+
+def client_key(host: str) -> str:
+    """The client an address belongs to: IPv6 clients get a whole /64"""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if address.version == 6:
+        if address.ipv4_mapped:
+            return str(address.ipv4_mapped)
+        return str(ipaddress.IPv6Network((address, 64), strict=False).network_address)
+    return str(address)
+
+
+def email_key(email: str) -> str:
+    # Hashed, so the store does not keep a list of addresses around
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+
+
+class RateLimiter:
+    """Named rules, each limiting by client IP and/or by email address"""
+
+    def __init__(
+        self, store: SQLiteBucketStore, rules: dict[str, RateLimitRule], enabled: bool = True
+    ):
+        self.store = store
+        self.rules = rules
+        self.enabled = enabled
+
+    def _take(self, rule_name: str, key_type: str, key: str, rate: Optional[Rate]) -> None:
+        if rate is None or not self.enabled:
+            return
+        retry_after = self.store.take(f"{rule_name}:{key_type}:{key}", rate)
+        if retry_after:
+            HTTP_REQUESTS_RATE_LIMITED.labels(rule_name, key_type).inc()
+            raise RateLimitedError(rule_name, key_type, retry_after)
+
+    def check_ip(self, rule_name: str, host: str) -> None:
+        """Count a request from ``host``, raising RateLimitedError if over the limit"""
+        self._take(rule_name, "ip", client_key(host), self.rules[rule_name].per_ip)
+
+    def check_email(self, rule_name: str, email: Optional[str]) -> None:
+        """Count a request for ``email``, raising RateLimitedError if over the limit"""
+        if email:
+            self._take(rule_name, "email", email_key(email), self.rules[rule_name].per_email)
+
+
+class RateLimitMiddleware:
+    """Answers 429 with Retry-After for requests over their rule's IP limit.
+
+    ``routes`` maps (method, path regex) to a rule name. Email limits need
+    the parsed body, so the routes check those themselves.
+    """
+
+    def __init__(self, app, limiter: RateLimiter, routes: list[tuple[str, str, str]]):
+        self.app = app
+        self.limiter = limiter
+        self.routes = [(method, re.compile(pattern), rule) for method, pattern, rule in routes]
+
+    def _rule(self, method: str, path: str) -> Optional[str]:
+        for route_method, pattern, rule in self.routes:
+            if method == route_method and pattern.fullmatch(path):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope.get("client"):
+            rule = self._rule(scope["method"], scope["path"])
+            if rule is not None:
+                try:
+                    self.limiter.check_ip(rule, scope["client"][0])
+                except RateLimitedError as e:
+                    await send_rate_limited(send, e)
+                    return
+        await self.app(scope, receive, send)
+
+
+async def send_rate_limited(send, error: RateLimitedError) -> None:
+    body = json.dumps({"detail": RATE_LIMITED_DETAIL}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(error.retry_after)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+rate_limiter = RateLimiter(
+    SQLiteBucketStore(
+        settings.RATE_LIMIT_DB_PATH or os.path.join(tempfile.gettempdir(), "tdrmf-rate-limits.db"),
+        busy_timeout_ms=settings.RATE_LIMIT_BUSY_TIMEOUT_MS,
+    ),
+    {
+        "contact": RateLimitRule(
+            Rate.parse(settings.RATE_LIMIT_CONTACT_PER_IP),
+            Rate.parse(settings.RATE_LIMIT_CONTACT_PER_EMAIL),
+        ),
+        "gallery_submit": RateLimitRule(
+            Rate.parse(settings.RATE_LIMIT_GALLERY_SUBMIT_PER_IP),
+            Rate.parse(settings.RATE_LIMIT_GALLERY_SUBMIT_PER_EMAIL),
+        ),
+        "rsvp": RateLimitRule(
+            Rate.parse(settings.RATE_LIMIT_RSVP_PER_IP),
+            Rate.parse(settings.RATE_LIMIT_RSVP_PER_EMAIL),
+        ),
+        "checkout": RateLimitRule(
+            Rate.parse(settings.RATE_LIMIT_CHECKOUT_PER_IP),
+            Rate.parse(settings.RATE_LIMIT_CHECKOUT_PER_EMAIL),
+        ),
+    },
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
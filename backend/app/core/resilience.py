@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from .config import settings
+from .metrics import OUTBOUND_CIRCUIT_STATE, OUTBOUND_REJECTED, outbound_call
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class DependencyUnavailableError(Exception):
+    """A call that was refused without being attempted"""
+
+    def __init__(self, service: str, reason: str, retry_after: float):
+        super().__init__(f"{service} is unavailable ({reason})")
+        self.service = service
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(DependencyUnavailableError):
+    pass
+
+
+class BulkheadFullError(DependencyUnavailableError):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling a dependency after ``failure_threshold`` failures in a row.
+
+    While open every call fails immediately; after ``reset_timeout`` seconds
+    a single trial call is let through (half open), and its outcome closes
+    the breaker or opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        OUTBOUND_CIRCUIT_STATE.labels(name).set(0)
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            log = logger.info if state == CLOSED else logger.warning
+            log("Circuit for %s %s", self.name, state.replace("_", " "))
+            self.state = state
+            OUTBOUND_CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in half open state, reserves the trial"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def cancel(self) -> None:
+        """Give back a trial reserved by ``allow`` for a call that was not made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 1.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 1.0)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+
+class Dependency:
+    """Bulkhead, retries and circuit breaker around one external service.
+
+    - At most ``max_concurrent`` calls run at once (None for no limit); a
+      caller waits up to ``queue_timeout`` seconds for a slot and then gets
+      BulkheadFullError, so one slow service cannot take every thread.
+    - ``is_failure`` says which exceptions mean the service is in trouble
+      (connection errors, timeouts, 5xx); those count towards the breaker.
+      Anything else, a declined card say, is the caller's problem and is
+      raised as is.
+    - Calls marked idempotent are retried after a failure, with jittered
+      exponential backoff, while the whole call fits in ``budget`` seconds.
+    - Each attempt is limited to ``timeout`` seconds: by the client, which
+      is configured with it, for blocking calls; here for coroutines.
+
+    A dependency is used either from threads (``call``) or from the event
+    loop (``acall``), not both.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        is_failure: Callable[[BaseException], bool],
+        max_concurrent: Optional[int],
+        queue_timeout: float,
+        budget: float,
+        retries: int,
+        backoff: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.is_failure = is_failure
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.budget = budget
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.in_flight = 0
+        self.rejected = 0
+        self._count_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _failed(self, e: BaseException) -> bool:
+        return isinstance(e, (TimeoutError, ConnectionError)) or self.is_failure(e)
+
+    def _count(self, in_flight: int = 0, rejected: int = 0) -> None:
+        with self._count_lock:
+            self.in_flight += in_flight
+            self.rejected += rejected
+
+    def _reject(self, error_class, reason: str, retry_after: float) -> DependencyUnavailableError:
+        self._count(rejected=1)
+        OUTBOUND_REJECTED.labels(self.name, reason).inc()
+        return error_class(self.name, reason, retry_after)
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            raise self._reject(CircuitOpenError, "circuit_open", self.breaker.retry_after())
+
+    def _retry_delay(self, attempt: int, deadline: float) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up"""
+        if attempt >= self.retries or self.breaker.state == OPEN:
+            return None
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        if time.monotonic() + delay + self.timeout > deadline:
+            return None
+        return delay
+
+    def call(
+        self, operation: str, fn: Callable[..., Any], *args, idempotent: bool = False, **kwargs
+    ) -> Any:
+        """Run a blocking call to the service"""
+        self._admit()
+        if self._slots is not None and not self._slots.acquire(timeout=self.queue_timeout):
+            self.breaker.cancel()
+            raise self._reject(BulkheadFullError, "bulkhead_full", self.queue_timeout)
+        self._count(in_flight=1)
+        try:
+            deadline = time.monotonic() + self.budget
+            attempt = 0
+            while True:
+                try:
+                    with outbound_call(self.name, operation):
+                        result = fn(*args, **kwargs)
+                except Exception as e:
+                    if not self._failed(e):
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+                    delay = self._retry_delay(attempt, deadline) if idempotent else None
+                    if delay is None:
+                        raise
+                    logger.info("Retrying %s %s after %s", self.name, operation, type(e).__name__)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            self._count(in_flight=-1)
+            if self._slots is not None:
+                self._slots.release()
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._async_slots = (
+                asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+            )
+
+    async def acall(
+        self,
+        operation: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        idempotent: bool = False,
+        **kwargs,
+    ) -> Any:
+        """Await a call to the service, cancelling it after ``timeout``"""
+        self._bind_loop()
+        self._admit()
+        slots = self._async_slots
+        if slots is not None:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=self.queue_timeout)
+            except TimeoutError:
+                self.breaker.cancel()
+                raise self._reject(BulkheadFullError, "bulkhead_full", self.queue_timeout)
+        self._count(in_flight=1)
+        try:
+            deadline = time.monotonic() + self.budget
+            attempt = 0
+            while True:
+                try:
+                    with outbound_call(self.name, operation):
+                        result = await asyncio.wait_for(fn(*args, **kwargs), timeout=self.timeout)
+                except Exception as e:
+                    if not self._failed(e):
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_failure()
+                    delay = self._retry_delay(attempt, deadline) if idempotent else None
+                    if delay is None:
+                        raise
+                    logger.info("Retrying %s %s after %s", self.name, operation, type(e).__name__)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            self._count(in_flight=-1)
+            if slots is not None:
+                slots.release()
+
+    def status(self) -> dict:
+        breaker = self.breaker
+        return {
+            "name": self.name,
+            "state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "retry_after_seconds": (
+                round(breaker.retry_after(), 1) if breaker.state == OPEN else None
+            ),
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "rejected": self.rejected,
+            "timeout_seconds": self.timeout,
+        }
+
+
+_dependencies: dict[str, Dependency] = {}
+
+
+def dependency(
+    name: str,
+    timeout: float,
+    is_failure: Callable[[BaseException], bool] = lambda e: False,
+    bulkhead: bool = True,
+) -> Dependency:
+    """The shared Dependency called ``name``, created on first use.
+
+    Limits other than the timeout come from the OUTBOUND_* and BREAKER_*
+    settings. ``bulkhead=False`` is for clients that already cap their own
+    concurrency, like the SMTP pools.
+    """
+    existing = _dependencies.get(name)
+    if existing is not None:
+        return existing
+    created = Dependency(
+        name,
+        timeout=timeout,
+        is_failure=is_failure,
+        max_concurrent=settings.OUTBOUND_MAX_CONCURRENT if bulkhead else None,
+        queue_timeout=settings.OUTBOUND_QUEUE_TIMEOUT_SECONDS,
+        budget=settings.OUTBOUND_CALL_BUDGET_SECONDS,
+        retries=settings.OUTBOUND_RETRIES,
+        backoff=settings.OUTBOUND_RETRY_BACKOFF_SECONDS,
+        failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.BREAKER_RESET_SECONDS,
+    )
+    _dependencies[name] = created
+    return created
+
+
+def dependency_status() -> list[dict]:
+    return [dep.status() for dep in _dependencies.values()]
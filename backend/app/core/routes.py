@@ -0,0 +1,27 @@
+from typing import Callable, Dict
+
+# Requests that did not match a route share one label value, so scans of
+# random paths cannot grow the number of metric series
+UNMATCHED_ROUTE = "<unmatched>"
+
+_templates: Dict[Callable, str] = {}
+
+
+def route_template(scope) -> str:
+    """The path template of the route that handled ``scope``, e.g. ``/api/events/{event_id}``.
+
+    Only meaningful once the router has run, which records the matched
+    endpoint in the scope.
+    """
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    template = _templates.get(endpoint)
+    if template is None:
+        template = UNMATCHED_ROUTE
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                template = route.path
+                break
+        _templates[endpoint] = template
+    return template
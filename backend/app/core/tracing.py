@@ -0,0 +1,403 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .routes import route_template
+
+logger = logging.getLogger(__name__)
+
+# Longer statements are cut in db.statement attributes
+MAX_STATEMENT_LENGTH = 1000
+
+OTLP_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class Span:
+    """One timed operation in a trace; ids are lowercase hex as in W3C traceparent"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "error"
+    )
+
+    def __init__(
+        self, trace_id: str, parent_id: Optional[str], name: str, kind: str, attributes: dict
+    ):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def finish(self) -> None:
+        self.end = time.time_ns()
+        exporter.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start / 1e9,
+            "duration_ms": round((self.end - self.start) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# The innermost open span of the current request; None when not sampled
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Time the block as a child of the current span.
+
+    A no-op outside sampled requests, so it is cheap to leave around calls
+    on hot paths. Yields the span (or None) so callers can add attributes.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace_id, parent.span_id, name, kind, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        child.finish()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._span_started = time.time_ns()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    started = getattr(context, "_span_started", None)
+    if parent is None or started is None:
+        return
+    statement_span = Span(
+        parent.trace_id,
+        parent.span_id,
+        "db " + statement.split(None, 1)[0].upper(),
+        "client",
+        {"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_LENGTH]},
+    )
+    statement_span.start = started
+    statement_span.finish()
+
+
+def _before_commit(session):
+    if _current.get() is not None:
+        session.info["_commit_started"] = time.time_ns()
+
+
+def _after_commit(session):
+    started = session.info.pop("_commit_started", None)
+    parent = _current.get()
+    if parent is None or started is None:
+        return
+    # Covers the flush as well as the COMMIT itself
+    commit_span = Span(parent.trace_id, parent.span_id, "db commit", "client", {})
+    commit_span.start = started
+    commit_span.finish()
+
+
+def instrument_engine(engine) -> None:
+    """Record a span for every statement ``engine`` runs, and every session
+    commit, in a sampled request"""
+    if not settings.TRACING_EXPORTER:
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(Session, "before_commit", _before_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+
+
+class JSONLinesWriter:
+    """Appends spans to a file, one JSON object per line, rotating by size.
+
+    ``{pid}`` in the path is replaced with the worker's process id, so that
+    several workers do not rotate the same file.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def _rotate(self) -> None:
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+        try:
+            if os.path.getsize(self.path) + len(lines) > self.max_bytes:
+                self._rotate()
+        except FileNotFoundError:
+            pass
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPWriter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        import httpx
+
+        self.endpoint = endpoint
+        self.resource = {"attributes": _otlp_attributes({"service.name": service_name})}
+        self.client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: list[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{
+                    "scope": {"name": "app"},
+                    "spans": [
+                        {
+                            "traceId": s.trace_id,
+                            "spanId": s.span_id,
+                            "parentSpanId": s.parent_id or "",
+                            "name": s.name,
+                            "kind": OTLP_KINDS[s.kind],
+                            "startTimeUnixNano": str(s.start),
+                            "endTimeUnixNano": str(s.end),
+                            "attributes": _otlp_attributes(s.attributes),
+                            "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+                        }
+                        for s in spans
+                    ],
+                }],
+            }]
+        }
+        self.client.post(self.endpoint, json=body).raise_for_status()
+
+
+class SpanExporter:
+    """Hands finished spans to a writer in batches, off the request path.
+
+    Spans go into a bounded queue that a daemon thread drains every
+    ``flush_interval`` seconds or every ``batch_size`` spans; when the queue
+    is full, spans are dropped and counted rather than slowing requests.
+    The thread is started on first use in each process, so it survives
+    workers being forked from a preloaded app.
+    """
+
+    def __init__(self, queue_size: int = 10000, batch_size: int = 512, flush_interval: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.writer = None
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _build_writer(self):
+        if settings.TRACING_EXPORTER == "otlp":
+            return OTLPWriter(settings.TRACING_OTLP_ENDPOINT, settings.TRACING_SERVICE_NAME)
+        return JSONLinesWriter(
+            settings.TRACING_JSONL_PATH,
+            settings.TRACING_JSONL_MAX_BYTES,
+            settings.TRACING_JSONL_BACKUPS,
+        )
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self.writer = self._build_writer()
+            threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    def submit(self, finished: Span) -> None:
+        if self._pid != os.getpid():
+            self._ensure_started()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Write out whatever is queued; used at shutdown"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: list[Span]) -> None:
+        try:
+            with self._write_lock:
+                self.writer.export(batch)
+        except Exception as e:
+            logger.warning("Dropped %d spans, export failed: %s", len(batch), e)
+
+    def _run(self) -> None:
+        spans = self._queue
+        while True:
+            batch = [spans.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(spans.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+
+exporter = SpanExporter(queue_size=settings.TRACING_QUEUE_SIZE)
+
+
+def _parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a W3C traceparent header"""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class TracingMiddleware:
+    """Opens a server span for each sampled request.
+
+    Sampling is decided once per request, up front: a request carrying a
+    W3C ``traceparent`` keeps its caller's decision and trace id, any other
+    request is sampled with probability ``sample_rate``. Since any client
+    can send a sampled ``traceparent``, at most ``max_per_second`` requests
+    are traced per worker whatever the callers ask for (0 for no cap).
+    Unsampled requests cost one random number; every span helper is a
+    no-op for them. Sampled responses carry their trace id in
+    ``X-Trace-Id``.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.01, max_per_second: float = 10.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._allowance = max_per_second
+        self._allowance_at = time.monotonic()
+
+    def _within_cap(self) -> bool:
+        """Take one of the traces allowed this second; runs on the event loop only"""
+        if not self.max_per_second:
+            return True
+        now = time.monotonic()
+        self._allowance = min(
+            self.max_per_second,
+            self._allowance + (now - self._allowance_at) * self.max_per_second,
+        )
+        self._allowance_at = now
+        if self._allowance < 1:
+            return False
+        self._allowance -= 1
+        return True
+
+    def _sample(self, scope) -> Optional[tuple[str, Optional[str]]]:
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parsed = _parse_traceparent(value.decode("latin-1"))
+                if parsed:
+                    trace_id, parent_id, sampled = parsed
+                    return (trace_id, parent_id) if sampled and self._within_cap() else None
+                break
+        if random.random() < self.sample_rate and self._within_cap():
+            return os.urandom(16).hex(), None
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        sampled = self._sample(scope)
+        if sampled is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = sampled
+        root = Span(trace_id, parent_id, scope["method"], "server", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        token = _current.set(root)
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-trace-id", trace_id.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            route = route_template(scope)
+            root.name = f"{scope['method']} {route}"
+            root.attributes["http.route"] = route
+            root.finish()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+logger = logging.getLogger(__name__)
+
+WarmUpStep = Callable[[], Awaitable[None]]
+
+
+class WarmUp:
+    """Work a fresh worker does before it reports itself ready.
+
+    Steps run in the background once the app has started, so the worker
+    answers requests (and health checks, with 503) meanwhile. Each step has
+    ``step_timeout`` seconds; a step that fails or times out is logged and
+    skipped, so a slow dependency makes the first requests slower rather
+    than keeping the worker out of rotation.
+    """
+
+    def __init__(self, step_timeout: float = 10.0):
+        self.step_timeout = step_timeout
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        self.results: dict[str, dict] = {}
+        self._steps: list[tuple[str, WarmUpStep]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, step: WarmUpStep) -> None:
+        self._steps.append((name, step))
+
+    async def _run_step(self, name: str, step: WarmUpStep) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout=self.step_timeout)
+            error = None
+        except TimeoutError:
+            error = f"timed out after {self.step_timeout:g}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.results[name] = {"ok": error is None, "ms": elapsed_ms, "error": error}
+        if error:
+            logger.warning("Warm-up step %s failed: %s", name, error)
+
+    async def run(self) -> None:
+        self.started_at = time.time()
+        started = time.perf_counter()
+        try:
+            for name, step in self._steps:
+                await self._run_step(name, step)
+        finally:
+            self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.ready = True
+        logger.info(
+            "Worker warmed up in %.0f ms", self.duration_ms, extra={"warmup": self.results}
+        )
+
+    def start(self, enabled: bool = True) -> None:
+        if not enabled:
+            self.ready = True
+            return
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "steps": self.results,
+        }
+
+
+async def open_connections(engine, count: int) -> None:
+    """Hold ``count`` connections of an AsyncEngine at once, then return them.
+
+    The pool keeps up to its ``pool_size`` connections open once they have
+    been checked in, so later requests skip connecting (and the TLS and
+    auth round trips to Postgres).
+    """
+    connections = []
+    try:
+        for _ in range(count):
+            connection = await engine.connect()
+            connections.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
+
+
+def open_sync_connections(engine, count: int) -> None:
+    """``open_connections`` for a sync Engine; run it in a thread"""
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def build_schemas(app) -> None:
+    """Finish the ORM mapper configuration and the OpenAPI schema.
+
+    Both are built on first use: mappers by the first query, the schema by
+    the first request for /openapi.json or /docs. Route validators and
+    serializers are built with the routes; the first request through each
+    one is primed by requesting it.
+    """
+    configure_mappers()
+    app.openapi()
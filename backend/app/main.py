@@ -1,14 +1,152 @@
-from fastapi import FastAPI
+import asyncio
+import math
+import secrets
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from app.core.admission import (
+    ADMIN,
+    CHECKOUT,
+    PUBLIC,
+    WEBHOOK,
+    AdmissionMiddleware,
+    RouteClassifier,
+    admission,
+)
 from app.core.config import settings
-from app.api.routes import events, donations, gallery, sponsors, contact
+from app.core.database import (
+    PRIMARY_HEADER,
+    ReadYourWritesMiddleware,
+    SessionLocal,
+    async_engine,
+    engine,
+    replica_set,
+)
+from app.core.logs import (
+    REQUEST_ID_HEADER,
+    RequestIdMiddleware,
+    configure_logging,
+    shutdown_logging,
+)
+from app.core.metrics import (
+    MetricsMiddleware,
+    mark_worker_started,
+    mark_worker_stopped,
+    render_metrics,
+)
+from app.core.profiler import ProfilerMiddleware, profiler
+from app.core.query_stats import DEBUG_HEADERS, QueryStatsMiddleware
+from app.core.rate_limit import (
+    RATE_LIMITED_DETAIL,
+    RateLimitedError,
+    RateLimitMiddleware,
+    rate_limiter,
+)
+from app.core.resilience import DependencyUnavailableError
+from app.core.tracing import TracingMiddleware, exporter as span_exporter
+from app.core.warmup import WarmUp, build_schemas, open_connections, open_sync_connections
+from app.api.routes import admin, events, donations, donors, gallery, sponsors, contact, mailings
+from app.services.analytics.donation_rollups import rebuild_rollups
+from app.services.auth.clerk_auth import _get_clerk_client
+from app.services.scheduling import Cron, Interval, scheduler
+from app.services.storage.gallery_cleanup import delete_orphaned_uploads
+from app.services.storage.s3_service import get_s3_service
+from app.services.webhooks.stripe_service import get_stripe
+from app.services.webhooks.email_service import smtp_pool
+from app.services.webhooks.bulk_mail import bulk_mail_runner, schedule_event_reminders
+from app.services.webhooks.outbox_dispatcher import outbox_dispatcher, prune_sent_emails
+from app.services.realtime.campaign_totals import campaign_totals
+from app.services.realtime.moderation_feed import moderation_feed
+
+configure_logging()
+
+warmup = WarmUp(step_timeout=settings.WARMUP_STEP_TIMEOUT_SECONDS)
+
+# Route classes for admission control, first matching prefix wins
+ROUTE_CLASSES = RouteClassifier([
+    ("/health", None),
+    ("/metrics", None),
+    # Bounded by its own listener limit, and holds no connection
+    ("/api/donations/stats/live", None),
+    ("/api/donations/webhook", WEBHOOK),
+    ("/api/donations/checkout", CHECKOUT),
+    ("/api/donations/verify", CHECKOUT),
+    ("/api/admin", ADMIN),
+    ("/api/donations/stats", ADMIN),
+    ("/api/donations/recurring", ADMIN),
+    ("/api/donations/list", ADMIN),
+    ("/api/donors", ADMIN),
+    ("/api/gallery/admin", ADMIN),
+    ("/api/sponsors/admin", ADMIN),
+], default=PUBLIC)
+
+# Unauthenticated writes limited per client IP: (method, path regex, rule).
+# The routes also limit per email address.
+RATE_LIMITED_ROUTES = [
+    ("POST", r"/api/contact", "contact"),
+    ("POST", r"/api/gallery/submit", "gallery_submit"),
+    ("POST", r"/api/events/\d+/rsvp", "rsvp"),
+    ("POST", r"/api/donations/checkout", "checkout"),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mark_worker_started()
+    await replica_set.start()
+    outbox_dispatcher.start()
+    bulk_mail_runner.start()
+    scheduler.start(enabled=settings.SCHEDULER_ENABLED)
+    await campaign_totals.start()
+    moderation_feed.start()
+    warmup.start(enabled=settings.WARMUP_ENABLED)
+    yield
+    await warmup.stop()
+    await moderation_feed.stop()
+    await campaign_totals.stop()
+    await scheduler.stop()
+    await bulk_mail_runner.stop()
+    await outbox_dispatcher.stop()
+    await smtp_pool.close()
+    await replica_set.stop()
+    mark_worker_stopped()
+    span_exporter.flush()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="The Dorothy R. Morgan Foundation API",
     description="API for the TDRMF website",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+if replica_set.replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        debug_headers=settings.DEBUG,
+        n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+        slow_request_ms=settings.SQL_SLOW_REQUEST_MS,
+    )
+
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, routes=RATE_LIMITED_ROUTES)
+
+if settings.ADMISSION_CONTROL_ENABLED:
+    # Inside CORS, so browsers can read the 503
+    app.add_middleware(AdmissionMiddleware, controller=admission, classify=ROUTE_CLASSES)
+    admission.watch_pool(engine)
+    admission.watch_pool(async_engine.sync_engine)
+    for replica in replica_set.replicas:
+        admission.watch_pool(replica.engine.sync_engine)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -16,14 +154,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Moderation-Event-Id",
+        "X-Trace-Id",
+        "Retry-After",
+        REQUEST_ID_HEADER,
+        PRIMARY_HEADER,
+        *DEBUG_HEADERS,
+    ],
 )
 
+app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+if settings.TRACING_EXPORTER:
+    app.add_middleware(
+        TracingMiddleware,
+        sample_rate=settings.TRACE_SAMPLE_RATE,
+        max_per_second=settings.TRACE_MAX_PER_SECOND,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Outermost, so that everything logged for a request carries its id
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(events.router)
 app.include_router(donations.router)
+app.include_router(donors.router)
 app.include_router(gallery.router)
 app.include_router(sponsors.router)
 app.include_router(contact.router)
+app.include_router(mailings.router)
+app.include_router(admin.router)
+
+
+@app.exception_handler(DependencyUnavailableError)
+async def dependency_unavailable(request: Request, exc: DependencyUnavailableError):
+    """An external service is down or saturated: fail fast with a 503"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{exc.service} is temporarily unavailable, please try again shortly"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited(request: Request, exc: RateLimitedError):
+    """Too many form submissions from one client or for one address"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": RATE_LIMITED_DETAIL},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
 
 
 @app.get("/")
@@ -31,7 +215,129 @@ def root():
     return {"message": "The Dorothy R. Morgan Foundation API"}
 
 
+# Health checks are async so that they never wait for a threadpool slot
+
 @app.get("/health")
-def health():
+async def health(response: Response):
+    """503 until this worker has warmed up, so load balancers hold traffic back"""
+    if not warmup.ready:
+        response.status_code = 503
+        return {"status": "warming_up"}
     return {"status": "healthy"}
 
+
+@app.get("/health/ready")
+async def ready(response: Response):
+    """503 while warming up or while public requests are being shed"""
+    admission_status = admission.status()
+    if not warmup.ready:
+        status = "warming_up"
+    elif PUBLIC in admission_status["saturated"]:
+        status = "saturated"
+    else:
+        status = "ready"
+    if status != "ready":
+        response.status_code = 503
+        response.headers["Retry-After"] = str(admission.retry_after)
+    return {"status": status, "admission": admission_status}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus metrics, summed over all workers"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_BEARER_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.METRICS_BEARER_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    content, content_type = render_metrics()
+    return Response(content=content, headers={"Content-Type": content_type})
+
+
+# Warm-up steps, run in order in each worker after startup
+
+async def _open_db_pools():
+    count = min(settings.WARMUP_DB_CONNECTIONS, settings.DB_POOL_SIZE)
+    await asyncio.gather(
+        open_connections(async_engine, count),
+        run_in_threadpool(open_sync_connections, engine, count),
+        *(open_connections(replica.engine, count) for replica in replica_set.replicas),
+    )
+
+
+async def _build_schemas():
+    build_schemas(app)
+
+
+async def _build_clients():
+    # Imports the SDKs and resolves the S3 endpoint
+    await run_in_threadpool(get_s3_service)
+    await run_in_threadpool(get_stripe)
+    await run_in_threadpool(_get_clerk_client)
+
+
+async def _connect_s3():
+    s3 = get_s3_service()
+    await run_in_threadpool(s3.s3_client.head_bucket, Bucket=s3.bucket)
+
+
+async def _connect_clerk():
+    await run_in_threadpool(_get_clerk_client().jwks.get)
+
+
+async def _prime_public_routes():
+    """Request the public pages once, through the whole middleware stack"""
+    paths = [path.strip() for path in settings.WARMUP_PATHS.split(",") if path.strip()]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for path in paths:
+            response = await client.get(path, headers={"user-agent": "warmup"})
+            if response.status_code >= 500:
+                raise RuntimeError(f"GET {path} returned {response.status_code}")
+
+
+warmup.add("db_pools", _open_db_pools)
+warmup.add("schemas", _build_schemas)
+warmup.add("clients", _build_clients)
+if settings.WARMUP_OUTBOUND:
+    warmup.add("s3", _connect_s3)
+    warmup.add("clerk", _connect_clerk)
+warmup.add("public_routes", _prime_public_routes)
+
+
+# Scheduled jobs, run by whichever worker holds the scheduler lease
+
+def _reconcile_donations():
+    with SessionLocal() as db:
+        return donations.reconcile_pending_donations(db, settings.DONATION_RECONCILE_AFTER_MINUTES)
+
+
+def _schedule_event_reminders():
+    with SessionLocal() as db:
+        return {"scheduled": schedule_event_reminders(db)}
+
+
+def _rebuild_rollups():
+    with SessionLocal() as db:
+        return {"rows": rebuild_rollups(db)}
+
+
+def _delete_orphaned_uploads():
+    with SessionLocal() as db:
+        return delete_orphaned_uploads(db, settings.GALLERY_ORPHAN_MIN_AGE_HOURS)
+
+
+def _prune_expired_rows():
+    with SessionLocal() as db:
+        return {
+            "sent_emails": prune_sent_emails(db, settings.EMAIL_OUTBOX_RETENTION_DAYS),
+            "job_runs": scheduler.prune_history(db, settings.SCHEDULER_HISTORY_RETENTION_DAYS),
+        }
+
+
+scheduler.add("reconcile_donations", _reconcile_donations, Interval(900, jitter=60))
+scheduler.add("event_reminders", _schedule_event_reminders, Cron("5 * * * *", jitter=120))
+scheduler.add("rebuild_rollups", _rebuild_rollups, Cron("15 3 * * *", jitter=600))
+scheduler.add("orphaned_uploads", _delete_orphaned_uploads, Cron("45 3 * * *", jitter=600))
+scheduler.add("prune_expired_rows", _prune_expired_rows, Cron("30 4 * * *", jitter=600))
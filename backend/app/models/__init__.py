@@ -6,6 +6,16 @@ from .sponsor_tier import SponsorTier
 from .audit_log import AuditLog
 from .rsvp import RSVP
 from .contact_message import ContactMessage
+from .email_outbox import EmailOutbox
+from .bulk_mailing import BulkMailing
+from .bulk_mail_recipient import BulkMailRecipient
+from .donation_daily_rollup import DonationDailyRollup
+from .subscription_event import SubscriptionEvent
+from .donor import Donor
+from .moderation_event import ModerationEvent
+from .scheduler_lease import SchedulerLease
+from .scheduled_job import ScheduledJob
+from .job_run import JobRun
 
 __all__ = [
     "User",
@@ -16,5 +26,15 @@ __all__ = [
     "AuditLog",
     "RSVP",
     "ContactMessage",
+    "EmailOutbox",
+    "BulkMailing",
+    "BulkMailRecipient",
+    "DonationDailyRollup",
+    "SubscriptionEvent",
+    "Donor",
+    "ModerationEvent",
+    "SchedulerLease",
+    "ScheduledJob",
+    "JobRun",
 ]
 
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+
+class BulkMailRecipient(Base):
+    __tablename__ = "bulk_mail_recipients"
+    __table_args__ = (
+        UniqueConstraint("mailing_id", "email", name="uq_bulk_mail_recipients_mailing_email"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    mailing_id = Column(Integer, ForeignKey("bulk_mailings.id"), nullable=False)
+    rsvp_id = Column(Integer, ForeignKey("rsvps.id"))
+    email = Column(String, nullable=False)  # lower-cased, one message per address
+    status = Column(String, nullable=False)  # sent, failed
+    error = Column(Text)
+    sent_at = Column(DateTime(timezone=True))
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class BulkMailing(Base):
+    __tablename__ = "bulk_mailings"
+    __table_args__ = (
+        Index("ix_bulk_mailings_status_scheduled_at", "status", "scheduled_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # reminder, confirmation
+    subject_template = Column(String, nullable=False)
+    body_template = Column(Text, nullable=False)
+    html_template = Column(Text)
+    # scheduled, running, completed, canceled, failed
+    status = Column(String, default="scheduled", nullable=False)
+    scheduled_at = Column(DateTime(timezone=True), nullable=False)
+    last_rsvp_id = Column(Integer, default=0, nullable=False)  # resume checkpoint
+    sent_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    lease_expires_at = Column(DateTime(timezone=True))
+    lease_token = Column(String)  # set by the worker holding the lease
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -1,16 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
 class Donation(Base):
     __tablename__ = "donations"
+    __table_args__ = (Index("ix_donations_donor_id_created_at", "donor_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     amount_cents = Column(Integer, nullable=False)
     currency = Column(String, default="usd", nullable=False)
     donor_email = Column(String)
     donor_name = Column(String)
+    donor_id = Column(Integer, ForeignKey("donors.id"))
     stripe_payment_intent_id = Column(String, unique=True)
     stripe_subscription_id = Column(String)
     status = Column(String, default="pending")  # pending, succeeded, failed
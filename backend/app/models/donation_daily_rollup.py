@@ -0,0 +1,22 @@
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Boolean, Date, DateTime, UniqueConstraint
+)
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DonationDailyRollup(Base):
+    """Succeeded donation totals per day, currency and recurring flag"""
+
+    __tablename__ = "donation_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "currency", "is_recurring", name="uq_donation_daily_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    currency = Column(String, nullable=False)
+    is_recurring = Column(Boolean, nullable=False)
+    total_amount_cents = Column(BigInteger, default=0, nullable=False)
+    donation_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class Donor(Base):
+    __tablename__ = "donors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Canonical: trimmed, lower-case
+    email = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String)
+    lifetime_amount_cents = Column(BigInteger, default=0, nullable=False)  # succeeded gifts only
+    gift_count = Column(Integer, default=0, nullable=False)
+    first_gift_at = Column(DateTime(timezone=True))
+    last_gift_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, Float, JSON, DateTime, Index
+from app.core.database import Base
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+    __table_args__ = (Index("ix_job_runs_job_name_started_at", "job_name", "started_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # running, succeeded, failed, interrupted
+    holder = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    finished_at = Column(DateTime(timezone=True))
+    duration_ms = Column(Float)
+    result = Column(JSON)
+    error = Column(Text)
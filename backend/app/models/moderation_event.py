@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ModerationEvent(Base):
+    """Change feed for the gallery moderation queue; ``id`` is the SSE event id"""
+
+    __tablename__ = "moderation_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    photo_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # added, approved, deleted
+    payload = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
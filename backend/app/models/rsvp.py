@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 
 class RSVP(Base):
     __tablename__ = "rsvps"
+    __table_args__ = (Index("ix_rsvps_event_id_id", "event_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class ScheduledJob(Base):
+    """When a job is next due; claiming a run moves ``next_run_at`` on"""
+
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    schedule = Column(String, nullable=False)  # e.g. "every 900s" or "cron 15 3 * * *"
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+
+class SchedulerLease(Base):
+    """Which worker runs the scheduled jobs, until ``expires_at`` unless renewed"""
+
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # host:pid:nonce of the leader
+    acquired_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class SubscriptionEvent(Base):
+    """Append-only ledger of recurring donation lifecycle events from Stripe"""
+
+    __tablename__ = "subscription_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stripe_event_id = Column(String, unique=True, nullable=False)
+    stripe_subscription_id = Column(String, nullable=False, index=True)
+    event_type = Column(String, nullable=False)  # started, renewed, payment_failed, canceled
+    amount_cents = Column(Integer, default=0, nullable=False)
+    currency = Column(String, default="usd", nullable=False)
+    donor_email = Column(String)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -5,6 +5,9 @@ from .gallery import GalleryPhotoCreate, GalleryPhotoResponse, GalleryPhotoAppro
 from .sponsor import SponsorTierCreate, SponsorTierUpdate, SponsorTierResponse
 from .contact import ContactMessageCreate
 from .rsvp import RSVPCreate
+from .donor import DonorResponse, DonorDetailResponse
+from .admin import DashboardSummary
+from .bulk_mail import BulkMailingCreate, BulkMailingResponse, BulkMailRecipientResponse
 
 __all__ = [
     "UserCreate",
@@ -25,4 +28,10 @@ __all__ = [
     "SponsorTierResponse",
     "ContactMessageCreate",
     "RSVPCreate",
+    "DonorResponse",
+    "DonorDetailResponse",
+    "DashboardSummary",
+    "BulkMailingCreate",
+    "BulkMailingResponse",
+    "BulkMailRecipientResponse",
 ]
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+
+class DashboardEventRSVPs(BaseModel):
+    event_id: int
+    title: str
+    start_at: datetime
+    rsvp_count: int
+
+
+class DashboardDonationTotal(BaseModel):
+    currency: str
+    total_amount_cents: int
+    count: int
+
+
+class DashboardSummary(BaseModel):
+    pending_photos: int
+    upcoming_events: int
+    active_sponsor_tiers: int
+    rsvps_per_event: List[DashboardEventRSVPs]
+    donation_totals: List[DashboardDonationTotal]
+    generated_at: datetime
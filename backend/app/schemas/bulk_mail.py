@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal, Optional
+
+
+class BulkMailingCreate(BaseModel):
+    kind: Literal["reminder", "confirmation"] = "reminder"
+    subject_template: Optional[str] = None
+    body_template: Optional[str] = None
+    html_template: Optional[str] = None
+    send_at: Optional[datetime] = None
+    hours_before_start: Optional[float] = None
+
+
+class BulkMailingResponse(BaseModel):
+    id: int
+    event_id: int
+    kind: str
+    subject_template: str
+    status: str
+    scheduled_at: datetime
+    sent_count: int
+    failed_count: int
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class BulkMailRecipientResponse(BaseModel):
+    id: int
+    rsvp_id: Optional[int]
+    email: str
+    status: str
+    error: Optional[str]
+    sent_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, field_validator, model_validator
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 MIN_AMOUNT_CENTS = 100
 MAX_AMOUNT_CENTS = 10_000_000
@@ -51,8 +51,36 @@ class DonationResponse(BaseModel):
         from_attributes = True
 
 
+class DonationStatsPoint(BaseModel):
+    day: date
+    amount_cents: int
+    count: int
+    recurring_count: int
+
+
 class DonationStats(BaseModel):
     total_amount_cents: int
     total_count: int
     recurring_count: int
+    # First day the series covers; None when it starts at the first donation
+    series_start: Optional[date] = None
+    series: List[DonationStatsPoint] = []
+
+
+
+class RetentionCohort(BaseModel):
+    cohort: str
+    size: int
+    retention: List[float]
+
 
+class RecurringAnalytics(BaseModel):
+    months: List[str]
+    mrr_cents: List[int]
+    active: List[int]
+    new: List[int]
+    churned: List[int]
+    churn_rate: List[float]
+    new_mrr_cents: List[int]
+    churned_mrr_cents: List[int]
+    cohorts: List[RetentionCohort]
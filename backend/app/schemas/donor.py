@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+from .donation import DonationResponse
+
+
+class DonorResponse(BaseModel):
+    id: int
+    email: str
+    name: Optional[str]
+    lifetime_amount_cents: int
+    gift_count: int
+    first_gift_at: Optional[datetime]
+    last_gift_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class DonorDetailResponse(DonorResponse):
+    recent_donations: List[DonationResponse]
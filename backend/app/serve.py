@@ -0,0 +1,301 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.serve [--workers N] [--bind 0.0.0.0:8000] [--no-preload] [--migrations check]
+
+One worker per CPU the container may use (its cgroup quota, not the
+host's core count) unless SERVE_WORKERS or --workers says otherwise. The
+app is imported once in the master and forked, so workers share its
+memory copy-on-write. Workers are recycled after SERVE_MAX_REQUESTS
+requests, give or take SERVE_MAX_REQUESTS_JITTER so they do not all
+restart together.
+
+SIGHUP replaces the workers one at a time: a new worker is started, and
+the oldest one is stopped gracefully once the new one is serving and has
+had SERVE_ROLLING_RESTART_DELAY_SECONDS to warm up. With preload the new
+workers are forked from the already-loaded app, so code changes need a
+full restart (or --no-preload).
+
+Before starting, the database is checked to be at the latest migration;
+--migrations upgrade runs them instead, --migrations skip does neither.
+"""
+import argparse
+import glob
+import importlib
+import math
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+
+from app.core.config import settings
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+PRELOADED_SDKS = ["boto3", "stripe", "clerk_backend_api"]
+
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs allowed by the cgroup (v2, then v1) CPU quota, None if unlimited"""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def cpu_limit() -> float:
+    """CPUs this process can use: the CPUs it may run on, capped by the quota"""
+    if hasattr(os, "sched_getaffinity"):
+        available = len(os.sched_getaffinity(0))
+    else:
+        available = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    return min(available, quota) if quota else available
+
+
+def default_workers() -> int:
+    return max(1, math.ceil(cpu_limit()))
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Give the workers an empty shared Prometheus directory.
+
+    Without one each worker would report only its own metrics. Leftover
+    files from a previous run would be added to this run's totals, so they
+    are removed. Must run before app.core.metrics is imported.
+    """
+    if not settings.METRICS_ENABLED or (workers == 1 and not settings.PROMETHEUS_MULTIPROC_DIR):
+        return
+    if not settings.PROMETHEUS_MULTIPROC_DIR:
+        settings.PROMETHEUS_MULTIPROC_DIR = tempfile.mkdtemp(prefix="prometheus-")
+    path = settings.PROMETHEUS_MULTIPROC_DIR
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, "*.db")):
+        os.remove(stale)
+    # Workers that import the app themselves (no preload) read settings
+    # from the environment
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def check_migrations(mode: str) -> None:
+    """Make sure the database schema is at the latest revision.
+
+    ``check`` exits if it is not, ``upgrade`` migrates it, ``skip`` trusts
+    the deploy to have done so.
+    """
+    if mode == "skip":
+        return
+    from alembic import command
+
+    config = _alembic_config()
+    if mode == "upgrade":
+        command.upgrade(config, "head")
+        return
+
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    # A throwaway engine: the app's pools must not hold connections that
+    # the forked workers would inherit
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        with engine.connect() as connection:
+            current = set(MigrationContext.configure(connection).get_current_heads())
+    finally:
+        engine.dispose()
+    if current != heads:
+        sys.exit(
+            f"Database is at revision {', '.join(sorted(current)) or 'none'}, "
+            f"expected {', '.join(sorted(heads))}. Run `alembic upgrade head` "
+            "or start with --migrations upgrade."
+        )
+
+
+def post_fork(server, worker) -> None:
+    # Connections are never opened in the master, but make sure a preloaded
+    # pool cannot hand a worker a connection shared with its siblings
+    database = sys.modules.get("app.core.database")
+    if database is not None:
+        database.engine.dispose(close=False)
+        database.async_engine.sync_engine.dispose(close=False)
+        for replica in database.replica_set.replicas:
+            replica.engine.sync_engine.dispose(close=False)
+
+
+def child_exit(server, worker) -> None:
+    # Covers workers that crashed or were killed, which skip the lifespan
+    # shutdown that normally does this
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class RollingArbiter(Arbiter):
+    """gunicorn's master process, with SIGHUP replacing workers one by one.
+
+    For each old worker: raise the worker count by one so a replacement is
+    spawned, wait until it is serving (its first heartbeat) plus
+    ``rolling_delay`` seconds, then lower the count again so the oldest
+    worker is stopped gracefully. A replacement that does not start within
+    the worker timeout ends the restart and the old workers stay.
+    """
+
+    def __init__(self, app, rolling_delay: float):
+        super().__init__(app)
+        self.rolling_delay = rolling_delay
+        self._to_replace: list[int] = []
+        # (pid, heartbeat at spawn, spawned at, serving since)
+        self._replacement: Optional[list] = None
+        self._abandoned: Optional[int] = None
+
+    def handle_hup(self):
+        if self._to_replace:
+            self.log.info("Rolling restart already in progress")
+            return
+        self._to_replace = sorted(self.WORKERS, key=lambda pid: self.WORKERS[pid].age)
+        self.log.info("Rolling restart of %d workers", len(self._to_replace))
+
+    def manage_workers(self):
+        if self._abandoned is not None and self._abandoned not in self.WORKERS:
+            self._abandoned = None
+            self.num_workers -= 1
+        if self._to_replace or self._replacement:
+            self._roll()
+        super().manage_workers()
+
+    def _roll(self) -> None:
+        self._to_replace = [pid for pid in self._to_replace if pid in self.WORKERS]
+        if self._replacement is None:
+            if not self._to_replace:
+                return
+            self.num_workers += 1
+            pid = self.spawn_worker()
+            self._replacement = [pid, self.WORKERS[pid].tmp.last_update(), time.monotonic(), None]
+            return
+
+        pid, first_heartbeat, spawned_at, serving_since = self._replacement
+        worker = self.WORKERS.get(pid)
+        if worker is None:
+            self.log.error("Replacement worker %s exited; rolling restart stopped", pid)
+            self.num_workers -= 1
+            self._to_replace = []
+            self._replacement = None
+            return
+
+        now = time.monotonic()
+        if serving_since is None:
+            if worker.tmp.last_update() != first_heartbeat:
+                self._replacement[3] = now
+            elif now - spawned_at > self.timeout:
+                self.log.error("Replacement worker %s did not start; rolling restart stopped", pid)
+                self.kill_worker(pid, signal.SIGKILL)
+                self._abandoned = pid
+                self._to_replace = []
+                self._replacement = None
+            return
+
+        if now - serving_since >= self.rolling_delay:
+            # The oldest worker is the next one to replace; manage_workers
+            # stops it now that there is one worker too many
+            self.num_workers -= 1
+            self._to_replace.pop(0)
+            self._replacement = None
+            if not self._to_replace:
+                self.log.info("Rolling restart done")
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict, rolling_delay: float):
+        self.options = options
+        self.rolling_delay = rolling_delay
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        if self.cfg.preload_app:
+            # The app imports these on first use; importing them here instead
+            # lets the workers share them rather than each paying for it
+            for module in PRELOADED_SDKS:
+                importlib.import_module(module)
+        return app
+
+    def run(self):
+        RollingArbiter(self, self.rolling_delay).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--bind", default=settings.SERVE_BIND)
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVE_WORKERS, help="0 sizes to the CPU quota"
+    )
+    parser.add_argument(
+        "--no-preload", dest="preload", action="store_false", default=settings.SERVE_PRELOAD
+    )
+    parser.add_argument(
+        "--migrations", choices=["check", "upgrade", "skip"], default=settings.SERVE_MIGRATIONS
+    )
+    args = parser.parse_args()
+
+    workers = args.workers or default_workers()
+    prepare_metrics_dir(workers)
+    check_migrations(args.migrations)
+
+    options = {
+        "bind": args.bind,
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": args.preload,
+        "max_requests": settings.SERVE_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVE_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.SERVE_GRACEFUL_TIMEOUT_SECONDS,
+        "timeout": settings.SERVE_WORKER_TIMEOUT_SECONDS,
+        "keepalive": settings.SERVE_KEEPALIVE_SECONDS,
+        # Proxies whose X-Forwarded-For is trusted for the client address
+        "forwarded_allow_ips": settings.SERVE_FORWARDED_ALLOW_IPS,
+        "proc_name": "tdrmf-api",
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+    }
+    Server(options, settings.SERVE_ROLLING_RESTART_DELAY_SECONDS).run()
+
+
+if __name__ == "__main__":
+    main()
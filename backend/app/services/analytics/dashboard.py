@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.donation_daily_rollup import DonationDailyRollup
+from app.models.event import Event
+from app.models.gallery_photo import GalleryPhoto
+from app.models.rsvp import RSVP
+from app.models.sponsor_tier import SponsorTier
+
+
+def _row(metric: str, value, key=None, label=None, at=None, extra=None):
+    return (
+        literal(metric).label("metric"),
+        (cast(key, String) if key is not None else cast(null(), String)).label("key"),
+        (label if label is not None else cast(null(), String)).label("label"),
+        (at if at is not None else cast(null(), DateTime)).label("at"),
+        cast(value, BigInteger).label("value"),
+        (cast(extra, BigInteger) if extra is not None else cast(null(), BigInteger)).label("extra"),
+    )
+
+
+def get_dashboard_summary(db: Session) -> dict:
+    """Every admin dashboard count and total from one UNION ALL query.
+
+    Each branch yields tagged rows (metric, key, label, at, value, extra)
+    that are folded into the summary here. Donation totals come from the
+    daily rollups rather than the donations table.
+    """
+    now = datetime.utcnow()
+    rsvp_counts = (
+        select(RSVP.event_id, func.count(RSVP.id).label("rsvp_count"))
+        .group_by(RSVP.event_id)
+        .subquery()
+    )
+    query = union_all(
+        select(*_row("pending_photos", func.count(GalleryPhoto.id))).where(
+            GalleryPhoto.approved == False  # noqa: E712
+        ),
+        select(*_row("upcoming_events", func.count(Event.id))).where(Event.start_at >= now),
+        select(*_row("active_sponsor_tiers", func.count(SponsorTier.id))).where(
+            SponsorTier.is_active == True  # noqa: E712
+        ),
+        select(
+            *_row(
+                "rsvps",
+                func.coalesce(rsvp_counts.c.rsvp_count, 0),
+                key=Event.id,
+                label=Event.title,
+                at=Event.start_at,
+            )
+        )
+        .select_from(Event)
+        .outerjoin(rsvp_counts, rsvp_counts.c.event_id == Event.id)
+        .where(Event.start_at >= now),
+        select(
+            *_row(
+                "donations",
+                func.sum(DonationDailyRollup.total_amount_cents),
+                key=DonationDailyRollup.currency,
+                extra=func.sum(DonationDailyRollup.donation_count),
+            )
+        ).group_by(DonationDailyRollup.currency),
+    )
+
+    summary = {
+        "pending_photos": 0,
+        "upcoming_events": 0,
+        "active_sponsor_tiers": 0,
+        "rsvps_per_event": [],
+        "donation_totals": [],
+        "generated_at": now,
+    }
+    for metric, key, label, at, value, extra in db.execute(query):
+        if metric == "rsvps":
+            summary["rsvps_per_event"].append(
+                {"event_id": int(key), "title": label, "start_at": at, "rsvp_count": value or 0}
+            )
+        elif metric == "donations":
+            if extra:
+                summary["donation_totals"].append(
+                    {"currency": key, "total_amount_cents": value or 0, "count": extra}
+                )
+        else:
+            summary[metric] = value or 0
+    summary["rsvps_per_event"].sort(key=lambda event: event["start_at"])
+    return summary
@@ -0,0 +1,205 @@
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.models.donation import Donation
+from app.models.donation_daily_rollup import DonationDailyRollup
+
+
+def _utc_day(created_at: datetime) -> date:
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(UTC)
+    return created_at.date()
+
+
+def _donation_day(donation: Donation) -> date:
+    return _utc_day(donation.created_at or datetime.utcnow())
+
+
+def _upsert(db: Session, day: date, currency: str, is_recurring: bool, amount: int, count: int):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is None:
+        # Portable fallback: try the update first, insert if nothing matched
+        updated = db.execute(
+            update(DonationDailyRollup)
+            .where(
+                DonationDailyRollup.day == day,
+                DonationDailyRollup.currency == currency,
+                DonationDailyRollup.is_recurring == is_recurring,
+            )
+            .values(
+                total_amount_cents=DonationDailyRollup.total_amount_cents + amount,
+                donation_count=DonationDailyRollup.donation_count + count,
+            )
+        ).rowcount
+        if not updated:
+            db.execute(
+                insert(DonationDailyRollup).values(
+                    day=day,
+                    currency=currency,
+                    is_recurring=is_recurring,
+                    total_amount_cents=amount,
+                    donation_count=count,
+                )
+            )
+        return
+
+    statement = dialect_insert(DonationDailyRollup).values(
+        day=day,
+        currency=currency,
+        is_recurring=is_recurring,
+        total_amount_cents=amount,
+        donation_count=count,
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "currency", "is_recurring"],
+            set_={
+                "total_amount_cents": DonationDailyRollup.total_amount_cents
+                + statement.excluded.total_amount_cents,
+                "donation_count": DonationDailyRollup.donation_count
+                + statement.excluded.donation_count,
+                "updated_at": func.now(),
+            },
+        )
+    )
+
+
+def record_status_change(db: Session, donation: Donation, previous_status: Optional[str]) -> None:
+    """Adjust the rollup for a donation entering or leaving ``succeeded``.
+
+    Must be called in the same transaction as the status update so the
+    rollup can never drift from the donations table.
+    """
+    was_counted = previous_status == "succeeded"
+    is_counted = donation.status == "succeeded"
+    if was_counted == is_counted:
+        return
+    sign = 1 if is_counted else -1
+    _upsert(
+        db,
+        _donation_day(donation),
+        donation.currency or "usd",
+        bool(donation.is_recurring),
+        sign * donation.amount_cents,
+        sign,
+    )
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute every rollup row from the donations table; returns the row count.
+
+    The rollups are locked against writes for the whole rebuild, so a
+    webhook adjusting them meanwhile waits and then applies its change on
+    top, instead of being wiped out or colliding with the new rows. Days
+    are bucketed by ``_donation_day``, as the incremental updates are.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE donation_daily_rollups IN EXCLUSIVE MODE"))
+    # On SQLite the delete takes the database's write lock
+    db.execute(delete(DonationDailyRollup))
+
+    totals: dict[tuple[date, str, bool], list[int]] = defaultdict(lambda: [0, 0])
+    donations = db.execute(
+        select(Donation.created_at, Donation.currency, Donation.is_recurring, Donation.amount_cents)
+        .where(Donation.status == "succeeded", Donation.created_at.isnot(None))
+        .execution_options(yield_per=1000)
+    )
+    for created_at, currency, is_recurring, amount_cents in donations:
+        key = (_utc_day(created_at), currency or "usd", bool(is_recurring))
+        totals[key][0] += amount_cents
+        totals[key][1] += 1
+    if totals:
+        db.execute(
+            insert(DonationDailyRollup),
+            [
+                {
+                    "day": day,
+                    "currency": currency,
+                    "is_recurring": is_recurring,
+                    "total_amount_cents": amount,
+                    "donation_count": count,
+                }
+                for (day, currency, is_recurring), (amount, count) in totals.items()
+            ],
+        )
+    db.commit()
+    return len(totals)
+
+
+def get_donation_stats(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    currency: Optional[str] = None,
+    series_days: Optional[int] = None,
+) -> dict:
+    """Totals and a daily series for succeeded donations, read from the rollups.
+
+    Without ``start_date`` the totals cover everything up to ``end_date``,
+    but with ``series_days`` the series only covers that many days ending
+    at ``end_date`` (or today); 0 skips the series.
+    """
+    filters = []
+    if start_date:
+        filters.append(DonationDailyRollup.day >= start_date)
+    if end_date:
+        filters.append(DonationDailyRollup.day <= end_date)
+    if currency:
+        filters.append(DonationDailyRollup.currency == currency.lower())
+
+    recurring_count = func.sum(
+        case(
+            (DonationDailyRollup.is_recurring == True, DonationDailyRollup.donation_count),  # noqa: E712
+            else_=0,
+        )
+    )
+    sums = (
+        func.sum(DonationDailyRollup.total_amount_cents),
+        func.sum(DonationDailyRollup.donation_count),
+        recurring_count,
+    )
+    total_amount, total_count, total_recurring = db.execute(select(*sums).where(*filters)).one()
+
+    series_start = start_date
+    series = []
+    if series_days != 0:
+        series_filters = list(filters)
+        if start_date is None and series_days is not None:
+            last_day = end_date or datetime.utcnow().date()
+            series_start = last_day - timedelta(days=series_days - 1)
+            series_filters.append(DonationDailyRollup.day >= series_start)
+        series = db.execute(
+            select(DonationDailyRollup.day, *sums)
+            .where(*series_filters)
+            .group_by(DonationDailyRollup.day)
+            .order_by(DonationDailyRollup.day)
+        ).all()
+
+    points = [
+        {
+            "day": day,
+            "amount_cents": int(amount or 0),
+            "count": int(count or 0),
+            "recurring_count": int(recurring or 0),
+        }
+        for day, amount, count, recurring in series
+        if count
+    ]
+    return {
+        "total_amount_cents": int(total_amount or 0),
+        "total_count": int(total_count or 0),
+        "recurring_count": int(total_recurring or 0),
+        "series_start": series_start,
+        "series": points,
+    }
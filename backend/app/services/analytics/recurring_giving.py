@@ -0,0 +1,179 @@
+from datetime import UTC, datetime
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.subscription_event import SubscriptionEvent
+from app.schemas.donation import RecurringAnalytics
+
+PAYMENT_EVENTS = ("started", "renewed")
+INVOICE_EVENT_TYPES = {
+    "subscription_create": "started",
+    "subscription_cycle": "renewed",
+    "subscription_update": "renewed",
+}
+
+
+def record_subscription_event(
+    db: Session,
+    stripe_event_id: str,
+    stripe_subscription_id: str,
+    event_type: str,
+    occurred_at: datetime,
+    amount_cents: int = 0,
+    currency: str = "usd",
+    donor_email: Optional[str] = None,
+) -> bool:
+    """Append an event to the ledger; returns False if Stripe redelivered it"""
+    try:
+        with db.begin_nested():
+            db.add(
+                SubscriptionEvent(
+                    stripe_event_id=stripe_event_id,
+                    stripe_subscription_id=stripe_subscription_id,
+                    event_type=event_type,
+                    amount_cents=amount_cents or 0,
+                    currency=currency or "usd",
+                    donor_email=donor_email,
+                    occurred_at=occurred_at,
+                )
+            )
+        return True
+    except IntegrityError:
+        return False
+
+
+def _month_index(values: np.ndarray) -> np.ndarray:
+    """Months since year 0 for an array of datetime64 values"""
+    return values.astype("datetime64[M]").astype(np.int64)
+
+
+def _label(month: int) -> str:
+    return str(np.datetime64(int(month), "M"))
+
+
+def compute_recurring_analytics(
+    db: Session, currency: str = "usd", as_of: Optional[datetime] = None
+) -> dict:
+    """MRR, churn and retention cohorts from the subscription ledger.
+
+    The ledger is loaded once as column arrays and every metric is derived
+    with vectorized NumPy operations. A subscription counts as active in a
+    month if it started in or before that month and was not canceled in or
+    before it; its monthly value is the amount of its most recent payment
+    up to that month.
+    Subscriptions without a ``started`` event began before the ledger: they
+    are active from its first month, but are not counted as new and are in
+    no cohort.
+    """
+    rows = db.execute(
+        select(
+            SubscriptionEvent.stripe_subscription_id,
+            SubscriptionEvent.event_type,
+            SubscriptionEvent.amount_cents,
+            SubscriptionEvent.occurred_at,
+        ).where(SubscriptionEvent.currency == currency)
+    ).all()
+    if not rows:
+        return {key: [] for key in RecurringAnalytics.model_fields}
+
+    sub_ids, event_types, amounts, occurred = zip(*rows)
+    _, subs = np.unique(np.array(sub_ids, dtype=object), return_inverse=True)
+    event_types = np.array(event_types, dtype=object)
+    amounts = np.array(amounts, dtype=np.int64)
+    occurred = np.array(
+        [value.replace(tzinfo=None) if value.tzinfo is None
+         else value.astimezone(UTC).replace(tzinfo=None) for value in occurred],
+        dtype="datetime64[us]",
+    )
+    months = _month_index(occurred)
+
+    as_of = as_of or datetime.utcnow()
+    first_month = int(months.min())
+    n_months = int(_month_index(np.array([as_of], dtype="datetime64[us]"))[0]) - first_month + 1
+    months = months - first_month
+    n_subs = int(subs.max()) + 1
+
+    # Per-subscription start month, cancel month (n_months if still active) and amount
+    start = np.full(n_subs, n_months, dtype=np.int64)
+    np.minimum.at(start, subs, months)
+    started = np.zeros(n_subs, dtype=bool)
+    started[subs[event_types == "started"]] = True
+    start[~started] = 0
+    end = np.full(n_subs, n_months, dtype=np.int64)
+    canceled = event_types == "canceled"
+    np.minimum.at(end, subs[canceled], months[canceled])
+    end = np.maximum(end, start)
+
+    # Amount changes: each payment contributes the difference from the
+    # subscription's previous payment, in the month it was made
+    delta_mrr = np.zeros(n_months + 1, dtype=np.int64)
+    first_amount = np.zeros(n_subs, dtype=np.int64)
+    last_amount = np.zeros(n_subs, dtype=np.int64)
+    paid = np.isin(event_types, PAYMENT_EVENTS)
+    if paid.any():
+        order = np.lexsort((occurred[paid], subs[paid]))
+        paid_subs = subs[paid][order]
+        paid_amounts = amounts[paid][order]
+        paid_months = months[paid][order]
+        first = np.r_[True, paid_subs[1:] != paid_subs[:-1]]
+        last = np.r_[paid_subs[1:] != paid_subs[:-1], True]
+        changes = paid_amounts - np.where(first, 0, np.r_[0, paid_amounts[:-1]])
+        in_life = paid_months < end[paid_subs]
+        np.add.at(delta_mrr, paid_months[in_life], changes[in_life])
+        first_amount[paid_subs[first]] = paid_amounts[first]
+        last_amount[paid_subs[last]] = paid_amounts[last]
+
+    was_canceled = end < n_months
+    np.add.at(delta_mrr, end[was_canceled], -last_amount[was_canceled])
+    mrr = np.cumsum(delta_mrr)[:n_months]
+
+    # Active subscriptions from +1/-1 at start and cancel months
+    delta_active = np.zeros(n_months + 1, dtype=np.int64)
+    np.add.at(delta_active, start, 1)
+    np.add.at(delta_active, end, -1)
+    active = np.cumsum(delta_active)[:n_months]
+
+    new = np.bincount(start[started], minlength=n_months + 1)[:n_months]
+    new_mrr = np.bincount(
+        start[started], weights=first_amount[started], minlength=n_months + 1
+    )[:n_months]
+    churned = np.bincount(end[was_canceled], minlength=n_months)[:n_months]
+    churned_mrr = np.bincount(
+        end[was_canceled], weights=last_amount[was_canceled], minlength=n_months
+    )[:n_months]
+    active_at_start = np.r_[np.count_nonzero(~started), active[:-1]]
+    churn_rate = np.divide(
+        churned, active_at_start, out=np.zeros(n_months), where=active_at_start > 0
+    )
+
+    # Retention cohorts: retained[c, k] = subscriptions from cohort c still active k months later
+    lifetime = end - start
+    histogram = np.zeros((n_months, n_months + 1), dtype=np.int64)
+    np.add.at(histogram, (start[started], lifetime[started]), 1)
+    retained = np.cumsum(histogram[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    cohort_sizes = histogram.sum(axis=1)
+
+    cohorts = []
+    for cohort in np.flatnonzero(cohort_sizes):
+        observed = n_months - cohort
+        cohorts.append({
+            "cohort": _label(first_month + cohort),
+            "size": int(cohort_sizes[cohort]),
+            "retention": np.round(retained[cohort, :observed] / cohort_sizes[cohort], 4).tolist(),
+        })
+
+    return {
+        "months": [_label(first_month + m) for m in range(n_months)],
+        "mrr_cents": mrr.tolist(),
+        "active": active.tolist(),
+        "new": new.astype(np.int64).tolist(),
+        "churned": churned.astype(np.int64).tolist(),
+        "churn_rate": np.round(churn_rate, 4).tolist(),
+        "new_mrr_cents": new_mrr.astype(np.int64).tolist(),
+        "churned_mrr_cents": churned_mrr.astype(np.int64).tolist(),
+        "cohorts": cohorts,
+    }
@@ -1,6 +1,9 @@
 from .clerk_auth import ClerkAdmin, get_current_admin
+from .stream_tokens import create_stream_token, stream_admin
 
 __all__ = [
     "ClerkAdmin",
+    "create_stream_token",
     "get_current_admin",
+    "stream_admin",
 ]
@@ -1,13 +1,16 @@
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from functools import cache
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import httpx
-from clerk_backend_api import Clerk
-from clerk_backend_api.jwks_helpers import AuthenticateRequestOptions
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import settings
+from app.core.resilience import DependencyUnavailableError, dependency
+
+if TYPE_CHECKING:
+    from clerk_backend_api import Clerk
 
 security = HTTPBearer(auto_error=False)
 
@@ -19,8 +22,40 @@ class ClerkAdmin:
     public_metadata: Dict[str, Any]
 
 
-def _get_clerk_client() -> Clerk:
-    return Clerk(bearer_auth=settings.CLERK_SECRET_KEY)
+class ClerkUnavailableError(Exception):
+    """Clerk could not be asked about a session"""
+
+
+@cache
+def _get_clerk_client() -> "Clerk":
+    """The Clerk SDK client, shared across requests and imported on first use"""
+    from clerk_backend_api import Clerk
+
+    return Clerk(
+        bearer_auth=settings.CLERK_SECRET_KEY,
+        timeout_ms=int(settings.CLERK_TIMEOUT_SECONDS * 1000),
+    )
+
+
+def _is_clerk_failure(e: BaseException) -> bool:
+    from clerk_backend_api.models import SDKError
+
+    if isinstance(e, SDKError):
+        return e.status_code >= 500 or e.status_code == 429
+    return isinstance(e, (httpx.TransportError, ClerkUnavailableError))
+
+
+clerk_api = dependency("clerk", settings.CLERK_TIMEOUT_SECONDS, _is_clerk_failure)
+
+
+def _authenticate(httpx_request: httpx.Request, options):
+    from clerk_backend_api.jwks_helpers import TokenVerificationErrorReason
+
+    request_state = _get_clerk_client().authenticate_request(httpx_request, options)
+    # The SDK reports Clerk being down as a signed-out session
+    if request_state.reason == TokenVerificationErrorReason.JWK_FAILED_TO_LOAD:
+        raise ClerkUnavailableError(request_state.message)
+    return request_state
 
 
 def get_current_admin(
@@ -40,14 +75,24 @@ def get_current_admin(
         headers=dict(request.headers),
     )
 
-    clerk = _get_clerk_client()
-    request_state = clerk.authenticate_request(
-        httpx_request,
-        AuthenticateRequestOptions(
-            secret_key=settings.CLERK_SECRET_KEY,
-            accepts_token=["session_token"],
-        ),
-    )
+    from clerk_backend_api.jwks_helpers import AuthenticateRequestOptions
+
+    try:
+        request_state = clerk_api.call(
+            "authenticate_request",
+            _authenticate,
+            httpx_request,
+            AuthenticateRequestOptions(
+                secret_key=settings.CLERK_SECRET_KEY,
+                accepts_token=["session_token"],
+            ),
+            idempotent=True,
+        )
+    except (ClerkUnavailableError, DependencyUnavailableError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is temporarily unavailable",
+        )
 
     if not request_state.is_signed_in:
         raise HTTPException(
@@ -64,7 +109,15 @@ def get_current_admin(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = clerk.users.get(user_id=user_id)
+    try:
+        user = clerk_api.call(
+            "get_user", _get_clerk_client().users.get, user_id=user_id, idempotent=True
+        )
+    except DependencyUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication is temporarily unavailable",
+        )
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.config import settings
+
+from .clerk_auth import ClerkAdmin, get_current_admin, security
+
+
+def _key() -> bytes:
+    # Derived from the Clerk key so that every worker accepts every token
+    secret = settings.CLERK_SECRET_KEY.encode()
+    return hmac.new(secret, b"sse-stream-token", hashlib.sha256).digest()
+
+
+def _sign(body: str) -> str:
+    return hmac.new(_key(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def create_stream_token(admin: ClerkAdmin, stream: str) -> str:
+    """A token that lets ``admin`` open ``stream`` for SSE_TOKEN_SECONDS.
+
+    EventSource cannot send an Authorization header, so the page fetches a
+    token with its session and passes it as ``?token=`` on the stream URL.
+    """
+    claims = {
+        "sub": admin.user_id,
+        "email": admin.email,
+        "stream": stream,
+        "exp": time.time() + settings.SSE_TOKEN_SECONDS,
+    }
+    body = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"{body}.{_sign(body)}"
+
+
+def read_stream_token(token: str, stream: str) -> Optional[ClerkAdmin]:
+    """The admin a token was issued to, or None if it is invalid, expired or for another stream"""
+    body, _, signature = token.partition(".")
+    if not hmac.compare_digest(signature, _sign(body)):
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+    except ValueError:
+        return None
+    if claims.get("stream") != stream or claims.get("exp", 0) < time.time():
+        return None
+    return ClerkAdmin(claims["sub"], claims.get("email"), {"role": "admin"})
+
+
+def stream_admin(stream: str):
+    """Dependency for an SSE endpoint: a stream token, or the usual bearer session"""
+
+    def get_stream_admin(
+        request: Request,
+        token: Optional[str] = None,
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    ) -> ClerkAdmin:
+        if token is None:
+            return get_current_admin(request, credentials)
+        admin = read_stream_token(token, stream)
+        if admin is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired stream token",
+            )
+        return admin
+
+    return get_stream_admin
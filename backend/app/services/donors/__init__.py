@@ -0,0 +1,7 @@
+from .donor_service import canonical_email, get_or_create_donor, record_gift_status_change
+
+__all__ = [
+    "canonical_email",
+    "get_or_create_donor",
+    "record_gift_status_change",
+]
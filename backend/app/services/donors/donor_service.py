@@ -0,0 +1,103 @@
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.donation import Donation
+from app.models.donor import Donor
+
+
+def canonical_email(email: Optional[str]) -> Optional[str]:
+    """Normalize an email address for donor matching"""
+    if not email:
+        return None
+    email = email.strip().lower()
+    return email or None
+
+
+def get_or_create_donor(db: Session, email: str, name: Optional[str] = None) -> Optional[Donor]:
+    """Return the donor profile for an email, creating it if needed"""
+    email = canonical_email(email)
+    if email is None:
+        return None
+
+    donor = db.scalars(select(Donor).where(Donor.email == email)).first()
+    if donor is None:
+        try:
+            with db.begin_nested():
+                donor = Donor(email=email, name=name, lifetime_amount_cents=0, gift_count=0)
+                db.add(donor)
+        except IntegrityError:
+            # Created concurrently by another request
+            donor = db.scalars(select(Donor).where(Donor.email == email)).one()
+    if name and not donor.name:
+        donor.name = name
+    return donor
+
+
+def record_gift_status_change(
+    db: Session, donation: Donation, previous_status: Optional[str]
+) -> None:
+    """Keep the donor's lifetime totals in step with a donation status change.
+
+    Must be called in the same transaction as the status update. Gifts are
+    added with a single atomic UPDATE; when a gift stops counting the first
+    and last gift dates are recomputed from the donor's indexed donations.
+    """
+    if donation.donor_id is None:
+        return
+    was_counted = previous_status == "succeeded"
+    is_counted = donation.status == "succeeded"
+    if was_counted == is_counted:
+        return
+
+    if is_counted:
+        gift_at = donation.created_at
+        db.execute(
+            update(Donor)
+            .where(Donor.id == donation.donor_id)
+            .values(
+                lifetime_amount_cents=Donor.lifetime_amount_cents + donation.amount_cents,
+                gift_count=Donor.gift_count + 1,
+                first_gift_at=case(
+                    (
+                        (Donor.first_gift_at == None) | (Donor.first_gift_at > gift_at),  # noqa: E711
+                        gift_at,
+                    ),
+                    else_=Donor.first_gift_at,
+                ),
+                last_gift_at=case(
+                    (
+                        (Donor.last_gift_at == None) | (Donor.last_gift_at < gift_at),  # noqa: E711
+                        gift_at,
+                    ),
+                    else_=Donor.last_gift_at,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    # The sessions do not autoflush, so the database may still have this
+    # donation as succeeded
+    gifts = (
+        select(func.min(Donation.created_at), func.max(Donation.created_at))
+        .where(
+            Donation.donor_id == donation.donor_id,
+            Donation.status == "succeeded",
+            Donation.id != donation.id,
+        )
+    )
+    first_gift_at, last_gift_at = db.execute(gifts).one()
+    db.execute(
+        update(Donor)
+        .where(Donor.id == donation.donor_id)
+        .values(
+            lifetime_amount_cents=Donor.lifetime_amount_cents - donation.amount_cents,
+            gift_count=Donor.gift_count - 1,
+            first_gift_at=first_gift_at,
+            last_gift_at=last_gift_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1 @@
+# Realtime (Server-Sent Events) services
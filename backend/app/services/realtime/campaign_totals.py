@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.analytics import donation_rollups
+from app.services.realtime.sse import SSE_KEEPALIVE, sse_message
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of the changes to apply once the session commits
+_PENDING_CHANGES = "campaign_total_changes"
+
+
+class CampaignTotals:
+    """In-memory running total of succeeded donations, pushed over SSE.
+
+    The total is seeded from the daily rollups at startup and adjusted in
+    place whenever a donation enters or leaves ``succeeded`` on this
+    worker, so listeners never cause a database query. A ticker publishes at most
+    once per ``interval``, and only if the total changed, so a burst of
+    gifts becomes a single push. Every listener waits on one shared event
+    that is swapped on publish; an idle connection costs one suspended
+    coroutine. Gifts recorded by other workers are picked up by reseeding
+    from the rollups every ``reseed_interval``.
+    """
+
+    def __init__(
+        self,
+        currency: str = "usd",
+        interval: float = 1.0,
+        reseed_interval: float = 60.0,
+        keepalive: float = 15.0,
+        max_listeners: int = 5000,
+    ):
+        self.currency = currency
+        self.interval = interval
+        self.reseed_interval = reseed_interval
+        self.keepalive = keepalive
+        self.max_listeners = max_listeners
+
+        self._lock = threading.Lock()
+        self._total_amount_cents = 0
+        self._count = 0
+        self._version = 0
+        self._published_version = -1
+        self._payload = {"total_amount_cents": 0, "count": 0, "currency": currency}
+        self._changed: Optional[asyncio.Event] = None
+        self._listeners = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def listeners(self) -> int:
+        return self._listeners
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total_amount_cents": self._total_amount_cents,
+                "count": self._count,
+                "currency": self.currency,
+            }
+
+    def record_gift(
+        self, amount_cents: int, currency: Optional[str] = "usd", count: int = 1
+    ) -> None:
+        """Add succeeded donations, or remove them with negative values; thread-safe"""
+        if (currency or "usd").lower() != self.currency:
+            return
+        with self._lock:
+            self._total_amount_cents += amount_cents
+            self._count += count
+            self._version += 1
+
+    def record_status_change(
+        self, db: Session, donation, previous_status: Optional[str]
+    ) -> None:
+        """Adjust the total for a donation entering or leaving ``succeeded``.
+
+        Call in the same transaction as the status update; the change is
+        applied when ``db`` commits, and dropped if it rolls back.
+        """
+        was_counted = previous_status == "succeeded"
+        is_counted = donation.status == "succeeded"
+        if was_counted == is_counted:
+            return
+        sign = 1 if is_counted else -1
+        db.info.setdefault(_PENDING_CHANGES, []).append(
+            (sign * donation.amount_cents, donation.currency, sign)
+        )
+
+    def _load(self) -> tuple[int, int]:
+        with SessionLocal() as db:
+            stats = donation_rollups.get_donation_stats(db, currency=self.currency, series_days=0)
+        return stats["total_amount_cents"], stats["total_count"]
+
+    async def reseed(self) -> None:
+        """Replace the in-memory total with the rollup totals"""
+        with self._lock:
+            version = self._version
+        total_amount_cents, count = await asyncio.to_thread(self._load)
+        with self._lock:
+            if self._version != version:
+                # A gift landed while we were reading; its commit may or may
+                # not be in what we read, so keep the local total until the
+                # next reseed rather than risk counting it twice
+                return
+            if (total_amount_cents, count) != (self._total_amount_cents, self._count):
+                self._total_amount_cents = total_amount_cents
+                self._count = count
+                self._version += 1
+
+    def _publish(self) -> None:
+        with self._lock:
+            if self._version == self._published_version:
+                return
+            self._published_version = self._version
+            self._payload = {
+                "total_amount_cents": self._total_amount_cents,
+                "count": self._count,
+                "currency": self.currency,
+            }
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def start(self) -> None:
+        self._changed = asyncio.Event()
+        try:
+            await self.reseed()
+        except Exception:
+            logger.exception("Could not seed campaign totals")
+        self._publish()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._changed:
+            # Wake every listener so open streams end promptly
+            self._changed.set()
+            self._changed = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_reseed = loop.time() + self.reseed_interval
+        while True:
+            await asyncio.sleep(self.interval)
+            if loop.time() >= next_reseed:
+                next_reseed = loop.time() + self.reseed_interval
+                try:
+                    await self.reseed()
+                except Exception:
+                    logger.exception("Could not reseed campaign totals")
+            self._publish()
+
+    def is_full(self) -> bool:
+        return self._listeners >= self.max_listeners
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Yield SSE messages for one listener until it disconnects"""
+        self._listeners += 1
+        try:
+            yield sse_message(self._payload, event="total", retry_ms=5000)
+            while self._changed is not None:
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), self.keepalive)
+                except TimeoutError:
+                    yield SSE_KEEPALIVE
+                    continue
+                if self._changed is None:
+                    return
+                yield sse_message(self._payload, event="total")
+        finally:
+            self._listeners -= 1
+
+
+campaign_totals = CampaignTotals(
+    currency=settings.CAMPAIGN_TOTALS_CURRENCY,
+    interval=settings.CAMPAIGN_TOTALS_PUSH_SECONDS,
+    reseed_interval=settings.CAMPAIGN_TOTALS_RESEED_SECONDS,
+    keepalive=settings.SSE_KEEPALIVE_SECONDS,
+    max_listeners=settings.CAMPAIGN_TOTALS_MAX_LISTENERS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session) -> None:
+    for amount_cents, currency, count in session.info.pop(_PENDING_CHANGES, ()):
+        campaign_totals.record_gift(amount_cents, currency, count)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_pending_changes(session: Session, transaction) -> None:
+    # Only left over when the outermost transaction rolled back
+    if transaction.parent is None:
+        session.info.pop(_PENDING_CHANGES, None)
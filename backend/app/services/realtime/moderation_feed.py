@@ -0,0 +1,267 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.gallery_photo import GalleryPhoto
+from app.models.moderation_event import ModerationEvent
+from app.services.realtime.sse import SSE_KEEPALIVE, sse_message
+from app.services.storage.s3_service import get_s3_service
+
+logger = logging.getLogger(__name__)
+
+# Gap ids wider than this are treated as rolled back rather than in flight
+MAX_TRACKED_GAP = 1000
+
+
+def _photo_payload(photo: GalleryPhoto) -> dict:
+    submitted_at = photo.submitted_at or datetime.utcnow()
+    return {
+        "id": photo.id,
+        "title": photo.title,
+        "description": photo.description,
+        "uploader_name": photo.uploader_name,
+        "uploader_email": photo.uploader_email,
+        "s3_key": photo.s3_key,
+        "approved": bool(photo.approved),
+        "submitted_at": submitted_at.isoformat(),
+    }
+
+
+def record_moderation_event(db: Session, photo: GalleryPhoto, action: str) -> None:
+    """Append a moderation queue change; committed with the photo change.
+
+    ``photo`` must already have an id (flush first for new photos).
+    """
+    db.add(
+        ModerationEvent(
+            photo_id=photo.id,
+            action=action,
+            payload=_photo_payload(photo) if action == "added" else None,
+        )
+    )
+
+
+def latest_event_id(db: Session) -> int:
+    return db.scalar(select(func.max(ModerationEvent.id))) or 0
+
+
+class ModerationFeed:
+    """Fans out moderation queue changes to admin SSE listeners.
+
+    Routes append a ``moderation_events`` row in the same transaction as the
+    photo change, so every worker sees the same ordered feed. Each worker
+    runs one poller that reads new rows by primary key while it has
+    listeners (woken immediately for changes made on this worker) and keeps
+    the most recent messages in a ring buffer that all of its listeners read
+    from; open admin tabs therefore add no queries. A listener resuming with
+    ``Last-Event-ID`` is replayed from the table. Ids skipped by a poll are
+    re-checked for ``gap_timeout`` seconds so that transactions committing
+    out of id order are still delivered. A listener that cannot be caught
+    up gets a ``reset`` event and should reload ``/admin/pending``.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 1.0,
+        buffer_size: int = 1000,
+        gap_timeout: float = 10.0,
+        retention_days: int = 7,
+        keepalive: float = 15.0,
+        max_listeners: int = 100,
+    ):
+        self.poll_interval = poll_interval
+        self.buffer_size = buffer_size
+        self.gap_timeout = gap_timeout
+        self.retention_days = retention_days
+        self.keepalive = keepalive
+        self.max_listeners = max_listeners
+
+        # (sequence, event id, message), sequence is local to this worker
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._last_id = 0
+        self._retained_floor = 0
+        self._gaps: dict[int, float] = {}
+        self._listeners = 0
+        self._changed: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._changed:
+            self._changed.set()
+            self._changed = None
+
+    def notify(self) -> None:
+        """Poll for new events now; safe to call from request threads"""
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def is_full(self) -> bool:
+        return self._listeners >= self.max_listeners
+
+    @staticmethod
+    def _to_message(event: ModerationEvent) -> str:
+        data = {"photo_id": event.photo_id}
+        if event.payload:
+            data["photo"] = dict(event.payload)
+            data["photo"]["url"] = get_s3_service().get_signed_url(event.payload["s3_key"]) or ""
+        return sse_message(data, event=event.action, id=str(event.id))
+
+    def _bounds(self) -> tuple[int, int]:
+        with SessionLocal() as db:
+            head, floor = db.execute(
+                select(func.max(ModerationEvent.id), func.min(ModerationEvent.id))
+            ).one()
+        return head or 0, floor or 0
+
+    def _head(self) -> int:
+        with SessionLocal() as db:
+            return latest_event_id(db)
+
+    def _fetch(self, after_id: int, gap_ids: list[int], limit: int) -> list[tuple[int, str]]:
+        condition = ModerationEvent.id > after_id
+        if gap_ids:
+            condition = condition | ModerationEvent.id.in_(gap_ids)
+        with SessionLocal() as db:
+            events = db.scalars(
+                select(ModerationEvent).where(condition).order_by(ModerationEvent.id).limit(limit)
+            ).all()
+            return [(event.id, self._to_message(event)) for event in events]
+
+    def _prune(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+        with SessionLocal() as db:
+            db.execute(delete(ModerationEvent).where(ModerationEvent.created_at < cutoff))
+            db.commit()
+            return db.scalar(select(func.min(ModerationEvent.id))) or 0
+
+    async def poll_once(self) -> int:
+        """Move new feed rows into the buffer; returns how many were read"""
+        now = self._loop.time()
+        self._gaps = {
+            event_id: deadline for event_id, deadline in self._gaps.items() if deadline > now
+        }
+        events = await asyncio.to_thread(
+            self._fetch, self._last_id, list(self._gaps), self.buffer_size
+        )
+        for event_id, message in events:
+            if event_id > self._last_id:
+                if event_id - self._last_id <= MAX_TRACKED_GAP:
+                    for missing in range(self._last_id + 1, event_id):
+                        self._gaps[missing] = now + self.gap_timeout
+                self._last_id = event_id
+            else:
+                self._gaps.pop(event_id, None)
+            self._seq += 1
+            self._buffer.append((self._seq, event_id, message))
+        if events:
+            changed, self._changed = self._changed, asyncio.Event()
+            changed.set()
+        return len(events)
+
+    async def _run(self) -> None:
+        self._last_id, self._retained_floor = await asyncio.to_thread(self._bounds)
+        next_prune = self._loop.time()
+        while True:
+            if self._listeners or self._gaps:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+            else:
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                while await self.poll_once() >= self.buffer_size:
+                    pass
+                if self._loop.time() >= next_prune:
+                    next_prune = self._loop.time() + 3600
+                    self._retained_floor = await asyncio.to_thread(self._prune)
+            except Exception:
+                logger.exception("Moderation feed poll failed")
+
+    def _reset_message(self) -> str:
+        return sse_message({"reason": "resync"}, event="reset", id=str(self._last_id))
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield SSE messages for one admin listener until it disconnects"""
+        self._listeners += 1
+        self.notify()
+        try:
+            seq = self._seq
+            seen: set[int] = set()
+            if last_event_id is None:
+                head = await asyncio.to_thread(self._head)
+                yield sse_message(
+                    {"last_event_id": head}, event="ready", id=str(head), retry_ms=5000
+                )
+            elif last_event_id < self._retained_floor - 1:
+                yield self._reset_message()
+            else:
+                replay = await asyncio.to_thread(
+                    self._fetch, last_event_id, [], self.buffer_size + 1
+                )
+                if len(replay) > self.buffer_size:
+                    yield self._reset_message()
+                else:
+                    yield sse_message(
+                        {"last_event_id": last_event_id}, event="ready", retry_ms=5000
+                    )
+                    for event_id, message in replay:
+                        seen.add(event_id)
+                        yield message
+
+            while self._changed is not None:
+                if self._buffer and self._buffer[0][0] > seq + 1:
+                    # Fell further behind than the buffer reaches
+                    seq = self._seq
+                    yield self._reset_message()
+                for entry_seq, event_id, message in list(self._buffer):
+                    if entry_seq <= seq:
+                        continue
+                    seq = entry_seq
+                    # The poller may reach replayed events only after several
+                    # passes; each id enters the buffer once, so forget it then
+                    if event_id in seen:
+                        seen.discard(event_id)
+                    else:
+                        yield message
+
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), self.keepalive)
+                except TimeoutError:
+                    yield SSE_KEEPALIVE
+        finally:
+            self._listeners -= 1
+
+
+moderation_feed = ModerationFeed(
+    poll_interval=settings.MODERATION_FEED_POLL_SECONDS,
+    buffer_size=settings.MODERATION_FEED_BUFFER_SIZE,
+    retention_days=settings.MODERATION_FEED_RETENTION_DAYS,
+    keepalive=settings.SSE_KEEPALIVE_SECONDS,
+    max_listeners=settings.MODERATION_FEED_MAX_LISTENERS,
+)
@@ -0,0 +1,26 @@
+import json
+from typing import Optional
+
+
+def sse_message(data, event: Optional[str] = None, id: Optional[str] = None,
+                retry_ms: Optional[int] = None) -> str:
+    """Format one Server-Sent Events message"""
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event:
+        lines.append(f"event: {event}")
+    if retry_ms is not None:
+        lines.append(f"retry: {retry_ms}")
+    payload = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"))
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+# Comment line that keeps idle connections open through proxies
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
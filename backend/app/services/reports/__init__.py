@@ -0,0 +1 @@
+# Report services
@@ -0,0 +1,254 @@
+import itertools
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from html import escape
+from pathlib import Path
+from string import Template
+from typing import Iterator, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.donation import Donation
+
+logger = logging.getLogger(__name__)
+
+TAX_ID_LINE = "Tax ID: [501(c)(3) Application Pending]"
+
+STATEMENT_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$year Giving Statement</title>
+<style>
+  body { font-family: Georgia, serif; color: #1b2a41; margin: 48px; }
+  h1 { font-size: 22px; margin-bottom: 4px; }
+  table { border-collapse: collapse; margin: 24px 0; width: 100%; }
+  th, td { border-bottom: 1px solid #d9d4c7; padding: 8px; text-align: left; }
+  .total { font-weight: bold; }
+</style>
+</head>
+<body>
+<h1>The Dorothy R. Morgan Foundation</h1>
+<p>$year Giving Statement</p>
+<p>Prepared for: $donor_name &lt;$donor_email&gt;<br>Issued: $issued</p>
+<table>
+<tr>
+<th>Currency</th><th>Gifts</th><th>Recurring</th><th>First gift</th><th>Last gift</th><th>Total</th>
+</tr>
+$rows
+</table>
+<p>No goods or services were provided in exchange for these contributions.</p>
+<p>Thank you for supporting families, healing, and youth programs in honor of Dorothy R. Morgan.
+From Loss to Light.</p>
+<p>$tax_id</p>
+</body>
+</html>
+""")
+
+ROW_TEMPLATE = Template(
+    "<tr><td>$currency</td><td>$count</td><td>$recurring</td>"
+    "<td>$first</td><td>$last</td><td class=\"total\">$total</td></tr>"
+)
+
+
+@dataclass
+class DonorStatement:
+    """Aggregated giving for one donor in one year, one line per currency"""
+
+    email: str
+    name: str
+    year: int
+    lines: list[dict]
+
+
+def _format_amount(cents: int, currency: str) -> str:
+    symbol = "$" if currency == "usd" else ""
+    return f"{symbol}{cents / 100:,.2f} {currency.upper()}"
+
+
+def _format_date(value) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime("%B %d, %Y")
+
+
+def statement_filename(statement: DonorStatement, extension: str) -> str:
+    safe_email = re.sub(r"[^a-z0-9._-]", "_", statement.email)
+    return f"{statement.year}/{safe_email}.{extension}"
+
+
+def render_statement_html(statement: DonorStatement) -> str:
+    rows = "\n".join(
+        ROW_TEMPLATE.substitute(
+            currency=line["currency"].upper(),
+            count=line["count"],
+            recurring=_format_amount(line["recurring_cents"], line["currency"]),
+            first=_format_date(line["first_gift_at"]),
+            last=_format_date(line["last_gift_at"]),
+            total=_format_amount(line["total_cents"], line["currency"]),
+        )
+        for line in statement.lines
+    )
+    return STATEMENT_TEMPLATE.substitute(
+        year=statement.year,
+        donor_name=escape(statement.name or "Friend of the Foundation"),
+        donor_email=escape(statement.email),
+        issued=datetime.now().strftime("%B %d, %Y"),
+        rows=rows,
+        tax_id=TAX_ID_LINE,
+    )
+
+
+def render_chunk(
+    statements: list[DonorStatement], output_format: str
+) -> list[tuple[DonorStatement, str, bytes]]:
+    """Render a chunk of statements; runs inside a worker process"""
+    if output_format == "pdf":
+        try:
+            from weasyprint import HTML
+        except ImportError as e:
+            raise RuntimeError("PDF statements require the weasyprint package") from e
+
+    rendered = []
+    for statement in statements:
+        html = render_statement_html(statement)
+        if output_format == "pdf":
+            content = HTML(string=html).write_pdf()
+        else:
+            content = html.encode("utf-8")
+        rendered.append((statement, html, content))
+    return rendered
+
+
+def iter_donor_statements(
+    db: Session, year: int, batch_size: int = 1000
+) -> Iterator[DonorStatement]:
+    """Stream per-donor aggregates for a calendar year from one grouped query.
+
+    Rows are grouped by canonical (trimmed, lower-cased) email and currency,
+    ordered by email and fetched ``batch_size`` at a time with a server-side
+    cursor where the driver supports one, so memory stays flat no matter how
+    many donations the year holds.
+    """
+    email = func.lower(func.trim(Donation.donor_email)).label("email")
+    query = (
+        select(
+            email,
+            Donation.currency,
+            func.max(Donation.donor_name).label("name"),
+            func.count(Donation.id).label("count"),
+            func.sum(Donation.amount_cents).label("total_cents"),
+            func.sum(
+                case((Donation.is_recurring == True, Donation.amount_cents), else_=0)  # noqa: E712
+            ).label("recurring_cents"),
+            func.min(Donation.created_at).label("first_gift_at"),
+            func.max(Donation.created_at).label("last_gift_at"),
+        )
+        .where(
+            Donation.status == "succeeded",
+            Donation.donor_email != None,  # noqa: E711
+            Donation.created_at >= datetime(year, 1, 1),
+            Donation.created_at < datetime(year + 1, 1, 1),
+        )
+        .group_by(email, Donation.currency)
+        .order_by(email, Donation.currency)
+        .execution_options(yield_per=batch_size)
+    )
+    rows = db.execute(query)
+    for donor_email, group in itertools.groupby(rows, key=lambda row: row.email):
+        lines = [row._asdict() for row in group]
+        name = next((line["name"] for line in lines if line["name"]), "")
+        yield DonorStatement(email=donor_email, name=name, year=year, lines=lines)
+
+
+class LocalStatementWriter:
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def write(self, filename: str, content: bytes, content_type: str) -> str:
+        path = self.directory / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return str(path)
+
+
+class S3StatementWriter:
+    def __init__(self, prefix: str = "statements"):
+        from app.services.storage.s3_service import get_s3_service
+
+        self.s3_service = get_s3_service()
+        self.prefix = prefix.strip("/")
+
+    def write(self, filename: str, content: bytes, content_type: str) -> str:
+        key = f"{self.prefix}/{filename}"
+        if not self.s3_service.upload_file(content, key, content_type):
+            raise RuntimeError(f"Failed to upload {key}")
+        return key
+
+
+def generate_statements(
+    db: Session,
+    year: int,
+    writer,
+    output_format: str = "html",
+    email: bool = False,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+) -> int:
+    """Render and store every donor's statement for ``year``.
+
+    Donor aggregates are streamed from the database, rendered ``chunk_size``
+    at a time in a process pool and written as chunks complete. At most two
+    chunks per worker are in flight, which bounds memory regardless of the
+    number of donors. With ``email`` set, the HTML statements are queued in
+    the email outbox on the streaming session, flushed per chunk and
+    committed once at the end, so either every donor is queued or none is.
+    Returns the number of statements written.
+    """
+    from app.services.webhooks.email_service import email_service
+
+    workers = workers or os.cpu_count() or 1
+    extension = "pdf" if output_format == "pdf" else "html"
+    content_type = "application/pdf" if output_format == "pdf" else "text/html"
+    written = 0
+
+    def collect(future: Future) -> None:
+        nonlocal written
+        for statement, html, content in future.result():
+            writer.write(statement_filename(statement, extension), content, content_type)
+            if email:
+                email_service.queue_email(
+                    db,
+                    statement.email,
+                    f"Your {year} Giving Statement",
+                    f"Your {year} giving statement from The Dorothy R. Morgan Foundation "
+                    "is below. Thank you for your support.",
+                    html,
+                )
+            written += 1
+        if email:
+            db.flush()
+            db.expunge_all()
+        logger.info("Wrote %d giving statements for %d", written, year)
+
+    statements = iter_donor_statements(db, year)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: set[Future] = set()
+        while True:
+            chunk = list(itertools.islice(statements, chunk_size))
+            if chunk:
+                pending.add(executor.submit(render_chunk, chunk, output_format))
+            if pending and (len(pending) >= workers * 2 or not chunk):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            if not chunk and not pending:
+                break
+    if email:
+        db.commit()
+    return written
@@ -0,0 +1,9 @@
+from .schedules import Cron, Interval
+from .scheduler import Scheduler, scheduler
+
+__all__ = [
+    "Cron",
+    "Interval",
+    "Scheduler",
+    "scheduler",
+]
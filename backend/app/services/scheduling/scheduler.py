@@ -0,0 +1,357 @@
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable, Optional, Union
+
+from sqlalchemy import case, delete, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import SCHEDULER_JOB_DURATION, SCHEDULER_LEADER
+from app.models.job_run import JobRun
+from app.models.scheduled_job import ScheduledJob
+from app.models.scheduler_lease import SchedulerLease
+from app.services.scheduling.schedules import Cron, Interval
+
+logger = logging.getLogger(__name__)
+
+Schedule = Union[Interval, Cron]
+
+
+class Job:
+    def __init__(self, name: str, fn: Callable[[], Any], schedule: Schedule):
+        self.name = name
+        self.fn = fn
+        self.schedule = schedule
+
+
+class Scheduler:
+    """Runs periodic jobs in one worker of the whole deployment.
+
+    Every worker runs the scheduler loop, but only the holder of the
+    ``scheduler_leases`` row runs jobs. The leader renews its lease every
+    ``tick`` seconds; when it stops (or dies) the lease runs out and the
+    next worker to tick takes over. A job run is claimed by moving its
+    ``scheduled_jobs.next_run_at`` on, in an UPDATE that only matches while
+    the claimer still holds the lease, so a leader that lost its lease
+    without noticing cannot start a run its successor also starts.
+
+    Jobs are plain functions, run in a thread (coroutine functions are
+    awaited), returning an optional JSON-able summary. Each run is recorded
+    in ``job_runs`` with its duration and result or error. A job is never
+    run twice at once; one still running when it is next due runs again as
+    soon as it finishes. Runs cut short by a shutdown, or by the leader
+    dying, are recorded as interrupted.
+    """
+
+    def __init__(self, name: str = "scheduler", lease: float = 30.0, tick: float = 5.0):
+        self.name = name
+        self.lease = lease
+        self.tick = tick
+        self.jobs: dict[str, Job] = {}
+        self.holder: Optional[str] = None
+        self.is_leader = False
+
+        self._task: Optional[asyncio.Task] = None
+        self._running: dict[str, asyncio.Task] = {}
+
+    def add(self, name: str, fn: Callable[[], Any], schedule: Schedule) -> None:
+        self.jobs[name] = Job(name, fn, schedule)
+
+    def start(self, enabled: bool = True) -> None:
+        if not enabled:
+            return
+        # Set here rather than in __init__, so forked workers each get their own
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(3)}"
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+        if self.is_leader:
+            # Hand over now rather than when the lease runs out
+            await asyncio.to_thread(self._release)
+            logger.info("Scheduler lease released by %s", self.holder)
+            self.is_leader = False
+            SCHEDULER_LEADER.set(0)
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader != self.is_leader:
+            if leader:
+                logger.info("Scheduler leader is now %s", self.holder)
+            else:
+                logger.warning("Scheduler leadership lost by %s", self.holder)
+        self.is_leader = leader
+        SCHEDULER_LEADER.set(1 if leader else 0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                leader = await asyncio.to_thread(self._acquire)
+                if leader and not self.is_leader:
+                    await asyncio.to_thread(self._take_over)
+                self._set_leader(leader)
+                if leader:
+                    for name, run_id in await asyncio.to_thread(self._claim_due):
+                        task = asyncio.create_task(self._execute(self.jobs[name], run_id))
+                        self._running[name] = task
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            await asyncio.sleep(self.tick)
+
+    def _holds_lease(self, now: datetime):
+        return exists().where(
+            SchedulerLease.name == self.name,
+            SchedulerLease.holder == self.holder,
+            SchedulerLease.expires_at > now,
+        )
+
+    def _acquire(self) -> bool:
+        """Take or renew the lease; True if this worker holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease)
+        with SessionLocal() as db:
+            taken = db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now),
+                )
+                .values(
+                    holder=self.holder,
+                    acquired_at=case(
+                        (SchedulerLease.holder == self.holder, SchedulerLease.acquired_at),
+                        else_=now,
+                    ),
+                    expires_at=expires_at,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not taken:
+                if db.get(SchedulerLease, self.name) is not None:
+                    return False
+                db.add(SchedulerLease(
+                    name=self.name, holder=self.holder, acquired_at=now, expires_at=expires_at
+                ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker created the lease first
+                return False
+            return True
+
+    def _release(self) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def _take_over(self) -> None:
+        """Tidy up after the previous leader and register this deploy's jobs"""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            interrupted = db.execute(
+                update(JobRun)
+                .where(JobRun.status == "running", JobRun.holder != self.holder)
+                .values(status="interrupted", finished_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if interrupted:
+                logger.warning(
+                    "Marked %d runs of the previous scheduler leader interrupted", interrupted
+                )
+            known = {row.name: row for row in db.scalars(select(ScheduledJob))}
+            for job in self.jobs.values():
+                row = known.get(job.name)
+                schedule = str(job.schedule)
+                if row is None:
+                    row = ScheduledJob(name=job.name)
+                    db.add(row)
+                elif row.schedule == schedule:
+                    continue
+                row.schedule = schedule
+                row.next_run_at = job.schedule.first_run(now)
+            db.commit()
+
+    def _claim_due(self) -> list[tuple[str, int]]:
+        """Claim every due job that is not already running here; returns (name, run id) pairs"""
+        now = datetime.utcnow()
+        idle = [name for name in self.jobs if name not in self._running]
+        if not idle:
+            return []
+        claimed = []
+        with SessionLocal() as db:
+            due = db.scalars(
+                select(ScheduledJob.name)
+                .where(ScheduledJob.name.in_(idle), ScheduledJob.next_run_at <= now)
+            ).all()
+            for name in due:
+                won = db.execute(
+                    update(ScheduledJob)
+                    .where(
+                        ScheduledJob.name == name,
+                        ScheduledJob.next_run_at <= now,
+                        self._holds_lease(now),
+                    )
+                    .values(next_run_at=self.jobs[name].schedule.next_run(now))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not won:
+                    continue
+                run = JobRun(job_name=name, status="running", holder=self.holder, started_at=now)
+                db.add(run)
+                db.flush()
+                claimed.append((name, run.id))
+            db.commit()
+        return claimed
+
+    def _finish(
+        self, run_id: int, status: str, duration: float, result: Any, error: Optional[str]
+    ) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(JobRun)
+                .where(JobRun.id == run_id)
+                .values(
+                    status=status,
+                    finished_at=datetime.utcnow(),
+                    duration_ms=round(duration * 1000, 1),
+                    result=result,
+                    error=error,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    async def _execute(self, job: Job, run_id: int) -> None:
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            if asyncio.iscoroutinefunction(job.fn):
+                result = await job.fn()
+            else:
+                result = await asyncio.to_thread(job.fn)
+            status = "succeeded"
+        except asyncio.CancelledError:
+            status, error = "interrupted", "Scheduler stopped"
+        except Exception as e:
+            logger.exception("Scheduled job %s failed", job.name)
+            status, error = "failed", f"{type(e).__name__}: {e}"
+        finally:
+            self._running.pop(job.name, None)
+        duration = time.perf_counter() - started
+        SCHEDULER_JOB_DURATION.labels(job.name, status).observe(duration)
+        if status == "succeeded":
+            logger.info(
+                "Scheduled job %s done in %.1fs", job.name, duration, extra={"job_result": result}
+            )
+        try:
+            await asyncio.to_thread(self._finish, run_id, status, duration, result, error)
+        except Exception:
+            logger.exception("Could not record run %s of %s", run_id, job.name)
+
+    def trigger(self, db: Session, name: str) -> bool:
+        """Make a job due now, for the leader's next tick; False if there is no such job"""
+        if name not in self.jobs:
+            return False
+        now = datetime.utcnow()
+        updated = db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.name == name)
+            .values(next_run_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            job = self.jobs[name]
+            db.add(ScheduledJob(name=name, schedule=str(job.schedule), next_run_at=now))
+        db.commit()
+        return True
+
+    def status(self, db: Session) -> dict:
+        """The leader, and each job's schedule, next run and latest run"""
+        now = datetime.utcnow()
+        lease = db.get(SchedulerLease, self.name)
+        rows = {row.name: row for row in db.scalars(select(ScheduledJob))}
+        latest = (
+            select(func.max(JobRun.id))
+            .where(JobRun.job_name.in_(list(self.jobs)))
+            .group_by(JobRun.job_name)
+        )
+        last_runs = {
+            run.job_name: run for run in db.scalars(select(JobRun).where(JobRun.id.in_(latest)))
+        }
+        jobs = []
+        for job in self.jobs.values():
+            last_run = last_runs.get(job.name)
+            row = rows.get(job.name)
+            jobs.append({
+                "name": job.name,
+                "schedule": str(job.schedule),
+                "next_run_at": row.next_run_at if row else None,
+                "last_run": _run_dict(last_run) if last_run else None,
+            })
+        leader = lease.holder if lease and _naive_utc(lease.expires_at) > now else None
+        return {
+            "leader": leader,
+            "lease_expires_at": lease.expires_at if leader else None,
+            "worker": self.holder,
+            "jobs": jobs,
+        }
+
+    def history(self, db: Session, name: str, limit: int = 20) -> list[dict]:
+        runs = db.scalars(
+            select(JobRun)
+            .where(JobRun.job_name == name)
+            .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+            .limit(limit)
+        ).all()
+        return [_run_dict(run) for run in runs]
+
+    def prune_history(self, db: Session, retention_days: float) -> int:
+        """Delete finished runs older than ``retention_days``; returns how many"""
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = db.execute(
+            delete(JobRun).where(JobRun.started_at < cutoff, JobRun.status != "running")
+        ).rowcount
+        db.commit()
+        return deleted
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(UTC).replace(tzinfo=None)
+    return moment
+
+
+def _run_dict(run: JobRun) -> dict:
+    return {
+        "id": run.id,
+        "status": run.status,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "duration_ms": run.duration_ms,
+        "result": run.result,
+        "error": run.error,
+        "worker": run.holder,
+    }
+
+
+scheduler = Scheduler(lease=settings.SCHEDULER_LEASE_SECONDS, tick=settings.SCHEDULER_TICK_SECONDS)
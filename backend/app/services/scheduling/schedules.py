@@ -0,0 +1,107 @@
+import random
+from datetime import datetime, timedelta
+
+# (lowest, highest) value of each cron field
+_CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+class Interval:
+    """Every ``seconds`` seconds from the start of the previous run.
+
+    Each run is pushed back by up to ``jitter`` seconds, so that jobs with
+    the same interval drift apart instead of always starting together.
+    """
+
+    def __init__(self, seconds: float, jitter: float = 0.0):
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def first_run(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def next_run(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.seconds + random.uniform(0, self.jitter))
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _parse_cron_field(text: str, lowest: int, highest: int) -> set[int]:
+    values = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = lowest, highest
+        elif "-" in span:
+            start, end = (int(value) for value in span.split("-", 1))
+        else:
+            start = end = int(span)
+            if step:
+                end = highest
+        if not lowest <= start <= end <= highest:
+            raise ValueError(f"{part!r} is outside {lowest}-{highest}")
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class Cron:
+    """A five-field cron expression (minute hour day month weekday), in UTC.
+
+    Fields take ``*``, numbers, ranges, lists and ``/step``; weekdays are
+    0-7 with both 0 and 7 Sunday. As in cron, when both day of month and
+    weekday are restricted a day matching either one matches. Runs are
+    pushed back by up to ``jitter`` seconds.
+    """
+
+    def __init__(self, expression: str, jitter: float = 0.0):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression {expression!r}, expected 5 fields")
+        self.expression = expression
+        self.jitter = jitter
+        try:
+            self.minutes, self.hours, self.days, self.months, weekdays = (
+                _parse_cron_field(field, lowest, highest)
+                for field, (lowest, highest) in zip(fields, _CRON_FIELDS)
+            )
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from None
+        self.weekdays = {day % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute after ``moment``"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Every expression matches within four years (29 February)
+        limit = candidate + timedelta(days=4 * 366)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month = candidate.month % 12 + 1
+                year = candidate.year + (candidate.month == 12)
+                candidate = candidate.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+    def first_run(self, now: datetime) -> datetime:
+        return self.next_run(now)
+
+    def next_run(self, now: datetime) -> datetime:
+        return self.next_after(now) + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def __str__(self) -> str:
+        return f"cron {self.expression}"
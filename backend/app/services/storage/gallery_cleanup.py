@@ -0,0 +1,38 @@
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.gallery_photo import GalleryPhoto
+from app.services.storage.s3_service import get_s3_service
+
+logger = logging.getLogger(__name__)
+
+GALLERY_PREFIX = "gallery/"
+
+
+def delete_orphaned_uploads(db: Session, min_age_hours: float, batch_size: int = 500) -> dict:
+    """Delete gallery uploads that no photo refers to.
+
+    Run by the scheduler. A submission uploads the file before its row is
+    committed, so a failed insert leaves the object behind, as does a photo
+    deleted while S3 was unreachable. Objects younger than
+    ``min_age_hours`` are left alone, so a submission in progress is never
+    touched.
+    """
+    s3 = get_s3_service()
+    cutoff = datetime.now(UTC) - timedelta(hours=min_age_hours)
+    keys = s3.list_keys(GALLERY_PREFIX, modified_before=cutoff)
+    orphans = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        known = set(db.scalars(select(GalleryPhoto.s3_key).where(GalleryPhoto.s3_key.in_(batch))))
+        orphans.extend(key for key in batch if key not in known)
+    deleted = 0
+    for key in orphans:
+        if s3.delete_file(key):
+            deleted += 1
+    if orphans:
+        logger.info("Deleted %d of %d orphaned gallery uploads", deleted, len(orphans))
+    return {"checked": len(keys), "orphaned": len(orphans), "deleted": deleted}
@@ -1,38 +1,70 @@
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
+import logging
+from datetime import datetime
+from functools import cache
 from typing import Optional
+
 from app.core.config import settings
+from app.core.resilience import dependency
+
+logger = logging.getLogger(__name__)
+
+
+def _is_s3_failure(e: BaseException) -> bool:
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+    if isinstance(e, ClientError):
+        status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return status >= 500 or status == 429
+    return isinstance(e, (ConnectionError, HTTPClientError))
+
+
+s3_api = dependency("s3", settings.S3_TIMEOUT_SECONDS, _is_s3_failure)
 
 
 class S3Service:
     def __init__(self):
+        import boto3
+        from botocore.client import Config
+
         self.s3_client = boto3.client(
             's3',
             endpoint_url=settings.S3_ENDPOINT,
             aws_access_key_id=settings.S3_ACCESS_KEY_ID,
             aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
             region_name=settings.S3_REGION,
-            config=Config(signature_version='s3v4')
+            config=Config(
+                signature_version='s3v4',
+                connect_timeout=settings.S3_TIMEOUT_SECONDS,
+                read_timeout=settings.S3_TIMEOUT_SECONDS,
+                # Retries are s3_api's
+                retries={'mode': 'standard', 'total_max_attempts': 1},
+            )
         )
         self.bucket = settings.S3_BUCKET
 
     def upload_file(self, file_content: bytes, key: str, content_type: str) -> bool:
         """Upload file to S3"""
+        from botocore.exceptions import ClientError
+
         try:
-            self.s3_client.put_object(
+            s3_api.call(
+                "put_object",
+                self.s3_client.put_object,
                 Bucket=self.bucket,
                 Key=key,
                 Body=file_content,
-                ContentType=content_type
+                ContentType=content_type,
+                idempotent=True,
             )
             return True
         except ClientError as e:
-            print(f"Error uploading file: {e}")
+            logger.error("Error uploading file %s: %s", key, e)
             return False
 
     def get_signed_url(self, key: str, expiration: int = 3600) -> Optional[str]:
         """Generate a signed URL for accessing a file"""
+        from botocore.exceptions import ClientError
+
         try:
             url = self.s3_client.generate_presigned_url(
                 'get_object',
@@ -41,18 +73,50 @@ class S3Service:
             )
             return url
         except ClientError as e:
-            print(f"Error generating signed URL: {e}")
+            logger.error("Error generating signed URL for %s: %s", key, e)
             return None
 
+    def list_keys(self, prefix: str, modified_before: datetime) -> list[str]:
+        """Keys under ``prefix`` last modified before ``modified_before`` (aware, UTC)"""
+        keys = []
+        kwargs = {"Bucket": self.bucket, "Prefix": prefix}
+        while True:
+            page = s3_api.call(
+                "list_objects", self.s3_client.list_objects_v2, **kwargs, idempotent=True
+            )
+            keys.extend(
+                item["Key"]
+                for item in page.get("Contents", [])
+                if item["LastModified"] < modified_before
+            )
+            if not page.get("IsTruncated"):
+                return keys
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
     def delete_file(self, key: str) -> bool:
         """Delete file from S3"""
+        from botocore.exceptions import ClientError
+
         try:
-            self.s3_client.delete_object(Bucket=self.bucket, Key=key)
+            s3_api.call(
+                "delete_object",
+                self.s3_client.delete_object,
+                Bucket=self.bucket,
+                Key=key,
+                idempotent=True,
+            )
             return True
         except ClientError as e:
-            print(f"Error deleting file: {e}")
+            logger.error("Error deleting file %s: %s", key, e)
             return False
 
 
-s3_service = S3Service()
+@cache
+def get_s3_service() -> S3Service:
+    """The shared S3 service, built on first use.
+
+    Importing boto3 and creating a client takes a noticeable fraction of a
+    second, which every worker, script and migration paid at import time.
+    """
+    return S3Service()
 
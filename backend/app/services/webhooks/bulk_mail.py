@@ -0,0 +1,441 @@
+import asyncio
+import logging
+import secrets
+import time
+from datetime import UTC, datetime, timedelta
+from string import Template
+from typing import Optional
+
+from sqlalchemy import exists, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.bulk_mail_recipient import BulkMailRecipient
+from app.models.bulk_mailing import BulkMailing
+from app.models.email_outbox import EmailOutbox
+from app.models.event import Event
+from app.models.rsvp import RSVP
+from app.services.webhooks.email_service import create_smtp_pool, email_service
+
+logger = logging.getLogger(__name__)
+
+# Placeholders available to templates: $name, $email, $event_title,
+# $event_date, $event_location, $event_url
+DEFAULT_TEMPLATES = {
+    "reminder": {
+        "subject": "Reminder: $event_title is coming up",
+        "body": """
+Hi $name,
+
+This is a friendly reminder that $event_title starts on $event_date.
+
+Location: $event_location
+Details: $event_url
+
+We look forward to seeing you there.
+
+From Loss to Light.
+
+The Dorothy R. Morgan Foundation
+""",
+    },
+    "confirmation": {
+        "subject": "You're registered for $event_title",
+        "body": """
+Hi $name,
+
+Thank you for your RSVP. You're registered for $event_title on $event_date.
+
+Location: $event_location
+Details: $event_url
+
+From Loss to Light.
+
+The Dorothy R. Morgan Foundation
+""",
+    },
+}
+
+
+class _RateLimiter:
+    """Token bucket that spaces sends to at most ``rate`` per second"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(self._next, now) + 1 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _event_context(event: Event) -> dict[str, str]:
+    return {
+        "event_title": event.title,
+        "event_date": event.start_at.strftime("%B %d, %Y at %I:%M %p"),
+        "event_location": event.location or "TBA",
+        "event_url": f"{settings.SITE_URL}/events/{event.id}",
+    }
+
+
+class _CompiledMailing:
+    """A mailing's templates, parsed once and rendered per recipient"""
+
+    def __init__(self, mailing: BulkMailing, event: Event):
+        self.subject = Template(mailing.subject_template)
+        self.body = Template(mailing.body_template)
+        self.html = Template(mailing.html_template) if mailing.html_template else None
+        self.context = _event_context(event)
+
+    def render(self, name: str, email: str) -> tuple[str, str, Optional[str]]:
+        values = {**self.context, "name": name, "email": email}
+        return (
+            self.subject.safe_substitute(values),
+            self.body.safe_substitute(values),
+            self.html.safe_substitute(values) if self.html else None,
+        )
+
+
+class BulkMailRunner:
+    """Background task that sends due bulk mailings to an event's RSVPs.
+
+    A mailing is claimed with a lease so that only one worker sends it at a
+    time. Recipients are streamed from ``rsvps`` in keyset-paginated chunks;
+    after each chunk the per-recipient results and the ``last_rsvp_id``
+    checkpoint are committed together, so a crashed run resumes from the
+    last finished chunk once the lease expires. The lease is renewed while
+    a chunk is being sent; a worker that fails to renew it stops sending
+    at once, and every write is fenced by the claim's ``lease_token``, so
+    it cannot record over its successor either. Addresses already recorded
+    for the mailing are never mailed twice. A mailing whose event has been
+    deleted is marked failed.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 2,
+        rate_per_second: float = 5.0,
+        chunk_size: int = 100,
+        poll_interval: float = 30.0,
+        lease: float = 300.0,
+    ):
+        self.rate_per_second = rate_per_second
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.pool = create_smtp_pool(pool_size)
+
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pool.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                ran = await self.run_due_mailing()
+            except Exception:
+                logger.exception("Bulk mail run failed")
+                ran = False
+            if not ran:
+                await asyncio.sleep(self.poll_interval)
+
+    def _claim(self) -> Optional[tuple[int, str, _CompiledMailing]]:
+        """Claim the next due mailing; those whose event was deleted are marked failed"""
+        while True:
+            now = datetime.utcnow()
+            token = secrets.token_hex(8)
+            with SessionLocal() as db:
+                due = (
+                    select(BulkMailing.id)
+                    .where(
+                        BulkMailing.status.in_(("scheduled", "running")),
+                        BulkMailing.scheduled_at <= now,
+                        (BulkMailing.lease_expires_at == None)  # noqa: E711
+                        | (BulkMailing.lease_expires_at < now),
+                    )
+                    .order_by(BulkMailing.scheduled_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                mailing = db.scalars(
+                    update(BulkMailing)
+                    .where(BulkMailing.id.in_(due.scalar_subquery()))
+                    .values(
+                        status="running",
+                        lease_expires_at=now + timedelta(seconds=self.lease),
+                        lease_token=token,
+                    )
+                    .returning(BulkMailing)
+                    .execution_options(synchronize_session=False)
+                ).first()
+                if mailing is None:
+                    return None
+                if mailing.started_at is None:
+                    mailing.started_at = now
+                event = db.get(Event, mailing.event_id)
+                if event is None:
+                    logger.error(
+                        "Bulk mailing %s failed: event %s no longer exists",
+                        mailing.id,
+                        mailing.event_id,
+                    )
+                    mailing.status = "failed"
+                    mailing.finished_at = now
+                    mailing.lease_expires_at = None
+                    db.commit()
+                    continue
+                compiled = _CompiledMailing(mailing, event)
+                mailing_id = mailing.id
+                db.commit()
+                return mailing_id, token, compiled
+
+    def _next_chunk(self, mailing_id: int) -> tuple[list[tuple[int, str, str]], int]:
+        """Return the next recipients to mail and the RSVP id the chunk ends at"""
+        with SessionLocal() as db:
+            mailing = db.get(BulkMailing, mailing_id)
+            last_rsvp_id = mailing.last_rsvp_id
+            while True:
+                rsvps = db.execute(
+                    select(RSVP.id, RSVP.name, RSVP.email)
+                    .where(RSVP.event_id == mailing.event_id, RSVP.id > last_rsvp_id)
+                    .order_by(RSVP.id)
+                    .limit(self.chunk_size)
+                ).all()
+                if not rsvps:
+                    return [], last_rsvp_id
+                last_rsvp_id = rsvps[-1].id
+
+                seen = set(
+                    db.scalars(
+                        select(BulkMailRecipient.email).where(
+                            BulkMailRecipient.mailing_id == mailing_id,
+                            BulkMailRecipient.email.in_({r.email.lower() for r in rsvps}),
+                        )
+                    )
+                )
+                chunk = []
+                for rsvp_id, name, email in rsvps:
+                    email = email.lower()
+                    if email not in seen:
+                        seen.add(email)
+                        chunk.append((rsvp_id, name, email))
+                if chunk:
+                    return chunk, last_rsvp_id
+
+    def _renew(self, mailing_id: int, token: str) -> bool:
+        """Extend the lease; returns False if another worker has taken the mailing"""
+        with SessionLocal() as db:
+            updated = db.execute(
+                update(BulkMailing)
+                .where(BulkMailing.id == mailing_id, BulkMailing.lease_token == token)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease))
+            ).rowcount
+            db.commit()
+            return bool(updated)
+
+    async def _keep_lease(self, mailing_id: int, token: str) -> None:
+        """Renew the lease until cancelled; returns when it has been lost"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            if not await asyncio.to_thread(self._renew, mailing_id, token):
+                logger.warning("Lost the lease on bulk mailing %s", mailing_id)
+                return
+
+    def _checkpoint(
+        self,
+        mailing_id: int,
+        token: str,
+        last_rsvp_id: int,
+        results: list[tuple[int, str, Optional[str]]],
+    ) -> bool:
+        """Record a finished chunk; returns False if the mailing was canceled or taken over"""
+        now = datetime.utcnow()
+        sent = sum(1 for _, _, error in results if error is None)
+        with SessionLocal() as db:
+            status = db.scalar(
+                update(BulkMailing)
+                .where(BulkMailing.id == mailing_id, BulkMailing.lease_token == token)
+                .values(
+                    last_rsvp_id=last_rsvp_id,
+                    sent_count=BulkMailing.sent_count + sent,
+                    failed_count=BulkMailing.failed_count + len(results) - sent,
+                    lease_expires_at=now + timedelta(seconds=self.lease),
+                )
+                .returning(BulkMailing.status)
+            )
+            if status is None:
+                # The lease ran out and another worker resumed from the last checkpoint
+                logger.warning(
+                    "Bulk mailing %s was taken over; dropping results of %d sends",
+                    mailing_id,
+                    len(results),
+                )
+                return False
+            db.add_all(
+                BulkMailRecipient(
+                    mailing_id=mailing_id,
+                    rsvp_id=rsvp_id,
+                    email=email,
+                    status="sent" if error is None else "failed",
+                    error=error,
+                    sent_at=now if error is None else None,
+                )
+                for rsvp_id, email, error in results
+            )
+            db.commit()
+            return status == "running"
+
+    def _finish(self, mailing_id: int, token: str) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(BulkMailing)
+                .where(
+                    BulkMailing.id == mailing_id,
+                    BulkMailing.status == "running",
+                    BulkMailing.lease_token == token,
+                )
+                .values(
+                    status="completed",
+                    finished_at=datetime.utcnow(),
+                    lease_expires_at=None,
+                )
+            )
+            db.commit()
+
+    async def _send(
+        self, limiter: _RateLimiter, compiled: _CompiledMailing, rsvp_id: int, name: str, email: str
+    ) -> tuple[int, str, Optional[str]]:
+        await limiter.acquire()
+        subject, body, html_body = compiled.render(name, email)
+        try:
+            await self.pool.send_message(
+                email_service.build_message(email, subject, body, html_body)
+            )
+            return rsvp_id, email, None
+        except Exception as e:
+            return rsvp_id, email, f"{type(e).__name__}: {e}"
+
+    async def run_due_mailing(self) -> bool:
+        """Send the next due mailing to completion; returns False if none was due"""
+        claimed = await asyncio.to_thread(self._claim)
+        if claimed is None:
+            return False
+        mailing_id, token, compiled = claimed
+        limiter = _RateLimiter(self.rate_per_second)
+        logger.info("Sending bulk mailing %s", mailing_id)
+
+        while True:
+            chunk, last_rsvp_id = await asyncio.to_thread(self._next_chunk, mailing_id)
+            if not chunk:
+                await asyncio.to_thread(self._finish, mailing_id, token)
+                logger.info("Bulk mailing %s completed", mailing_id)
+                return True
+            sends = asyncio.gather(
+                *(self._send(limiter, compiled, *recipient) for recipient in chunk)
+            )
+            keep_lease = asyncio.create_task(self._keep_lease(mailing_id, token))
+            try:
+                done, _ = await asyncio.wait(
+                    (sends, keep_lease), return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                keep_lease.cancel()
+                if not sends.done():
+                    sends.cancel()
+                    await asyncio.gather(sends, return_exceptions=True)
+            if sends not in done:
+                # Whoever holds the lease now resumes from the last checkpoint
+                logger.warning("Stopped sending bulk mailing %s after losing its lease", mailing_id)
+                return True
+            results = sends.result()
+            recorded = await asyncio.to_thread(
+                self._checkpoint, mailing_id, token, last_rsvp_id, results
+            )
+            if not recorded:
+                logger.info("Bulk mailing %s was canceled or taken over", mailing_id)
+                return True
+
+
+def queue_rsvp_confirmation(db: Session, event: Event, name: str, email: str) -> EmailOutbox:
+    """Queue the confirmation for a single RSVP as part of the caller's transaction"""
+    template = DEFAULT_TEMPLATES["confirmation"]
+    values = {**_event_context(event), "name": name, "email": email}
+    return email_service.queue_email(
+        db,
+        email,
+        Template(template["subject"]).safe_substitute(values),
+        Template(template["body"]).safe_substitute(values),
+    )
+
+
+def default_scheduled_at(event: Event, hours_before_start: Optional[float] = None) -> datetime:
+    """When to send a mailing for an event if no explicit time is given"""
+    if hours_before_start is None:
+        hours_before_start = settings.BULK_MAIL_REMINDER_LEAD_HOURS
+    start_at = event.start_at
+    if start_at.tzinfo is not None:
+        start_at = start_at.astimezone(UTC).replace(tzinfo=None)
+    return max(datetime.utcnow(), start_at - timedelta(hours=hours_before_start))
+
+
+def schedule_event_reminders(db: Session, lead_hours: Optional[float] = None) -> int:
+    """Schedule the default reminder for events starting within a day of the lead time.
+
+    Run by the scheduler, so admins no longer have to remember to. Events
+    with an external registration page, without RSVPs yet, or that already
+    have a reminder (even a canceled one: an admin decided) are skipped.
+    Returns the number of reminders scheduled.
+    """
+    if lead_hours is None:
+        lead_hours = settings.BULK_MAIL_REMINDER_LEAD_HOURS
+    now = datetime.utcnow()
+    events = db.scalars(
+        select(Event).where(
+            Event.start_at > now,
+            Event.start_at <= now + timedelta(hours=lead_hours + 24),
+            Event.external_registration_url.is_(None),
+            exists().where(RSVP.event_id == Event.id),
+            ~exists().where(BulkMailing.event_id == Event.id, BulkMailing.kind == "reminder"),
+        )
+    ).all()
+    template = DEFAULT_TEMPLATES["reminder"]
+    for event in events:
+        db.add(BulkMailing(
+            event_id=event.id,
+            kind="reminder",
+            subject_template=template["subject"],
+            body_template=template["body"],
+            status="scheduled",
+            scheduled_at=default_scheduled_at(event, lead_hours),
+            last_rsvp_id=0,
+            sent_count=0,
+            failed_count=0,
+        ))
+    db.commit()
+    return len(events)
+
+
+bulk_mail_runner = BulkMailRunner(
+    pool_size=settings.BULK_MAIL_POOL_SIZE,
+    rate_per_second=settings.BULK_MAIL_RATE_PER_SECOND,
+    chunk_size=settings.BULK_MAIL_CHUNK_SIZE,
+    poll_interval=settings.BULK_MAIL_POLL_SECONDS,
+    lease=settings.BULK_MAIL_LEASE_SECONDS,
+)
@@ -1,15 +1,39 @@
+import logging
 from datetime import datetime
 
-import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.webhooks.smtp_pool import SMTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+def create_smtp_pool(max_size: int) -> SMTPConnectionPool:
+    """Build a connection pool for the configured SMTP server"""
+    return SMTPConnectionPool(
+        hostname=settings.SMTP_HOST,
+        port=settings.SMTP_PORT,
+        username=settings.SMTP_USER,
+        password=settings.SMTP_PASS,
+        start_tls=settings.SMTP_START_TLS,
+        max_size=max_size,
+        max_messages_per_connection=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+        keepalive_interval=settings.SMTP_POOL_KEEPALIVE_SECONDS,
+        max_idle=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+    )
+
+
+smtp_pool = create_smtp_pool(settings.SMTP_POOL_SIZE)
 
 
 class EmailService:
     @staticmethod
-    async def send_email(to_email: str, subject: str, body: str, html_body: str = None):
-        """Send an email via SMTP"""
+    def build_message(to_email: str, subject: str, body: str, html_body: str = None):
+        """Build a MIME message from the foundation's mailbox"""
         message = MIMEMultipart("alternative")
         message["From"] = settings.SMTP_USER
         message["To"] = to_email
@@ -18,24 +42,46 @@ class EmailService:
         message.attach(MIMEText(body, "plain"))
         if html_body:
             message.attach(MIMEText(html_body, "html"))
+        return message
 
+    @staticmethod
+    async def deliver(to_email: str, subject: str, body: str, html_body: str = None):
+        """Send an email via SMTP, raising on failure"""
+        message = EmailService.build_message(to_email, subject, body, html_body)
+        await smtp_pool.send_message(message)
+
+    @staticmethod
+    async def send_email(to_email: str, subject: str, body: str, html_body: str = None):
+        """Send an email via SMTP"""
         try:
-            await aiosmtplib.send(
-                message,
-                hostname=settings.SMTP_HOST,
-                port=settings.SMTP_PORT,
-                username=settings.SMTP_USER,
-                password=settings.SMTP_PASS,
-                start_tls=True,
-            )
+            await EmailService.deliver(to_email, subject, body, html_body)
             return True
         except Exception as e:
-            print(f"Error sending email: {e}")
+            logger.error("Error sending email: %s", e)
             return False
 
     @staticmethod
-    async def send_contact_notification(name: str, email: str, subject: str, message: str):
-        """Send contact form notification to foundation"""
+    def queue_email(
+        db: Session, to_email: str, subject: str, body: str, html_body: str = None
+    ) -> EmailOutbox:
+        """Add an email to the outbox as part of the caller's transaction"""
+        entry = EmailOutbox(
+            to_email=to_email,
+            subject=subject,
+            body=body,
+            html_body=html_body,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow(),
+        )
+        db.add(entry)
+        return entry
+
+    @staticmethod
+    def queue_contact_notification(
+        db: Session, name: str, email: str, subject: str, message: str
+    ) -> EmailOutbox:
+        """Queue contact form notification to foundation"""
         body = f"""
 New contact form submission:
 
@@ -46,15 +92,18 @@ Subject: {subject}
 Message:
 {message}
 """
-        await EmailService.send_email(
+        return EmailService.queue_email(
+            db,
             settings.CONTACT_TO_EMAIL,
             f"Contact Form: {subject}",
             body
         )
 
     @staticmethod
-    async def send_donation_receipt(donor_email: str, amount: float, donation_id: int):
-        """Send donation receipt to donor"""
+    def queue_donation_receipt(
+        db: Session, donor_email: str, amount: float, donation_id: int
+    ) -> EmailOutbox:
+        """Queue donation receipt to donor"""
         body = f"""
 Thank you for your generous donation to The Dorothy R. Morgan Foundation!
 
@@ -70,7 +119,8 @@ From Loss to Light.
 The Dorothy R. Morgan Foundation
 Tax ID: [501(c)(3) Application Pending]
 """
-        await EmailService.send_email(
+        return EmailService.queue_email(
+            db,
             donor_email,
             "Thank You for Your Donation",
             body
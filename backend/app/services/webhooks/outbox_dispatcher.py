@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.webhooks.email_service import email_service
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """Background task that drains the ``email_outbox`` table.
+
+    Every worker runs one dispatcher. Rows are claimed with a single
+    ``UPDATE ... RETURNING`` (``SKIP LOCKED`` on Postgres) that moves them to
+    ``sending`` and leases them until ``next_attempt_at``, so concurrent
+    dispatchers never pick up the same row and a worker that dies mid-batch
+    only delays its rows until the lease runs out. Failed sends are retried
+    with exponential backoff and jitter, and moved to ``dead`` after
+    ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        poll_interval: float = 5.0,
+        max_attempts: int = 8,
+        backoff: float = 30.0,
+        max_backoff: float = 3600.0,
+        lease: float = 300.0,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Drain the outbox now instead of waiting for the next poll"""
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.drain_once()
+            except Exception:
+                logger.exception("Email outbox dispatch failed")
+                sent = 0
+            if sent >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _claim(self) -> list[EmailOutbox]:
+        now = datetime.utcnow()
+        with SessionLocal(expire_on_commit=False) as db:
+            due = (
+                select(EmailOutbox.id)
+                .where(
+                    EmailOutbox.status.in_(("pending", "sending")),
+                    EmailOutbox.next_attempt_at <= now,
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            claimed = db.scalars(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    status="sending",
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=self.lease),
+                )
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+            return claimed
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _record(self, results: list[tuple[EmailOutbox, Optional[str]]]) -> None:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            for entry, error in results:
+                if error is None:
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                elif entry.attempts >= self.max_attempts:
+                    values = {"status": "dead", "last_error": error}
+                    logger.error(
+                        "Email %s to %s dead-lettered after %d attempts: %s",
+                        entry.id, entry.to_email, entry.attempts, error,
+                    )
+                else:
+                    values = {
+                        "status": "pending",
+                        "last_error": error,
+                        "next_attempt_at": now
+                        + timedelta(seconds=self._retry_delay(entry.attempts)),
+                    }
+                db.execute(
+                    update(EmailOutbox).where(EmailOutbox.id == entry.id).values(**values)
+                )
+            db.commit()
+
+    async def _send(self, entry: EmailOutbox) -> tuple[EmailOutbox, Optional[str]]:
+        try:
+            await email_service.deliver(entry.to_email, entry.subject, entry.body, entry.html_body)
+            return entry, None
+        except Exception as e:
+            return entry, f"{type(e).__name__}: {e}"
+
+    async def drain_once(self) -> int:
+        """Claim and send one batch; returns the number of rows claimed"""
+        claimed = await asyncio.to_thread(self._claim)
+        if not claimed:
+            return 0
+        results = await asyncio.gather(*(self._send(entry) for entry in claimed))
+        await asyncio.to_thread(self._record, results)
+        return len(claimed)
+
+
+def prune_sent_emails(db: Session, retention_days: float) -> int:
+    """Delete outbox rows sent more than ``retention_days`` ago; returns how many"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = db.execute(
+        delete(EmailOutbox).where(EmailOutbox.status == "sent", EmailOutbox.sent_at < cutoff)
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+    max_backoff=settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS,
+    lease=settings.EMAIL_OUTBOX_LEASE_SECONDS,
+)
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import socket
+import time
+from collections import deque
+from email.message import Message
+from typing import Optional
+
+import aiosmtplib
+
+from app.core.resilience import Dependency, dependency
+
+logger = logging.getLogger(__name__)
+
+
+def _is_smtp_failure(e: BaseException) -> bool:
+    if isinstance(
+        e,
+        (
+            aiosmtplib.SMTPServerDisconnected,
+            aiosmtplib.SMTPConnectError,
+            aiosmtplib.SMTPTimeoutError,
+        ),
+    ):
+        return True
+    # 421: the server is not taking mail right now
+    return isinstance(e, aiosmtplib.SMTPResponseException) and e.code == 421
+
+
+def _smtp_dependency(timeout: float) -> Dependency:
+    # Pools for the same server share one breaker; each pool limits its own
+    # concurrency, so there is no bulkhead
+    return dependency("smtp", timeout, _is_smtp_failure, bulkhead=False)
+
+
+class _PooledConnection:
+    """An authenticated SMTP connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+        # Last time the server was heard from: a send or a NOOP
+        self.last_checked = self.last_used
+
+
+class SMTPConnectionPool:
+    """Pool of persistent, authenticated SMTP connections.
+
+    Connections are opened lazily, reused across messages and recycled after
+    ``max_messages_per_connection`` sends. While the pool is in use a
+    background task sends NOOP on every connection that has been quiet for
+    ``keepalive_interval``, so that servers which drop silent sessions keep
+    them open between sends, and closes those unused for longer than
+    ``max_idle``. Checkout repeats the NOOP if the task has fallen behind.
+    At most ``max_size`` connections exist at any time, counting those
+    being checked; extra senders wait for a free one.
+
+    Sends go through ``dependency`` (by default the shared "smtp" one), so
+    that while the server is down senders fail fast instead of each waiting
+    for their connection to time out.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = True,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        keepalive_interval: float = 30.0,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        dependency: Optional[Dependency] = None,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.dependency = dependency or _smtp_dependency(timeout)
+
+        self._idle: deque[_PooledConnection] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    def _bind_loop(self) -> None:
+        # asyncio primitives and open sockets belong to a single event loop, so
+        # start from scratch when used from a new one (e.g. repeated asyncio.run).
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            while self._idle:
+                self._abandon(self._idle.pop())
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_size)
+            self._keepalive_task = None
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = loop.create_task(self._keep_alive())
+
+    @staticmethod
+    def _abandon(conn: _PooledConnection) -> None:
+        """Close a connection left over from an event loop that no longer runs"""
+        transport = conn.client.transport
+        if transport is None:
+            return
+        # QUIT would need the old loop, and so would finishing transport.close()
+        # there; hang up on the socket directly so the server ends the session
+        sock = transport.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        try:
+            conn.client.close()
+        except RuntimeError:
+            # The old loop is closed; the socket is released with the transport
+            pass
+
+    async def _open(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return _PooledConnection(client)
+
+    async def _close(self, conn: _PooledConnection) -> None:
+        try:
+            if conn.client.is_connected:
+                await conn.client.quit()
+        except aiosmtplib.SMTPException:
+            conn.client.close()
+
+    async def _checkout(self) -> _PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            idle_for = time.monotonic() - conn.last_used
+            if not conn.client.is_connected or idle_for > self.max_idle:
+                await self._close(conn)
+                continue
+            if time.monotonic() - conn.last_checked > self.keepalive_interval:
+                try:
+                    await conn.client.noop()
+                except aiosmtplib.SMTPException:
+                    conn.client.close()
+                    continue
+                conn.last_checked = time.monotonic()
+            return conn
+        return await self._open()
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive_interval / 2)
+            for conn in list(self._idle):
+                if time.monotonic() - conn.last_checked < self.keepalive_interval:
+                    continue
+                # Holding a slot keeps the pool within max_size while the
+                # connection is out of the idle list
+                async with self._slots:
+                    if conn not in self._idle:
+                        continue  # checked out in the meantime
+                    self._idle.remove(conn)
+                    idle_for = time.monotonic() - conn.last_used
+                    if not conn.client.is_connected or idle_for > self.max_idle:
+                        await self._close(conn)
+                        continue
+                    try:
+                        await conn.client.noop()
+                    except aiosmtplib.SMTPException:
+                        conn.client.close()
+                        continue
+                    conn.last_checked = time.monotonic()
+                    # Back at the cold end: checkout prefers recently used ones
+                    self._idle.appendleft(conn)
+
+    async def _checkin(self, conn: _PooledConnection) -> None:
+        conn.last_used = conn.last_checked = time.monotonic()
+        if (
+            conn.messages_sent >= self.max_messages_per_connection
+            or not conn.client.is_connected
+        ):
+            await self._close(conn)
+        else:
+            self._idle.append(conn)
+
+    async def send_message(self, message: Message) -> None:
+        """Send a message over a pooled connection.
+
+        A connection that turns out to be dead is replaced and the send is
+        retried once; any other SMTP error is raised to the caller.
+        """
+        self._bind_loop()
+        async with self._slots:
+            await self.dependency.acall("send_message", self._send, message)
+
+    async def _send(self, message: Message) -> None:
+        for attempt in range(2):
+            conn = await self._checkout()
+            try:
+                await conn.client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                conn.client.close()
+                if attempt:
+                    raise
+                logger.info("SMTP connection dropped, reconnecting")
+                continue
+            except BaseException:
+                conn.client.close()
+                raise
+            conn.messages_sent += 1
+            await self._checkin(conn)
+            return
+
+    async def close(self) -> None:
+        """Stop the keepalive task and close all idle connections"""
+        loop = asyncio.get_running_loop()
+        task, self._keepalive_task = self._keepalive_task, None
+        if task is not None and task.get_loop() is loop:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        while self._idle:
+            if self._loop is loop:
+                await self._close(self._idle.pop())
+            else:
+                self._abandon(self._idle.pop())
@@ -1,67 +1,127 @@
-import stripe
+import logging
+import uuid
+from functools import cache
+
 from app.core.config import settings
+from app.core.resilience import dependency
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def get_stripe():
+    """The stripe SDK, imported and configured on first use"""
+    import stripe
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    # The default waits 80 seconds; retries are ours, see stripe_api
+    stripe.default_http_client = stripe.http_client.RequestsClient(
+        timeout=settings.STRIPE_TIMEOUT_SECONDS
+    )
+    stripe.max_network_retries = 0
+    return stripe
+
+
+def _is_stripe_failure(e: BaseException) -> bool:
+    stripe = get_stripe()
+    if isinstance(e, (stripe.error.APIConnectionError, stripe.error.RateLimitError)):
+        return True
+    return isinstance(e, stripe.error.StripeError) and (e.http_status or 0) >= 500
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+
+stripe_api = dependency("stripe", settings.STRIPE_TIMEOUT_SECONDS, _is_stripe_failure)
+
+
+def _idempotency_key() -> str:
+    # Sent with every attempt of a create, so a retry cannot create twice
+    return uuid.uuid4().hex
 
 
 class StripeService:
     @staticmethod
     def create_payment_intent(amount_cents: int, currency: str = "usd", metadata: dict = None):
         """Create a one-time payment intent"""
+        stripe = get_stripe()
         try:
-            intent = stripe.PaymentIntent.create(
+            return stripe_api.call(
+                "create_payment_intent",
+                stripe.PaymentIntent.create,
                 amount=amount_cents,
                 currency=currency,
                 metadata=metadata or {},
                 automatic_payment_methods={"enabled": True},
+                idempotency_key=_idempotency_key(),
+                idempotent=True,
             )
-            return intent
         except stripe.error.StripeError as e:
-            print(f"Stripe error: {e}")
+            logger.error("Stripe error: %s", e)
             return None
 
     @staticmethod
     def create_subscription(customer_id: str, price_id: str, metadata: dict = None):
         """Create a recurring subscription with an incomplete first payment"""
+        stripe = get_stripe()
         try:
-            subscription = stripe.Subscription.create(
+            return stripe_api.call(
+                "create_subscription",
+                stripe.Subscription.create,
                 customer=customer_id,
                 items=[{"price": price_id}],
                 metadata=metadata or {},
                 payment_behavior="default_incomplete",
                 payment_settings={"save_default_payment_method": "on_subscription"},
                 expand=["latest_invoice.payment_intent"],
+                idempotency_key=_idempotency_key(),
+                idempotent=True,
             )
-            return subscription
         except stripe.error.StripeError as e:
-            print(f"Stripe error: {e}")
+            logger.error("Stripe error: %s", e)
             return None
 
     @staticmethod
     def retrieve_payment_intent(payment_intent_id: str):
         """Retrieve a payment intent from Stripe"""
+        stripe = get_stripe()
         try:
-            return stripe.PaymentIntent.retrieve(payment_intent_id)
+            return stripe_api.call(
+                "retrieve_payment_intent",
+                stripe.PaymentIntent.retrieve,
+                payment_intent_id,
+                idempotent=True,
+            )
         except stripe.error.StripeError as e:
-            print(f"Stripe error: {e}")
+            logger.error("Stripe error: %s", e)
             return None
 
+    @staticmethod
+    def retrieve_invoice(invoice_id: str):
+        """Retrieve an invoice from Stripe, raising on failure"""
+        stripe = get_stripe()
+        return stripe_api.call(
+            "retrieve_invoice", stripe.Invoice.retrieve, invoice_id, idempotent=True
+        )
+
     @staticmethod
     def create_customer(email: str, name: str = None):
         """Create a Stripe customer"""
+        stripe = get_stripe()
         try:
-            customer = stripe.Customer.create(
+            return stripe_api.call(
+                "create_customer",
+                stripe.Customer.create,
                 email=email,
                 name=name,
+                idempotency_key=_idempotency_key(),
+                idempotent=True,
             )
-            return customer
         except stripe.error.StripeError as e:
-            print(f"Stripe error: {e}")
+            logger.error("Stripe error: %s", e)
             return None
 
     @staticmethod
     def create_price(amount_cents: int, currency: str = "usd", recurring: bool = False):
         """Create a price for recurring donations"""
+        stripe = get_stripe()
         try:
             price_data = {
                 "unit_amount": amount_cents,
@@ -73,15 +133,21 @@ class StripeService:
             if recurring:
                 price_data["recurring"] = {"interval": "month"}
             
-            price = stripe.Price.create(**price_data)
-            return price
+            return stripe_api.call(
+                "create_price",
+                stripe.Price.create,
+                **price_data,
+                idempotency_key=_idempotency_key(),
+                idempotent=True,
+            )
         except stripe.error.StripeError as e:
-            print(f"Stripe error: {e}")
+            logger.error("Stripe error: %s", e)
             return None
 
     @staticmethod
     def verify_webhook_signature(payload: bytes, sig_header: str):
         """Verify Stripe webhook signature"""
+        stripe = get_stripe()
         try:
             event = stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark
+Measures what the SQLite-backed rate limiter adds to each request: the
+latency of one bucket update on its own, through the middleware in front
+of an empty app, and with several processes sharing the file. Also checks
+that processes sharing a bucket never let more requests through than the
+limit allows.
+
+Usage: python scripts/bench_rate_limit.py [--requests 20000] [--processes 4]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.rate_limit import (
+    Rate,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+    SQLiteBucketStore,
+)
+
+UNLIMITED = Rate(10**9, 1)
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p50 = statistics.median(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    print(f"  {label:34} p50 {p50:7.1f} µs   p99 {p99:7.1f} µs")
+
+
+def time_takes(path: str, requests: int, keys: int) -> list[float]:
+    store = SQLiteBucketStore(path)
+    samples = []
+    for i in range(requests):
+        start = time.perf_counter()
+        store.take(f"bench:ip:{i % keys}", UNLIMITED)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _worker(path: str, requests: int, keys: int, results) -> None:
+    results.put(time_takes(path, requests, keys))
+
+
+def _contend(path: str, attempts: int, limit: int, results) -> None:
+    store = SQLiteBucketStore(path, busy_timeout_ms=1000)
+    rate = Rate(limit, 3600)
+    results.put(sum(1 for _ in range(attempts) if store.take("bench:shared", rate) == 0))
+
+
+def run_processes(target, args: tuple, processes: int) -> list:
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=target, args=(*args, results)) for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return collected
+
+
+async def time_middleware(path: str, requests: int, keys: int, limited: bool) -> list[float]:
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    app = empty_app
+    if limited:
+        limiter = RateLimiter(SQLiteBucketStore(path), {"bench": RateLimitRule(per_ip=UNLIMITED)})
+        app = RateLimitMiddleware(empty_app, limiter, [("POST", r"/bench", "bench")])
+    samples = []
+    for i in range(requests):
+        client = (f"10.0.{i % keys // 256}.{i % 256}", 1)
+        scope = {"type": "http", "method": "POST", "path": "/bench", "client": client}
+        start = time.perf_counter()
+        await app(scope, receive, send)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(requests: int, processes: int, keys: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rate-limits.db")
+        print(f"Requests: {requests}, distinct clients: {keys}, processes: {processes}")
+
+        summarize("bucket update, one process", time_takes(path, requests, keys))
+        bare = asyncio.run(time_middleware(path, requests, keys, limited=False))
+        limited = asyncio.run(time_middleware(path, requests, keys, limited=True))
+        summarize("empty app", bare)
+        summarize("empty app behind the middleware", limited)
+        added = (statistics.median(limited) - statistics.median(bare)) * 1e6
+        print(f"  {'added per request':34} p50 {added:7.1f} µs")
+
+        start = time.perf_counter()
+        per_process = run_processes(_worker, (path, requests // processes, keys), processes)
+        elapsed = time.perf_counter() - start
+        samples = [sample for samples in per_process for sample in samples]
+        summarize(f"bucket update, {processes} processes", samples)
+        print(f"  {'throughput':34} {requests / elapsed:8.0f} updates/s")
+
+        limit = 100
+        shared = os.path.join(directory, "shared.db")
+        allowed = sum(run_processes(_contend, (shared, 200, limit), processes))
+        status = "ok" if allowed == limit else "WRONG"
+        print(
+            f"  shared bucket of {limit}, {processes * 200} attempts: {allowed} allowed  {status}"
+        )
+        if allowed != limit:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.requests, args.processes, args.clients)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+SMTP throughput benchmark
+Compares one-connection-per-message sends against the pooled sender using a
+local aiosmtpd sink (no TLS, no auth), and reports messages per second.
+aiosmtpd comes with the dev requirements (pip install -r requirements-dev.txt).
+
+Usage: python scripts/bench_smtp.py [--messages 500] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from email.mime.text import MIMEText
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from app.services.webhooks.smtp_pool import SMTPConnectionPool
+
+HOST = "127.0.0.1"
+PORT = 8025
+
+
+def build_message(i: int) -> MIMEText:
+    message = MIMEText(f"Benchmark message {i}")
+    message["From"] = "bench@example.com"
+    message["To"] = "sink@example.com"
+    message["Subject"] = f"Benchmark {i}"
+    return message
+
+
+async def run(send, messages: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with gate:
+            await send(build_message(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return messages / (time.perf_counter() - start)
+
+
+async def main(messages: int, concurrency: int, pool_size: int):
+    async def send_unpooled(message):
+        await aiosmtplib.send(message, hostname=HOST, port=PORT)
+
+    pool = SMTPConnectionPool(hostname=HOST, port=PORT, start_tls=False, max_size=pool_size)
+
+    unpooled = await run(send_unpooled, messages, concurrency)
+    pooled = await run(pool.send_message, messages, concurrency)
+    await pool.close()
+
+    print(f"Messages: {messages}, concurrency: {concurrency}, pool size: {pool_size}")
+    print(f"  connection per message: {unpooled:8.1f} msg/s")
+    print(f"  pooled connections:     {pooled:8.1f} msg/s  ({pooled / unpooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    controller = Controller(Sink(), hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        asyncio.run(main(args.messages, args.concurrency, args.pool_size))
+    finally:
+        controller.stop()
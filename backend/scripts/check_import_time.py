@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import time check
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+fails if the median cold import time exceeds the budget, or if a module
+that should only be imported on first use (boto3, stripe, the Clerk SDK) is
+pulled in at import time. Every worker, migration and script pays this cost
+on startup.
+
+Usage: python scripts/check_import_time.py [--module app.main] [--budget-ms 1500] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+DEFAULT_MODULES = ["app.main", "app.models", "app.core.database", "app.services.auth.auth_service"]
+
+# Packages behind lazy accessors; importing them eagerly is a regression
+DEFERRED_PACKAGES = ["boto3", "botocore", "stripe", "clerk_backend_api"]
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by ``module``"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": str(BACKEND_DIR)},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--module", action="append", dest="modules")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules or DEFAULT_MODULES:
+        runs = [import_profile(module) for _ in range(args.runs)]
+        median_ms = statistics.median(run[module] for run in runs) / 1000
+        eager = [name for name in DEFERRED_PACKAGES if name in runs[0]]
+        status = "ok"
+        if median_ms > args.budget_ms:
+            status = "SLOW"
+            failures.append(f"{module} took {median_ms:.0f} ms, budget {args.budget_ms:.0f} ms")
+        if eager:
+            status = "EAGER"
+            failures.append(f"{module} imports {', '.join(eager)} at import time")
+        print(f"{module:40} {median_ms:8.0f} ms  (budget {args.budget_ms:.0f} ms)  {status}")
+
+        slowest = sorted(
+            ((ms, name) for name, ms in runs[0].items() if name != module and "." not in name),
+            reverse=True,
+        )[:5]
+        slowest_text = ", ".join(f"{name} {ms / 1000:.0f} ms" for ms, name in slowest)
+        print("    slowest packages: " + slowest_text)
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✓ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
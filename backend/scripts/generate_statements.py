@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Year-end giving statement generator
+Aggregates succeeded donations per donor for a calendar year and writes one
+statement per donor to a local directory or S3, optionally emailing them.
+
+Usage:
+  python scripts/generate_statements.py --year 2025 --output-dir ./statements
+  python scripts/generate_statements.py --year 2025 --s3 --email
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.reports.giving_statements import (
+    LocalStatementWriter,
+    S3StatementWriter,
+    generate_statements,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate year-end giving statements")
+    parser.add_argument("--year", type=int, required=True)
+    destination = parser.add_mutually_exclusive_group(required=True)
+    destination.add_argument("--output-dir", help="Write statements to this directory")
+    destination.add_argument("--s3", action="store_true", help="Upload statements to S3")
+    parser.add_argument("--s3-prefix", default="statements")
+    parser.add_argument("--format", choices=["html", "pdf"], default="html")
+    parser.add_argument("--email", action="store_true", help="Queue statements for email")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    writer = S3StatementWriter(args.s3_prefix) if args.s3 else LocalStatementWriter(args.output_dir)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        count = generate_statements(
+            db,
+            args.year,
+            writer,
+            output_format=args.format,
+            email=args.email,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+        )
+        elapsed = time.perf_counter() - start
+        print(f"✓ Generated {count} statements for {args.year} in {elapsed:.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+HTTP load test
+Opens a fixed number of concurrent connections against a running API and
+reports throughput and latency percentiles for each endpoint. Run it against
+two builds (e.g. before and after a change) with the same database to
+compare them.
+
+Usage: python scripts/loadtest.py --url http://127.0.0.1:8000 [--concurrency 500]
+           [--requests 10000] [--endpoint GET:/api/events] [--endpoint POST:/api/contact]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+DEFAULT_ENDPOINTS = ["GET:/api/events", "GET:/api/sponsors", "POST:/api/contact"]
+
+BODIES = {
+    "/api/contact": {
+        "name": "Load Test",
+        "email": "loadtest@example.com",
+        "subject": "Load test",
+        "message": "Load test message",
+    },
+}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_endpoint(url: str, method: str, path: str, concurrency: int, requests: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+    body = json.dumps(BODIES[path]) if method == "POST" and path in BODIES else None
+    headers = {"content-type": "application/json"} if body else {}
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def connection():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, content=body, headers=headers)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(connection() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "endpoint": f"{method} {path}",
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+    }
+
+
+async def main(url: str, endpoints: list[str], concurrency: int, requests: int):
+    print(f"{url}  concurrency={concurrency}  requests/endpoint={requests}")
+    print(
+        f"{'endpoint':<24}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'max ms':>10}{'errors':>8}"
+    )
+    for endpoint in endpoints:
+        method, path = endpoint.split(":", 1)
+        result = await run_endpoint(url, method.upper(), path, concurrency, requests)
+        print(
+            f"{result['endpoint']:<24}{result['rps']:>9.1f}{result['p50']:>10.1f}"
+            f"{result['p95']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}{result['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per endpoint")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="METHOD:/path, may be repeated")
+    args = parser.parse_args()
+    endpoints = args.endpoints or DEFAULT_ENDPOINTS
+    asyncio.run(main(args.url, endpoints, args.concurrency, args.requests))
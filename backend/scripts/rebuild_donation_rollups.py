@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Rebuild donation rollups
+Recomputes the donation_daily_rollups table from the donations table
+"""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import SessionLocal
+from app.services.analytics.donation_rollups import rebuild_rollups
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = rebuild_rollups(db)
+        print(f"✓ Rebuilt donation rollups ({rows} rows)")
+    except Exception as e:
+        print(f"\n❌ Error rebuilding rollups: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Show a trace
+Prints the spans of one trace from the JSONL span files as an indented tree,
+with each span's duration and offset from the start of the request. With no
+trace id, lists the slowest traced requests instead.
+
+Usage: python scripts/show_trace.py [TRACE_ID] [--files 'traces-*.jsonl*'] [--top 20]
+"""
+import argparse
+import glob
+import json
+from collections import defaultdict
+
+
+def load_spans(pattern: str, trace_id: str = None) -> list[dict]:
+    spans = []
+    for path in glob.glob(pattern):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if trace_id and trace_id not in line:
+                    continue
+                span = json.loads(line)
+                if trace_id is None or span["trace_id"] == trace_id:
+                    spans.append(span)
+    return spans
+
+
+def print_tree(spans: list[dict]) -> None:
+    children = defaultdict(list)
+    ids = {span["span_id"] for span in spans}
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children[parent].append(span)
+    roots = children[None]
+    origin = min(span["start"] for span in spans)
+
+    def show(span: dict, depth: int) -> None:
+        offset_ms = (span["start"] - origin) * 1000
+        detail = span["attributes"].get("db.statement", "")
+        detail = " ".join(detail.split())[:100]
+        error = f"  ERROR {span['error']}" if span["error"] else ""
+        indent = "  " * depth
+        print(
+            f"{offset_ms:9.1f} ms {span['duration_ms']:9.1f} ms  "
+            f"{indent}{span['name']}  {detail}{error}"
+        )
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+            show(child, depth + 1)
+
+    print(f"{'offset':>12} {'duration':>12}  span")
+    for root in sorted(roots, key=lambda s: s["start"]):
+        show(root, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("trace_id", nargs="?")
+    parser.add_argument("--files", default="traces-*.jsonl*")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.trace_id:
+        spans = load_spans(args.files, args.trace_id)
+        if not spans:
+            print(f"No spans for trace {args.trace_id}")
+            return
+        print_tree(spans)
+        return
+
+    requests = [span for span in load_spans(args.files) if span["kind"] == "server"]
+    requests.sort(key=lambda span: span["duration_ms"], reverse=True)
+    for span in requests[:args.top]:
+        status = span["attributes"].get("http.status_code", "-")
+        print(f"{span['duration_ms']:9.1f} ms  {status}  {span['name']:50}  {span['trace_id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+# The engines are built when app.core.database is imported, so point them at
+# a scratch database before any test module imports the app
+_tmp = tempfile.mkdtemp(prefix="tdrmf-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["RATE_LIMIT_DB_PATH"] = os.path.join(_tmp, "rate-limits.db")
+# Route tests post to the limited forms many times from one address
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def _empty_tables():
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def client():
+    from app.main import app
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+async def admin_client(client):
+    from app.main import app
+    from app.services.auth import ClerkAdmin, get_current_admin
+
+    app.dependency_overrides[get_current_admin] = lambda: ClerkAdmin(
+        "user_admin", "admin@example.org", {"role": "admin"}
+    )
+    yield client
+    app.dependency_overrides.pop(get_current_admin, None)
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.contact_message import ContactMessage
+from app.models.email_outbox import EmailOutbox
+from app.models.gallery_photo import GalleryPhoto
+
+
+class FakeS3:
+    def __init__(self):
+        self.upload_threads: list[int] = []
+
+    def upload_file(self, content: bytes, key: str, content_type: str) -> bool:
+        self.upload_threads.append(threading.get_ident())
+        return True
+
+
+async def test_event_admin_and_public_routes(admin_client):
+    start_at = (datetime.utcnow() + timedelta(days=3)).isoformat()
+    for title, published in [("Draft", False), ("Walk", True)]:
+        response = await admin_client.post(
+            "/api/admin/events",
+            json={"title": title, "start_at": start_at, "is_published": published},
+        )
+        assert response.status_code == 201
+    walk_id = response.json()["id"]
+
+    response = await admin_client.put(f"/api/admin/events/{walk_id}", json={"location": "Park"})
+    assert response.json()["location"] == "Park"
+
+    # Concurrent reads each get their own session
+    responses = await asyncio.gather(*(admin_client.get("/api/events") for _ in range(20)))
+    assert {tuple(event["title"] for event in r.json()) for r in responses} == {("Walk",)}
+    assert len((await admin_client.get("/api/admin/events")).json()) == 2
+
+    assert (await admin_client.delete(f"/api/admin/events/{walk_id}")).status_code == 204
+    assert (await admin_client.get(f"/api/events/{walk_id}")).status_code == 404
+
+
+async def test_contact_form_stores_and_queues_in_one_commit(db, client):
+    response = await client.post(
+        "/api/contact",
+        json={"name": "Ada", "email": "ada@example.org", "message": "Hello there"},
+    )
+    assert response.status_code == 201
+    assert db.scalar(select(ContactMessage.email)) == "ada@example.org"
+    assert len(db.scalars(select(EmailOutbox)).all()) == 1
+
+
+async def test_gallery_upload_runs_off_the_event_loop(db, admin_client, monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr("app.api.routes.gallery.get_s3_service", lambda: s3)
+    response = await admin_client.post(
+        "/api/gallery/submit",
+        data={
+            "title": "Sunrise",
+            "uploader_name": "Ada",
+            "uploader_email": "ada@example.org",
+            "consent_signed": "true",
+        },
+        files={"file": ("sunrise.jpg", b"\xff\xd8\xff", "image/jpeg")},
+    )
+    assert response.status_code == 201
+    assert s3.upload_threads and threading.get_ident() not in s3.upload_threads
+
+    photo = db.scalars(select(GalleryPhoto)).one()
+    assert (photo.title, photo.approved) == ("Sunrise", False)
+    assert photo.s3_key.startswith("gallery/") and photo.s3_key.endswith(".jpg")
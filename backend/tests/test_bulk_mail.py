@@ -0,0 +1,212 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.database import SessionLocal
+from app.models.bulk_mail_recipient import BulkMailRecipient
+from app.models.bulk_mailing import BulkMailing
+from app.models.email_outbox import EmailOutbox
+from app.models.event import Event
+from app.models.rsvp import RSVP
+from app.services.webhooks.bulk_mail import (
+    DEFAULT_TEMPLATES,
+    BulkMailRunner,
+    schedule_event_reminders,
+)
+
+
+class FakePool:
+    """Records messages instead of sending them; optionally slow or failing"""
+
+    def __init__(self, delay: float = 0.0, fail_for: tuple[str, ...] = ()):
+        self.delay = delay
+        self.fail_for = fail_for
+        self.sent: list[str] = []
+
+    async def send_message(self, message) -> None:
+        await asyncio.sleep(self.delay)
+        if message["To"] in self.fail_for:
+            raise ConnectionError("refused")
+        self.sent.append(message["To"])
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def runner():
+    runner = BulkMailRunner(rate_per_second=10_000, chunk_size=2, lease=60)
+    runner.pool = FakePool()
+    return runner
+
+
+def _event(db, **values) -> Event:
+    event = Event(
+        title="Spring Walk",
+        start_at=datetime.utcnow() + timedelta(days=2),
+        location="Riverside Park",
+        **values,
+    )
+    db.add(event)
+    db.commit()
+    return event
+
+
+def _mailing(db, event_id: int, **values) -> BulkMailing:
+    template = DEFAULT_TEMPLATES["reminder"]
+    mailing = BulkMailing(
+        event_id=event_id,
+        kind="reminder",
+        subject_template=template["subject"],
+        body_template=template["body"],
+        status="scheduled",
+        scheduled_at=values.pop("scheduled_at", datetime.utcnow() - timedelta(minutes=1)),
+        last_rsvp_id=0,
+        sent_count=0,
+        failed_count=0,
+        **values,
+    )
+    db.add(mailing)
+    db.commit()
+    return mailing
+
+
+def _rsvp(db, event_id: int, *emails: str) -> None:
+    db.add_all(RSVP(event_id=event_id, name=email.split("@")[0], email=email) for email in emails)
+    db.commit()
+
+
+async def test_mailing_is_sent_once_per_address(db, runner):
+    event = _event(db)
+    _rsvp(db, event.id, "a@example.org", "b@example.org", "A@example.org", "c@example.org")
+    runner.pool.fail_for = ("c@example.org",)
+    mailing = _mailing(db, event.id)
+
+    assert await runner.run_due_mailing()
+    assert sorted(runner.pool.sent) == ["a@example.org", "b@example.org"]
+
+    db.refresh(mailing)
+    assert mailing.status == "completed"
+    assert (mailing.sent_count, mailing.failed_count) == (2, 1)
+    recipients = {row.email: row.status for row in db.scalars(select(BulkMailRecipient))}
+    assert recipients == {
+        "a@example.org": "sent",
+        "b@example.org": "sent",
+        "c@example.org": "failed",
+    }
+    # Nothing is due any more
+    assert not await runner.run_due_mailing()
+
+
+async def test_resumed_mailing_skips_recorded_chunks(db, runner):
+    event = _event(db)
+    _rsvp(db, event.id, "a@example.org", "b@example.org", "c@example.org")
+    mailing = _mailing(db, event.id)
+
+    # A previous run recorded the first chunk and then died
+    mailing_id, token, _ = runner._claim()
+    chunk, last_rsvp_id = runner._next_chunk(mailing_id)
+    assert [email for _, _, email in chunk] == ["a@example.org", "b@example.org"]
+    runner._checkpoint(mailing_id, token, last_rsvp_id, [(r, e, None) for r, _, e in chunk])
+    db.execute(update(BulkMailing).values(lease_expires_at=datetime.utcnow()))
+    db.commit()
+
+    assert await runner.run_due_mailing()
+    assert runner.pool.sent == ["c@example.org"]
+    db.refresh(mailing)
+    assert (mailing.status, mailing.sent_count) == ("completed", 3)
+
+
+def test_checkpoint_is_fenced_by_the_lease_token(db, runner):
+    event = _event(db)
+    _rsvp(db, event.id, "a@example.org")
+    _mailing(db, event.id)
+    mailing_id, token, _ = runner._claim()
+
+    assert not runner._checkpoint(mailing_id, "stale", 1, [(1, "a@example.org", None)])
+    assert not runner._renew(mailing_id, "stale")
+    assert db.scalars(select(BulkMailRecipient)).all() == []
+    assert runner._renew(mailing_id, token)
+    assert runner._checkpoint(mailing_id, token, 1, [(1, "a@example.org", None)])
+
+
+async def test_lost_lease_stops_the_batch(db):
+    # The chunk takes a second to send; the lease is renewed every 0.1 s
+    runner = BulkMailRunner(rate_per_second=20, chunk_size=50, lease=0.3)
+    runner.pool = FakePool(delay=0.05)
+    event = _event(db)
+    _rsvp(db, event.id, *(f"donor{i}@example.org" for i in range(20)))
+    mailing = _mailing(db, event.id)
+
+    async def take_over():
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(_steal_lease, mailing.id)
+
+    _, ran = await asyncio.gather(take_over(), runner.run_due_mailing())
+    assert ran
+    assert 0 < len(runner.pool.sent) < 20
+    db.refresh(mailing)
+    assert mailing.sent_count == 0
+    assert db.scalars(select(BulkMailRecipient)).all() == []
+
+
+def _steal_lease(mailing_id: int) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            update(BulkMailing).where(BulkMailing.id == mailing_id).values(lease_token="other")
+        )
+        db.commit()
+
+
+async def test_mailing_for_a_deleted_event_fails(db, runner):
+    event = _event(db)
+    orphan = _mailing(db, event.id + 1000, scheduled_at=datetime.utcnow() - timedelta(hours=1))
+    mailing = _mailing(db, event.id)
+    _rsvp(db, event.id, "a@example.org")
+
+    assert await runner.run_due_mailing()
+    db.refresh(orphan)
+    db.refresh(mailing)
+    assert orphan.status == "failed" and orphan.lease_expires_at is None
+    assert mailing.status == "completed"
+    assert runner.pool.sent == ["a@example.org"]
+    assert not await runner.run_due_mailing()
+
+
+def test_reminders_are_scheduled_once_for_upcoming_events(db):
+    with_rsvps = _event(db)
+    _rsvp(db, with_rsvps.id, "a@example.org")
+    _event(db)
+    external = _event(db, external_registration_url="https://example.org/register")
+    _rsvp(db, external.id, "b@example.org")
+
+    assert schedule_event_reminders(db, lead_hours=48) == 1
+    assert schedule_event_reminders(db, lead_hours=48) == 0
+    (mailing,) = db.scalars(select(BulkMailing)).all()
+    assert mailing.event_id == with_rsvps.id
+
+
+async def test_rsvp_queues_a_confirmation(db, client):
+    event = _event(db, is_published=True)
+    response = await client.post(
+        f"/api/events/{event.id}/rsvp", json={"name": "Ada", "email": "ada@example.org"}
+    )
+    assert response.status_code == 201
+
+    (entry,) = db.scalars(select(EmailOutbox)).all()
+    assert entry.to_email == "ada@example.org"
+    assert entry.subject == "You're registered for Spring Walk"
+    assert "Hi Ada," in entry.body
+    assert "Riverside Park" in entry.body
+    assert db.scalar(select(RSVP.email)) == "ada@example.org"
+
+
+async def test_rsvp_with_external_registration_queues_nothing(db, client):
+    event = _event(db, external_registration_url="https://example.org/register")
+    response = await client.post(
+        f"/api/events/{event.id}/rsvp", json={"name": "Ada", "email": "ada@example.org"}
+    )
+    assert response.json() == {"external_url": "https://example.org/register"}
+    assert db.scalars(select(EmailOutbox)).all() == []
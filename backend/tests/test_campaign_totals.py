@@ -0,0 +1,70 @@
+import asyncio
+import json
+from datetime import date
+
+from app.models.donation import Donation
+from app.services.analytics.donation_rollups import _upsert
+from app.services.realtime.campaign_totals import CampaignTotals, campaign_totals
+
+
+def _payload(message: str) -> dict:
+    data = next(line for line in message.splitlines() if line.startswith("data: "))
+    return json.loads(data.removeprefix("data: "))
+
+
+def _set_status(db, donation: Donation, status: str) -> None:
+    previous_status = donation.status
+    donation.status = status
+    campaign_totals.record_status_change(db, donation, previous_status)
+
+
+def test_status_changes_apply_on_commit_only(db):
+    usd = Donation(amount_cents=2500, status="pending")
+    eur = Donation(amount_cents=700, currency="eur", status="pending")
+    db.add_all([usd, eur])
+    db.commit()
+    before = campaign_totals.snapshot()
+
+    _set_status(db, usd, "succeeded")
+    db.rollback()
+    assert campaign_totals.snapshot() == before
+
+    _set_status(db, usd, "succeeded")
+    _set_status(db, eur, "succeeded")
+    db.flush()
+    assert campaign_totals.snapshot() == before
+    db.commit()
+    assert campaign_totals.snapshot()["total_amount_cents"] == before["total_amount_cents"] + 2500
+    assert campaign_totals.snapshot()["count"] == before["count"] + 1
+
+    _set_status(db, usd, "refunded")
+    db.commit()
+    assert campaign_totals.snapshot() == before
+
+
+async def test_reseed_reads_the_rollups(db):
+    _upsert(db, date(2026, 3, 1), "usd", False, 1000, 1)
+    _upsert(db, date(2026, 3, 2), "usd", True, 2000, 2)
+    _upsert(db, date(2026, 3, 2), "eur", False, 9000, 1)
+    db.commit()
+    totals = CampaignTotals()
+    await totals.reseed()
+    assert totals.snapshot() == {"total_amount_cents": 3000, "count": 3, "currency": "usd"}
+
+
+async def test_a_burst_of_gifts_is_one_push():
+    totals = CampaignTotals(interval=0.05, reseed_interval=60, keepalive=60)
+    await totals.start()
+    stream = totals.stream()
+    try:
+        assert _payload(await anext(stream))["count"] == 0
+        waiting = asyncio.ensure_future(anext(stream))
+        for amount_cents in (1000, 2000, 500):
+            totals.record_gift(amount_cents)
+        pushed = _payload(await asyncio.wait_for(waiting, 1))
+        assert pushed == {"total_amount_cents": 3500, "count": 3, "currency": "usd"}
+        assert totals.listeners == 1
+    finally:
+        await totals.stop()
+        await stream.aclose()
+    assert totals.listeners == 0
@@ -0,0 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.core.database import ReplicaSet
+
+
+async def test_replica_check_puts_a_replica_in_rotation(tmp_path):
+    replicas = ReplicaSet([f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"], check_interval=1)
+    (replica,) = replicas.replicas
+    assert replicas.pick() is None
+
+    await replicas.check_all()
+    assert replica.healthy and replica.lag_seconds == 0
+    assert replicas.pick() is replica
+    await replicas.stop()
+
+
+class UnreachableEngine:
+    """Stands in for a replica whose host never answers the connection"""
+
+    def __init__(self, url):
+        self.url = url
+
+    @asynccontextmanager
+    async def connect(self):
+        await asyncio.sleep(60)
+        yield
+
+
+async def test_replica_check_times_out_while_connecting(tmp_path):
+    replicas = ReplicaSet([f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"], check_interval=0.1)
+    (replica,) = replicas.replicas
+    await replicas.check_all()
+    assert replica.healthy
+
+    await replica.engine.dispose()
+    replica.engine = UnreachableEngine(replica.engine.url)
+    await asyncio.wait_for(replicas.check_all(), 1)
+    assert not replica.healthy
+    assert replica.last_error.startswith("TimeoutError")
+    assert replicas.pick() is None
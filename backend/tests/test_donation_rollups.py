@@ -0,0 +1,173 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+
+from app.models.donation import Donation
+from app.models.donation_daily_rollup import DonationDailyRollup
+from app.services.analytics.donation_rollups import (
+    _upsert,
+    get_donation_stats,
+    rebuild_rollups,
+    record_status_change,
+)
+
+
+def _rollups(db) -> dict[tuple, tuple[int, int]]:
+    db.expire_all()
+    return {
+        (row.day, row.currency, row.is_recurring): (row.total_amount_cents, row.donation_count)
+        for row in db.scalars(select(DonationDailyRollup))
+    }
+
+
+def _set_status(db, donation: Donation, status: str) -> None:
+    previous_status = donation.status
+    donation.status = status
+    record_status_change(db, donation, previous_status)
+    db.commit()
+
+
+def _donation(db, amount_cents: int, created_at: datetime, **values) -> Donation:
+    donation = Donation(amount_cents=amount_cents, created_at=created_at, **values)
+    db.add(donation)
+    db.commit()
+    return donation
+
+
+def test_upsert_adds_to_existing_rows(db):
+    day = date(2026, 3, 1)
+    _upsert(db, day, "usd", False, 1000, 1)
+    _upsert(db, day, "usd", False, 2500, 1)
+    _upsert(db, day, "usd", True, 500, 1)
+    _upsert(db, day, "eur", False, 700, 1)
+    db.commit()
+    assert _rollups(db) == {
+        (day, "usd", False): (3500, 2),
+        (day, "usd", True): (500, 1),
+        (day, "eur", False): (700, 1),
+    }
+
+
+def test_status_changes_move_the_rollup(db):
+    day = date(2026, 3, 1)
+    donation = _donation(db, 5000, datetime(2026, 3, 1, 23, 59))
+    _set_status(db, donation, "succeeded")
+    assert _rollups(db) == {(day, "usd", False): (5000, 1)}
+
+    # A repeated webhook does not count it twice
+    _set_status(db, donation, "succeeded")
+    assert _rollups(db) == {(day, "usd", False): (5000, 1)}
+
+    _set_status(db, donation, "refunded")
+    assert _rollups(db) == {(day, "usd", False): (0, 0)}
+    _set_status(db, donation, "failed")
+    assert _rollups(db) == {(day, "usd", False): (0, 0)}
+
+
+def test_rolled_back_status_change_leaves_the_rollup(db):
+    donation = _donation(db, 5000, datetime(2026, 3, 1))
+    donation.status = "succeeded"
+    record_status_change(db, donation, "pending")
+    db.rollback()
+    assert _rollups(db) == {}
+
+
+def test_days_are_utc(db):
+    donation = Donation(
+        amount_cents=100,
+        status="pending",
+        created_at=datetime(2026, 3, 1, 20, 0, tzinfo=timezone(timedelta(hours=-5))),
+    )
+    donation.status = "succeeded"
+    record_status_change(db, donation, "pending")
+    db.commit()
+    assert _rollups(db) == {(date(2026, 3, 2), "usd", False): (100, 1)}
+
+
+def test_rebuild_matches_the_incremental_rollup(db):
+    donations = [
+        _donation(db, 1000, datetime(2026, 3, 1, 9)),
+        _donation(db, 2000, datetime(2026, 3, 1, 18), is_recurring=True),
+        _donation(db, 3000, datetime(2026, 3, 2, 9), currency="eur"),
+        _donation(db, 4000, datetime(2026, 3, 2, 10)),
+        _donation(db, 9999, datetime(2026, 3, 3, 10)),
+    ]
+    for donation in donations[:4]:
+        _set_status(db, donation, "succeeded")
+    _set_status(db, donations[3], "refunded")
+    incremental = {key: value for key, value in _rollups(db).items() if value[1]}
+
+    assert rebuild_rollups(db) == 3
+    assert _rollups(db) == incremental
+    assert incremental == {
+        (date(2026, 3, 1), "usd", False): (1000, 1),
+        (date(2026, 3, 1), "usd", True): (2000, 1),
+        (date(2026, 3, 2), "eur", False): (3000, 1),
+    }
+
+
+def test_rebuild_skips_donations_without_a_creation_time(db):
+    _donation(db, 1000, datetime(2026, 3, 1), status="succeeded")
+    _donation(db, 2000, datetime(2026, 3, 1), status="succeeded")
+    db.execute(text("UPDATE donations SET created_at = NULL WHERE amount_cents = 2000"))
+    db.commit()
+    assert rebuild_rollups(db) == 1
+    assert _rollups(db) == {(date(2026, 3, 1), "usd", False): (1000, 1)}
+
+
+def test_rebuild_replaces_stale_rows(db):
+    _upsert(db, date(2020, 1, 1), "usd", False, 123, 1)
+    db.commit()
+    assert rebuild_rollups(db) == 0
+    assert _rollups(db) == {}
+
+
+def test_stats_read_the_rollups(db):
+    _upsert(db, date(2026, 3, 1), "usd", False, 1000, 1)
+    _upsert(db, date(2026, 3, 1), "usd", True, 2000, 2)
+    _upsert(db, date(2026, 3, 2), "eur", False, 3000, 1)
+    _upsert(db, date(2026, 3, 3), "usd", False, 0, 0)
+    db.commit()
+
+    stats = get_donation_stats(db)
+    assert stats["total_amount_cents"] == 6000
+    assert stats["total_count"] == 4
+    assert stats["recurring_count"] == 2
+    # Days whose donations were all refunded are left out
+    assert [point["day"] for point in stats["series"]] == [date(2026, 3, 1), date(2026, 3, 2)]
+
+    usd = get_donation_stats(db, currency="USD", start_date=date(2026, 3, 1))
+    assert usd["total_amount_cents"] == 3000
+    assert get_donation_stats(db, end_date=date(2026, 2, 28))["series"] == []
+
+
+def test_stats_series_without_a_start_is_bounded(db):
+    _upsert(db, date(2026, 1, 1), "usd", False, 1000, 1)
+    _upsert(db, date(2026, 3, 1), "usd", False, 2000, 1)
+    _upsert(db, date(2026, 3, 5), "usd", True, 500, 1)
+    db.commit()
+
+    stats = get_donation_stats(db, end_date=date(2026, 3, 5), series_days=30)
+    assert stats["series_start"] == date(2026, 2, 4)
+    assert [point["day"] for point in stats["series"]] == [date(2026, 3, 1), date(2026, 3, 5)]
+    # The totals are not limited to the series
+    assert (stats["total_amount_cents"], stats["total_count"]) == (3500, 3)
+    assert stats["recurring_count"] == 1
+
+    assert get_donation_stats(db, series_days=0)["series"] == []
+
+
+async def test_stats_endpoint_limits_the_date_range(db, admin_client):
+    today = datetime.utcnow().date()
+    _upsert(db, today, "usd", False, 1000, 1)
+    db.commit()
+
+    response = await admin_client.get("/api/donations/stats")
+    assert response.status_code == 200
+    assert response.json()["series_start"] == str(today - timedelta(days=365))
+    assert len(response.json()["series"]) == 1
+
+    response = await admin_client.get(
+        "/api/donations/stats", params={"start_date": "2020-01-01", "end_date": "2026-01-01"}
+    )
+    assert response.status_code == 400
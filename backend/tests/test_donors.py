@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from app.models.donation import Donation
+from app.models.donor import Donor
+from app.services.donors import get_or_create_donor, record_gift_status_change
+
+
+def _gift(db, donor: Donor, amount_cents: int, created_at: datetime) -> Donation:
+    donation = Donation(
+        donor_id=donor.id,
+        donor_email=donor.email,
+        amount_cents=amount_cents,
+        created_at=created_at,
+        status="pending",
+    )
+    db.add(donation)
+    db.commit()
+    return donation
+
+
+def _set_status(db, donation: Donation, status: str) -> None:
+    previous_status = donation.status
+    donation.status = status
+    record_gift_status_change(db, donation, previous_status)
+    db.commit()
+
+
+def test_donors_are_matched_by_canonical_email(db):
+    donor = get_or_create_donor(db, " Ada@Example.org ")
+    db.commit()
+    assert donor.email == "ada@example.org"
+    assert get_or_create_donor(db, "ADA@example.org", "Ada Lovelace").id == donor.id
+    db.commit()
+    assert donor.name == "Ada Lovelace"
+    assert get_or_create_donor(db, "  ") is None
+
+
+def test_lifetime_totals_follow_status_changes(db):
+    donor = get_or_create_donor(db, "ada@example.org")
+    db.commit()
+    march = _gift(db, donor, 1000, datetime(2026, 3, 1))
+    may = _gift(db, donor, 2500, datetime(2026, 5, 1))
+    _set_status(db, march, "succeeded")
+    _set_status(db, may, "succeeded")
+    # A repeated webhook does not count the gift twice
+    _set_status(db, may, "succeeded")
+
+    db.refresh(donor)
+    assert (donor.lifetime_amount_cents, donor.gift_count) == (3500, 2)
+    assert (donor.first_gift_at.date(), donor.last_gift_at.date()) == (
+        datetime(2026, 3, 1).date(),
+        datetime(2026, 5, 1).date(),
+    )
+
+    _set_status(db, may, "refunded")
+    db.refresh(donor)
+    assert (donor.lifetime_amount_cents, donor.gift_count) == (1000, 1)
+    assert donor.last_gift_at.date() == datetime(2026, 3, 1).date()
+
+
+async def test_admin_search_and_detail(db, admin_client):
+    totals = [("ada@example.org", 500), ("adam@example.org", 900), ("bo@example.org", 0)]
+    for email, total in totals:
+        db.add(Donor(email=email, lifetime_amount_cents=total, gift_count=1))
+    db.add(Donor(email="a_b@example.org", lifetime_amount_cents=0, gift_count=0))
+    db.commit()
+
+    response = await admin_client.get("/api/donors/admin", params={"q": " ADA"})
+    assert [donor["email"] for donor in response.json()] == ["ada@example.org", "adam@example.org"]
+    # LIKE wildcards in the query are matched literally
+    response = await admin_client.get("/api/donors/admin", params={"q": "a_"})
+    assert [donor["email"] for donor in response.json()] == ["a_b@example.org"]
+    response = await admin_client.get("/api/donors/admin")
+    assert response.json()[0]["email"] == "adam@example.org"
+
+    donor = db.query(Donor).filter_by(email="ada@example.org").one()
+    gifts = [_gift(db, donor, cents, datetime(2026, 1, day)) for day, cents in [(1, 100), (2, 200)]]
+    response = await admin_client.get(f"/api/donors/admin/{donor.id}")
+    assert response.status_code == 200
+    assert [gift["id"] for gift in response.json()["recent_donations"]] == [
+        gifts[1].id,
+        gifts[0].id,
+    ]
+    assert (await admin_client.get("/api/donors/admin/9999")).status_code == 404
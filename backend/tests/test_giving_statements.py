@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.donation import Donation
+from app.models.email_outbox import EmailOutbox
+from app.services.reports.giving_statements import (
+    LocalStatementWriter,
+    generate_statements,
+    iter_donor_statements,
+    render_statement_html,
+)
+
+
+def _donations(db) -> None:
+    gifts = [
+        ("ada@example.org", "Ada", 1000, "usd", False, datetime(2025, 2, 1), "succeeded"),
+        (" ADA@example.org ", "", 2500, "usd", True, datetime(2025, 6, 1), "succeeded"),
+        ("ada@example.org", "Ada", 700, "eur", False, datetime(2025, 7, 1), "succeeded"),
+        ("ada@example.org", "Ada", 9999, "usd", False, datetime(2025, 8, 1), "refunded"),
+        ("ada@example.org", "Ada", 5000, "usd", False, datetime(2024, 12, 31), "succeeded"),
+        ("<b>@example.org", "Bo <b>", 300, "usd", False, datetime(2025, 3, 1), "succeeded"),
+        (None, "Anonymous", 400, "usd", False, datetime(2025, 3, 1), "succeeded"),
+    ]
+    db.add_all(
+        Donation(
+            donor_email=email,
+            donor_name=name,
+            amount_cents=amount,
+            currency=currency,
+            is_recurring=recurring,
+            created_at=created_at,
+            status=status,
+        )
+        for email, name, amount, currency, recurring, created_at, status in gifts
+    )
+    db.commit()
+
+
+def test_statements_aggregate_a_year_per_donor_and_currency(db):
+    _donations(db)
+    statements = list(iter_donor_statements(db, 2025, batch_size=2))
+
+    assert [statement.email for statement in statements] == [
+        "<b>@example.org",
+        "ada@example.org",
+    ]
+    ada = statements[1]
+    assert ada.name == "Ada"
+    assert [
+        (line["currency"], line["count"], line["total_cents"], line["recurring_cents"])
+        for line in ada.lines
+    ] == [("eur", 1, 700, 0), ("usd", 2, 3500, 2500)]
+
+    html = render_statement_html(ada)
+    assert "$35.00 USD" in html and "February 01, 2025" in html
+    assert "Bo &lt;b&gt;" in render_statement_html(statements[0])
+
+
+def test_generate_writes_and_queues_every_statement(db, tmp_path):
+    _donations(db)
+    written = generate_statements(
+        db, 2025, LocalStatementWriter(str(tmp_path)), email=True, workers=1, chunk_size=1
+    )
+
+    assert written == 2
+    assert sorted(path.name for path in (tmp_path / "2025").iterdir()) == [
+        "_b__example.org.html",
+        "ada_example.org.html",
+    ]
+    queued = db.scalars(select(EmailOutbox).order_by(EmailOutbox.to_email)).all()
+    assert [entry.to_email for entry in queued] == ["<b>@example.org", "ada@example.org"]
+    assert queued[1].subject == "Your 2025 Giving Statement"
+    assert "$35.00 USD" in queued[1].html_body
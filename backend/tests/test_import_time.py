@@ -0,0 +1,26 @@
+import importlib.util
+import statistics
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "check_import_time", Path(__file__).parent.parent / "scripts" / "check_import_time.py"
+)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+BUDGET_MS = 1500
+
+
+@pytest.mark.parametrize("module", check_import_time.DEFAULT_MODULES)
+def test_heavy_clients_are_not_imported_eagerly(module):
+    timings = check_import_time.import_profile(module)
+    assert module in timings
+    eager = [name for name in check_import_time.DEFERRED_PACKAGES if name in timings]
+    assert eager == []
+
+
+def test_cold_import_of_the_app_is_within_budget():
+    runs = [check_import_time.import_profile("app.main")["app.main"] for _ in range(3)]
+    assert statistics.median(runs) / 1000 < BUDGET_MS
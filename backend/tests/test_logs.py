@@ -0,0 +1,55 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.core import logs
+from app.core.logs import NonBlockingQueueHandler
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_listener_is_started_once_by_racing_threads(monkeypatch):
+    started = []
+
+    class CountingListener(logs.QueueListener):
+        def start(self):
+            started.append(self)
+            super().start()
+
+    pid = os.getpid()
+
+    def slow_getpid():
+        # Widens the window between checking the pid and recording it
+        time.sleep(0.001)
+        return pid
+
+    monkeypatch.setattr(logs, "QueueListener", CountingListener)
+    monkeypatch.setattr(os, "getpid", slow_getpid)
+    output = Collect()
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1000), [output])
+    barrier = threading.Barrier(8)
+
+    def log(thread: int):
+        barrier.wait()
+        for i in range(20):
+            record = logging.makeLogRecord({"msg": f"{thread}-{i}", "levelno": logging.INFO})
+            handler.enqueue(record)
+
+    threads = [threading.Thread(target=log, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    handler.stop()
+
+    assert len(started) == 1
+    assert len(output.messages) == 160
@@ -0,0 +1,20 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import instrument_pool, mark_worker_started
+
+
+def _capacity(pool: str):
+    return REGISTRY.get_sample_value("db_pool_capacity", {"pool": pool})
+
+
+def test_pool_capacity_is_published_by_each_worker(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=3, max_overflow=2
+    )
+    instrument_pool(engine, "capacity-test")
+    # Not at import: with a preloaded app that is the gunicorn master
+    assert _capacity("capacity-test") is None
+    mark_worker_started()
+    assert _capacity("capacity-test") == 5
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.models.moderation_event import ModerationEvent
+from app.services.auth import ClerkAdmin, create_stream_token
+from app.services.auth.stream_tokens import read_stream_token
+from app.services.realtime.moderation_feed import ModerationFeed, moderation_feed
+
+
+def _deleted(db, *photo_ids: int) -> None:
+    db.add_all(ModerationEvent(photo_id=photo_id, action="deleted") for photo_id in photo_ids)
+    db.commit()
+
+
+def _event_id(message: str) -> str:
+    return message.split("\n", 1)[0].removeprefix("id: ")
+
+
+@pytest.fixture
+async def feed():
+    # Polled by hand: no poller task, so the test decides when rows reach the buffer
+    feed = ModerationFeed(keepalive=60)
+    feed._loop = asyncio.get_running_loop()
+    feed._changed = asyncio.Event()
+    feed._wakeup = asyncio.Event()
+    return feed
+
+
+async def test_replayed_events_are_not_sent_again(db, feed):
+    _deleted(db, 10, 11)
+    stream = feed.stream(last_event_id=0)
+    assert "event: ready" in await anext(stream)
+    replayed = [_event_id(await anext(stream)) for _ in range(2)]
+
+    waiting = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0.01)
+    # The poller catches up with the replayed rows in a later pass
+    await feed.poll_once()
+    await asyncio.sleep(0.01)
+    _deleted(db, 12)
+    await feed.poll_once()
+
+    latest = await asyncio.wait_for(waiting, 1)
+    await stream.aclose()
+    assert replayed == ["1", "2"]
+    assert _event_id(latest) == "3"
+
+
+def test_stream_token_is_scoped_and_short_lived(monkeypatch):
+    admin = ClerkAdmin("user_admin", "admin@example.org", {"role": "admin"})
+    token = create_stream_token(admin, "moderation")
+    assert read_stream_token(token, "moderation") == admin
+    assert read_stream_token(token, "other") is None
+    body, _, _ = token.partition(".")
+    assert read_stream_token(f"{body}.{'0' * 64}", "moderation") is None
+
+    monkeypatch.setattr("app.core.config.settings.SSE_TOKEN_SECONDS", -1)
+    assert read_stream_token(create_stream_token(admin, "moderation"), "moderation") is None
+
+
+async def test_event_source_connects_with_a_token(admin_client, monkeypatch):
+    response = await admin_client.post("/api/gallery/admin/events/token")
+    token = response.json()["token"]
+
+    from app.main import app
+
+    app.dependency_overrides.clear()
+    response = await admin_client.get("/api/gallery/admin/events", params={"token": "forged"})
+    assert response.status_code == 401
+    # Past authentication: refused only because the feed is full
+    monkeypatch.setattr(moderation_feed, "max_listeners", 0)
+    response = await admin_client.get("/api/gallery/admin/events", params={"token": token})
+    assert response.status_code == 503
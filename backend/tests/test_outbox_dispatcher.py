@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.email_outbox import EmailOutbox
+from app.services.webhooks import outbox_dispatcher as outbox
+from app.services.webhooks.outbox_dispatcher import OutboxDispatcher, prune_sent_emails
+
+
+def _queue(db, count: int, **values) -> list[int]:
+    values.setdefault("next_attempt_at", datetime.utcnow() - timedelta(seconds=1))
+    entries = [
+        EmailOutbox(
+            to_email=f"donor{i}@example.org",
+            subject="Thank you",
+            body="Thank you for your gift",
+            **values,
+        )
+        for i in range(count)
+    ]
+    db.add_all(entries)
+    db.commit()
+    return [entry.id for entry in entries]
+
+
+def _rows(db) -> dict[int, EmailOutbox]:
+    db.expire_all()
+    return {row.id: row for row in db.scalars(select(EmailOutbox))}
+
+
+def test_claim_leases_due_rows(db):
+    due = _queue(db, 3)
+    _queue(db, 1, next_attempt_at=datetime.utcnow() + timedelta(hours=1))
+    _queue(db, 1, status="sent")
+    _queue(db, 1, status="dead")
+
+    dispatcher = OutboxDispatcher(lease=300)
+    claimed = dispatcher._claim()
+    assert sorted(entry.id for entry in claimed) == due
+    rows = _rows(db)
+    for entry_id in due:
+        assert rows[entry_id].status == "sending"
+        assert rows[entry_id].attempts == 1
+        assert rows[entry_id].next_attempt_at > datetime.utcnow() + timedelta(seconds=290)
+    # Leased rows are not claimed again
+    assert OutboxDispatcher()._claim() == []
+
+
+def test_claim_takes_at_most_a_batch_oldest_first(db):
+    now = datetime.utcnow()
+    ids = [
+        _queue(db, 1, next_attempt_at=now - timedelta(minutes=minutes))[0]
+        for minutes in (1, 5, 3, 4)
+    ]
+    claimed = OutboxDispatcher(batch_size=2)._claim()
+    assert {entry.id for entry in claimed} == {ids[1], ids[3]}
+
+
+def test_expired_lease_is_claimed_again(db):
+    (entry_id,) = _queue(db, 1)
+    OutboxDispatcher(lease=-1)._claim()
+    (entry,) = OutboxDispatcher()._claim()
+    assert entry.id == entry_id
+    assert entry.attempts == 2
+
+
+def test_record_results(db):
+    sent, retried, dead = _queue(db, 3)
+    dispatcher = OutboxDispatcher(max_attempts=1, backoff=60)
+    claimed = {entry.id: entry for entry in dispatcher._claim()}
+    claimed[retried].attempts = 0
+    dispatcher._record([
+        (claimed[sent], None),
+        (claimed[retried], "SMTPServerDisconnected: gone"),
+        (claimed[dead], "SMTPRecipientsRefused: no such user"),
+    ])
+
+    rows = _rows(db)
+    assert rows[sent].status == "sent" and rows[sent].sent_at is not None
+    assert rows[retried].status == "pending"
+    assert rows[retried].last_error == "SMTPServerDisconnected: gone"
+    assert rows[retried].next_attempt_at > datetime.utcnow()
+    assert rows[dead].status == "dead"
+
+
+def test_retry_delay_backs_off_up_to_the_cap():
+    dispatcher = OutboxDispatcher(backoff=30, max_backoff=3600)
+    for _ in range(20):
+        assert 15 <= dispatcher._retry_delay(1) <= 30
+        assert 60 <= dispatcher._retry_delay(3) <= 120
+        assert 1800 <= dispatcher._retry_delay(20) <= 3600
+
+
+async def test_drain_once_sends_and_records(db, monkeypatch):
+    delivered = []
+
+    async def deliver(to_email, subject, body, html_body=None):
+        if to_email == "donor1@example.org":
+            raise ConnectionError("refused")
+        delivered.append(to_email)
+
+    monkeypatch.setattr(outbox.email_service, "deliver", deliver)
+    _queue(db, 3)
+    assert await OutboxDispatcher().drain_once() == 3
+    assert sorted(delivered) == ["donor0@example.org", "donor2@example.org"]
+    statuses = sorted((row.to_email, row.status) for row in _rows(db).values())
+    assert statuses == [
+        ("donor0@example.org", "sent"),
+        ("donor1@example.org", "pending"),
+        ("donor2@example.org", "sent"),
+    ]
+    assert await OutboxDispatcher().drain_once() == 0
+
+
+def test_prune_sent_emails(db):
+    old = datetime.utcnow() - timedelta(days=40)
+    _queue(db, 2, status="sent", sent_at=old)
+    _queue(db, 1, status="sent", sent_at=datetime.utcnow())
+    _queue(db, 1, status="dead")
+    assert prune_sent_emails(db, retention_days=30) == 2
+    assert len(_rows(db)) == 2
@@ -0,0 +1,60 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiosqlite
+
+from app.core.profiler import ProfileSession, SamplingProfiler
+
+
+def _session() -> ProfileSession:
+    return ProfileSession(0.01, time.monotonic() + 60, None, 0)
+
+
+def _sampled_threads(session: ProfileSession) -> set[str]:
+    return {stack.split(";", 1)[0] for stack in session.stacks}
+
+
+def _busy(stop: threading.Event) -> None:
+    total = 0
+    while not stop.is_set():
+        total += sum(range(100))
+
+
+async def test_idle_threads_are_skipped():
+    stop = threading.Event()
+    work: queue.Queue = queue.Queue()
+    threads = [
+        threading.Thread(target=_busy, args=(stop,), name="busy"),
+        threading.Thread(target=work.get, name="queue-get"),
+        threading.Thread(target=stop.wait, name="event-wait"),
+    ]
+    for thread in threads:
+        thread.start()
+    pool = ThreadPoolExecutor(thread_name_prefix="pool")
+    pool.submit(time.sleep, 0).result()
+    # Leaves the default executor with an idle worker
+    await asyncio.to_thread(time.sleep, 0)
+    try:
+        async with aiosqlite.connect(":memory:") as connection:
+            await connection.execute("select 1")
+            # Let the connection and executor threads get back to waiting
+            await asyncio.sleep(0.05)
+            session = _session()
+            for _ in range(5):
+                SamplingProfiler()._sample(session, threading.get_ident())
+                await asyncio.sleep(0.01)
+            idle = {"queue-get", "event-wait", "pool_0", connection.name}
+    finally:
+        stop.set()
+        work.put(None)
+        pool.shutdown()
+        for thread in threads:
+            thread.join()
+
+    sampled = _sampled_threads(session)
+    assert "busy" in sampled
+    assert not sampled & idle
+    assert not any(name.startswith("asyncio_") for name in sampled)
@@ -0,0 +1,127 @@
+import time
+
+import httpx
+import pytest
+
+from app.core.rate_limit import (
+    Rate,
+    RateLimitedError,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitRule,
+    SQLiteBucketStore,
+    client_key,
+    email_key,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteBucketStore(str(tmp_path / "buckets.db"))
+
+
+def test_rate_parse():
+    rate = Rate.parse("5/hour")
+    assert (rate.count, rate.period, rate.interval) == (5, 3600, 720)
+    assert Rate.parse("10/minutes").period == 60
+    assert Rate.parse("") is None
+    for text in ("5", "0/minute", "x/minute", "5/fortnight"):
+        with pytest.raises(ValueError):
+            Rate.parse(text)
+
+
+def test_bucket_allows_a_burst_then_refuses(store):
+    rate = Rate(3, 60)
+    assert [store.take("k", rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = store.take("k", rate)
+    # The next token is free one interval after the first was taken
+    assert 19 < retry_after <= 20
+    # Other buckets are unaffected
+    assert store.take("other", rate) == 0.0
+
+
+def test_refused_requests_do_not_use_up_tokens(store, monkeypatch):
+    rate = Rate(2, 2)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    store.take("k", rate)
+    store.take("k", rate)
+    for _ in range(10):
+        assert store.take("k", rate) > 0
+    monkeypatch.setattr(time, "time", lambda: now + 1.01)
+    assert store.take("k", rate) == 0.0
+    assert store.take("k", rate) > 0
+
+
+def test_buckets_are_shared_between_stores(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    rate = Rate(2, 60)
+    assert first.take("k", rate) == 0.0
+    assert second.take("k", rate) == 0.0
+    assert first.take("k", rate) > 0
+    assert second.take("k", rate) > 0
+
+
+def test_unavailable_store_lets_requests_through(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / "missing" / "buckets.db"))
+    assert store.take("k", Rate(1, 60)) == 0.0
+    assert store.take("k", Rate(1, 60)) == 0.0
+
+
+def test_client_key():
+    assert client_key("203.0.113.7") == "203.0.113.7"
+    assert client_key("2001:db8:1:2:3:4:5:6") == "2001:db8:1:2::"
+    assert client_key("2001:db8:1:2:ffff::1") == "2001:db8:1:2::"
+    assert client_key("::ffff:203.0.113.7") == "203.0.113.7"
+    assert client_key("testclient") == "testclient"
+
+
+def test_email_key_ignores_case_and_whitespace():
+    assert email_key(" Someone@Example.org ") == email_key("someone@example.org")
+    assert "someone" not in email_key("someone@example.org")
+
+
+def test_limiter_checks_ip_and_email_separately(store):
+    limiter = RateLimiter(store, {"contact": RateLimitRule(Rate(1, 60), Rate(1, 60))})
+    limiter.check_ip("contact", "2001:db8::1")
+    with pytest.raises(RateLimitedError) as error:
+        # Same /64
+        limiter.check_ip("contact", "2001:db8::2")
+    assert (error.value.rule, error.value.key) == ("contact", "ip")
+    assert error.value.retry_after > 0
+
+    limiter.check_email("contact", "someone@example.org")
+    with pytest.raises(RateLimitedError):
+        limiter.check_email("contact", "SOMEONE@example.org")
+    # No email, nothing to limit
+    limiter.check_email("contact", None)
+
+
+def test_rule_without_rate_and_disabled_limiter_allow_everything(store):
+    limiter = RateLimiter(store, {"rsvp": RateLimitRule(per_ip=Rate(1, 60))})
+    for _ in range(3):
+        limiter.check_email("rsvp", "someone@example.org")
+    limiter.enabled = False
+    for _ in range(3):
+        limiter.check_ip("rsvp", "203.0.113.7")
+
+
+async def test_middleware_answers_429_on_limited_routes(store):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    limiter = RateLimiter(store, {"contact": RateLimitRule(per_ip=Rate(1, 60))})
+    middleware = RateLimitMiddleware(app, limiter, [("POST", r"/api/contact/?", "contact")])
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        assert (await client.post("/api/contact")).status_code == 200
+        response = await client.post("/api/contact/")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "60"
+        assert response.json() == {"detail": "Too many requests, please try again later"}
+        # Other methods and paths are not limited
+        assert (await client.get("/api/contact")).status_code == 200
+        assert (await client.post("/api/rsvps")).status_code == 200
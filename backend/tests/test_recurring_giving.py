@@ -0,0 +1,96 @@
+from datetime import datetime
+from itertools import count
+
+from app.services.analytics.recurring_giving import (
+    compute_recurring_analytics,
+    record_subscription_event,
+)
+
+_event_ids = count()
+
+
+def _event(db, subscription: str, event_type: str, occurred_at: datetime, amount: int = 0):
+    record_subscription_event(
+        db, f"evt_{next(_event_ids)}", subscription, event_type, occurred_at, amount
+    )
+    db.commit()
+
+
+def test_redelivered_events_are_recorded_once(db):
+    assert record_subscription_event(db, "evt_a", "sub_1", "started", datetime(2026, 1, 5), 1000)
+    assert not record_subscription_event(
+        db, "evt_a", "sub_1", "started", datetime(2026, 1, 5), 1000
+    )
+    db.commit()
+    analytics = compute_recurring_analytics(db, as_of=datetime(2026, 1, 31))
+    assert analytics["new"] == [1]
+    assert analytics["mrr_cents"] == [1000]
+
+
+def test_empty_ledger(db):
+    analytics = compute_recurring_analytics(db)
+    assert analytics["months"] == [] and analytics["cohorts"] == []
+
+
+def test_mrr_churn_and_cohorts(db):
+    _event(db, "sub_1", "started", datetime(2026, 1, 5), 1000)
+    _event(db, "sub_1", "renewed", datetime(2026, 2, 5), 1000)
+    _event(db, "sub_1", "renewed", datetime(2026, 3, 5), 1500)
+    _event(db, "sub_2", "started", datetime(2026, 2, 10), 2000)
+    _event(db, "sub_2", "payment_failed", datetime(2026, 3, 10))
+    _event(db, "sub_2", "canceled", datetime(2026, 3, 20))
+    _event(db, "sub_3", "started", datetime(2026, 3, 1), 500)
+
+    analytics = compute_recurring_analytics(db, as_of=datetime(2026, 4, 15))
+    assert analytics["months"] == ["2026-01", "2026-02", "2026-03", "2026-04"]
+    assert analytics["mrr_cents"] == [1000, 3000, 2000, 2000]
+    assert analytics["active"] == [1, 2, 2, 2]
+    assert analytics["new"] == [1, 1, 1, 0]
+    assert analytics["churned"] == [0, 0, 1, 0]
+    assert analytics["churn_rate"] == [0.0, 0.0, 0.5, 0.0]
+    assert analytics["new_mrr_cents"] == [1000, 2000, 500, 0]
+    assert analytics["churned_mrr_cents"] == [0, 0, 2000, 0]
+    assert analytics["cohorts"] == [
+        {"cohort": "2026-01", "size": 1, "retention": [1.0, 1.0, 1.0, 1.0]},
+        {"cohort": "2026-02", "size": 1, "retention": [1.0, 0.0, 0.0]},
+        {"cohort": "2026-03", "size": 1, "retention": [1.0, 1.0]},
+    ]
+
+
+def test_subscription_from_before_the_ledger(db):
+    _event(db, "sub_2", "started", datetime(2026, 2, 10), 2000)
+    # sub_3 started before the ledger: it is only seen renewing and canceling
+    _event(db, "sub_3", "renewed", datetime(2026, 2, 20), 700)
+    _event(db, "sub_3", "canceled", datetime(2026, 3, 20))
+
+    analytics = compute_recurring_analytics(db, as_of=datetime(2026, 3, 31))
+    assert analytics["months"] == ["2026-02", "2026-03"]
+    assert analytics["active"] == [2, 1]
+    assert analytics["new"] == [1, 0]
+    assert analytics["churned"] == [0, 1]
+    assert analytics["churn_rate"] == [0.0, 0.5]
+    assert analytics["mrr_cents"] == [2700, 2000]
+    assert analytics["new_mrr_cents"] == [2000, 0]
+    assert analytics["churned_mrr_cents"] == [0, 700]
+    assert analytics["cohorts"] == [{"cohort": "2026-02", "size": 1, "retention": [1.0, 1.0]}]
+
+
+def test_cancel_is_the_only_event_in_the_ledger(db):
+    _event(db, "sub_1", "started", datetime(2026, 2, 10), 2000)
+    _event(db, "sub_2", "canceled", datetime(2026, 3, 20))
+
+    analytics = compute_recurring_analytics(db, as_of=datetime(2026, 3, 31))
+    assert analytics["new"] == [1, 0]
+    assert analytics["churned"] == [0, 1]
+    assert analytics["churn_rate"] == [0.0, 0.5]
+    assert [cohort["cohort"] for cohort in analytics["cohorts"]] == ["2026-02"]
+
+
+def test_currencies_are_separate(db):
+    _event(db, "sub_1", "started", datetime(2026, 1, 5), 1000)
+    record_subscription_event(
+        db, "evt_eur", "sub_2", "started", datetime(2026, 1, 5), 900, currency="eur"
+    )
+    db.commit()
+    assert compute_recurring_analytics(db, "usd", datetime(2026, 1, 31))["mrr_cents"] == [1000]
+    assert compute_recurring_analytics(db, "eur", datetime(2026, 1, 31))["mrr_cents"] == [900]
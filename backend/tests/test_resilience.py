@@ -0,0 +1,212 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import resilience
+from app.core.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BulkheadFullError,
+    CircuitBreaker,
+    CircuitOpenError,
+    Dependency,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+class DeclinedError(Exception):
+    pass
+
+
+def _dependency(name: str, **options) -> Dependency:
+    defaults = {
+        "timeout": 1.0,
+        "is_failure": lambda e: False,
+        "max_concurrent": None,
+        "queue_timeout": 0.05,
+        "budget": 10.0,
+        "retries": 0,
+        "backoff": 0.0,
+        "failure_threshold": 3,
+        "reset_timeout": 30.0,
+    }
+    return Dependency(name, **{**defaults, **options})
+
+
+def _fail():
+    raise ConnectionError("refused")
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test-breaker", failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.retry_after() == pytest.approx(20)
+
+
+def test_half_open_breaker_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("test-breaker", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    # A failed trial opens it again for another reset_timeout
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_cancelled_trial_can_be_retried(clock):
+    breaker = CircuitBreaker("test-breaker", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.cancel()
+    assert breaker.allow()
+
+
+def test_failures_open_the_circuit_and_calls_are_refused(clock):
+    dependency = _dependency("test-open", failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            dependency.call("op", _fail)
+    calls = []
+    with pytest.raises(CircuitOpenError) as error:
+        dependency.call("op", calls.append, 1)
+    assert calls == []
+    assert error.value.retry_after == pytest.approx(30)
+    assert dependency.status()["rejected"] == 1
+    assert dependency.status()["state"] == OPEN
+
+
+def test_caller_errors_do_not_count_as_failures(clock):
+    dependency = _dependency(
+        "test-caller-errors", failure_threshold=1, is_failure=lambda e: "503" in str(e)
+    )
+
+    def decline():
+        raise DeclinedError("card declined")
+
+    for _ in range(3):
+        with pytest.raises(DeclinedError):
+            dependency.call("op", decline)
+    assert dependency.breaker.state == CLOSED
+
+    def unavailable():
+        raise DeclinedError("503 unavailable")
+
+    with pytest.raises(DeclinedError):
+        dependency.call("op", unavailable)
+    assert dependency.breaker.state == OPEN
+
+
+def test_idempotent_calls_are_retried(monkeypatch):
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+    dependency = _dependency("test-retry", retries=2, backoff=0.01, failure_threshold=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError()
+        return "ok"
+
+    assert dependency.call("op", flaky, idempotent=True) == "ok"
+    assert len(attempts) == 3
+
+    attempts.clear()
+    with pytest.raises(TimeoutError):
+        dependency.call("op", flaky)
+    assert len(attempts) == 1
+
+
+def test_retries_stop_at_the_budget(monkeypatch):
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+    dependency = _dependency(
+        "test-budget", retries=5, backoff=0.01, timeout=1.0, budget=0.5, failure_threshold=10
+    )
+    attempts = []
+
+    def slow_failure():
+        attempts.append(1)
+        raise TimeoutError()
+
+    with pytest.raises(TimeoutError):
+        dependency.call("op", slow_failure, idempotent=True)
+    # A retry could not finish within the budget, so none is made
+    assert len(attempts) == 1
+
+
+def test_bulkhead_refuses_calls_over_the_limit():
+    dependency = _dependency("test-bulkhead", max_concurrent=1, queue_timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=dependency.call, args=("op", hold))
+    worker.start()
+    try:
+        assert started.wait(5)
+        assert dependency.status()["in_flight"] == 1
+        with pytest.raises(BulkheadFullError):
+            dependency.call("op", lambda: None)
+    finally:
+        release.set()
+        worker.join()
+    assert dependency.call("op", lambda: "ok") == "ok"
+    assert dependency.status()["in_flight"] == 0
+    assert dependency.status()["rejected"] == 1
+
+
+async def test_async_bulkhead_and_timeout():
+    dependency = _dependency(
+        "test-async", max_concurrent=1, queue_timeout=0.01, timeout=0.2, failure_threshold=1
+    )
+
+    async def hold():
+        await asyncio.Event().wait()
+
+    holder = asyncio.create_task(dependency.acall("op", hold))
+    await asyncio.sleep(0)
+    with pytest.raises(BulkheadFullError):
+        await dependency.acall("op", hold)
+    # The held call outlives its timeout, which counts as a failure
+    with pytest.raises(TimeoutError):
+        await holder
+    assert dependency.breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        await dependency.acall("op", hold)
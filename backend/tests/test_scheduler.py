@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app.models.job_run import JobRun
+from app.models.scheduled_job import ScheduledJob
+from app.models.scheduler_lease import SchedulerLease
+from app.services.scheduling.scheduler import Scheduler
+from app.services.scheduling.schedules import Interval
+
+
+def _scheduler(holder: str, lease: float = 30.0) -> Scheduler:
+    scheduler = Scheduler(name="test", lease=lease)
+    scheduler.holder = holder
+    scheduler.add("cleanup", lambda: None, Interval(3600))
+    scheduler.add("report", lambda: None, Interval(60))
+    return scheduler
+
+
+def _expire_lease(db) -> None:
+    db.execute(
+        update(SchedulerLease).values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    db.commit()
+
+
+def _make_due(db) -> None:
+    db.execute(update(ScheduledJob).values(next_run_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+
+def test_only_one_worker_holds_the_lease(db):
+    first, second = _scheduler("a"), _scheduler("b")
+    assert first._acquire()
+    assert not second._acquire()
+    # Renewing keeps it
+    assert first._acquire()
+    assert not second._acquire()
+    assert db.get(SchedulerLease, "test").holder == "a"
+
+
+def test_expired_lease_is_taken_over(db):
+    first, second = _scheduler("a"), _scheduler("b")
+    assert first._acquire()
+    acquired_at = db.get(SchedulerLease, "test").acquired_at
+    _expire_lease(db)
+
+    assert second._acquire()
+    assert not first._acquire()
+    db.expire_all()
+    lease = db.get(SchedulerLease, "test")
+    assert lease.holder == "b"
+    assert lease.acquired_at > acquired_at
+
+
+def test_renewal_keeps_acquired_at(db):
+    scheduler = _scheduler("a")
+    scheduler._acquire()
+    acquired_at = db.get(SchedulerLease, "test").acquired_at
+    scheduler._acquire()
+    db.expire_all()
+    assert db.get(SchedulerLease, "test").acquired_at == acquired_at
+
+
+def test_released_lease_is_free(db):
+    first, second = _scheduler("a"), _scheduler("b")
+    first._acquire()
+    first._release()
+    assert second._acquire()
+
+
+def test_take_over_registers_jobs_and_interrupts_old_runs(db):
+    db.add(JobRun(job_name="report", status="running", holder="old", started_at=datetime.utcnow()))
+    db.add(ScheduledJob(name="report", schedule="every 120s", next_run_at=datetime(2030, 1, 1)))
+    db.add(ScheduledJob(name="cleanup", schedule="every 3600s", next_run_at=datetime(2030, 1, 1)))
+    db.commit()
+
+    scheduler = _scheduler("a")
+    scheduler._acquire()
+    scheduler._take_over()
+
+    assert db.scalars(select(JobRun.status)).all() == ["interrupted"]
+    rows = {row.name: row for row in db.scalars(select(ScheduledJob))}
+    # A changed schedule is rescheduled, an unchanged one keeps its next run
+    assert rows["report"].schedule == "every 60s"
+    assert rows["report"].next_run_at < datetime(2030, 1, 1)
+    assert rows["cleanup"].next_run_at == datetime(2030, 1, 1)
+
+
+def test_leader_claims_due_jobs_once(db):
+    scheduler = _scheduler("a")
+    scheduler._acquire()
+    scheduler._take_over()
+    _make_due(db)
+
+    claimed = scheduler._claim_due()
+    assert sorted(name for name, _ in claimed) == ["cleanup", "report"]
+    runs = db.scalars(select(JobRun)).all()
+    assert {run.id for run in runs} == {run_id for _, run_id in claimed}
+    assert all(run.status == "running" and run.holder == "a" for run in runs)
+    # Claiming moved next_run_at on, so nothing is due any more
+    assert scheduler._claim_due() == []
+
+
+def test_jobs_still_running_are_not_claimed(db):
+    scheduler = _scheduler("a")
+    scheduler._acquire()
+    scheduler._take_over()
+    _make_due(db)
+    scheduler._running["report"] = object()
+    assert [name for name, _ in scheduler._claim_due()] == ["cleanup"]
+
+
+def test_former_leader_cannot_claim(db):
+    first, second = _scheduler("a"), _scheduler("b")
+    first._acquire()
+    first._take_over()
+    _expire_lease(db)
+    second._acquire()
+    _make_due(db)
+
+    # The old leader has not noticed it lost the lease
+    assert first._claim_due() == []
+    assert db.scalars(select(JobRun)).all() == []
+    assert len(second._claim_due()) == 2
+
+
+def test_trigger_and_status(db):
+    scheduler = _scheduler("a")
+    assert not scheduler.trigger(db, "missing")
+    assert scheduler.trigger(db, "report")
+    scheduler._acquire()
+    assert [name for name, _ in scheduler._claim_due()] == ["report"]
+
+    (run_id,) = db.scalars(select(JobRun.id)).all()
+    scheduler._finish(run_id, "succeeded", 0.25, {"sent": 3}, None)
+    db.add(JobRun(
+        job_name="cleanup",
+        status="failed",
+        holder="old",
+        started_at=datetime.utcnow() - timedelta(hours=2),
+        error="boom",
+    ))
+    db.add(JobRun(
+        job_name="cleanup",
+        status="succeeded",
+        holder="old",
+        started_at=datetime.utcnow() - timedelta(hours=1),
+    ))
+    db.commit()
+
+    status = scheduler.status(db)
+    assert status["leader"] == "a"
+    jobs = {job["name"]: job for job in status["jobs"]}
+    assert jobs["report"]["last_run"]["status"] == "succeeded"
+    assert jobs["report"]["last_run"]["duration_ms"] == 250.0
+    assert jobs["report"]["last_run"]["result"] == {"sent": 3}
+    assert jobs["cleanup"]["last_run"]["status"] == "succeeded"
+    assert jobs["cleanup"]["next_run_at"] is None
+
+
+def test_prune_history_keeps_running_and_recent_runs(db):
+    old = datetime.utcnow() - timedelta(days=40)
+    db.add_all([
+        JobRun(job_name="report", status="succeeded", holder="a", started_at=old),
+        JobRun(job_name="report", status="running", holder="a", started_at=old),
+        JobRun(job_name="report", status="failed", holder="a", started_at=datetime.utcnow()),
+    ])
+    db.commit()
+    assert _scheduler("a").prune_history(db, retention_days=30) == 1
+    assert sorted(db.scalars(select(JobRun.status))) == ["failed", "running"]
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.scheduling.schedules import Cron, Interval
+
+
+def test_interval_runs_after_its_period_plus_jitter():
+    now = datetime(2026, 1, 1, 12, 0)
+    interval = Interval(60, jitter=5)
+    for _ in range(50):
+        assert now + timedelta(seconds=60) <= interval.next_run(now) <= now + timedelta(seconds=65)
+        assert now <= interval.first_run(now) <= now + timedelta(seconds=5)
+    assert str(interval) == "every 60s"
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        # Every minute moves to the next minute, dropping seconds
+        ("* * * * *", datetime(2026, 1, 1, 12, 0, 30), datetime(2026, 1, 1, 12, 1)),
+        # A matching minute is never returned for itself
+        ("15 3 * * *", datetime(2026, 1, 1, 3, 15), datetime(2026, 1, 2, 3, 15)),
+        ("15 3 * * *", datetime(2026, 1, 1, 3, 14, 59), datetime(2026, 1, 1, 3, 15)),
+        ("*/20 * * * *", datetime(2026, 1, 1, 12, 41), datetime(2026, 1, 1, 13, 0)),
+        ("5/20 * * * *", datetime(2026, 1, 1, 12, 26), datetime(2026, 1, 1, 12, 45)),
+        ("0 9-17/4 * * *", datetime(2026, 1, 1, 13, 30), datetime(2026, 1, 1, 17, 0)),
+        ("0 0 1,15 * *", datetime(2026, 1, 2, 0, 0), datetime(2026, 1, 15, 0, 0)),
+        # Rolls over the year
+        ("0 0 1 1 *", datetime(2026, 6, 1), datetime(2027, 1, 1)),
+        # 1 January 2026 is a Thursday; 0 and 7 are both Sunday
+        ("0 8 * * 0", datetime(2026, 1, 1), datetime(2026, 1, 4, 8, 0)),
+        ("0 8 * * 7", datetime(2026, 1, 1), datetime(2026, 1, 4, 8, 0)),
+        ("0 8 * * 1-5", datetime(2026, 1, 2, 9, 0), datetime(2026, 1, 5, 8, 0)),
+        # Only leap years have a 29 February
+        ("0 0 29 2 *", datetime(2026, 1, 1), datetime(2028, 2, 29)),
+    ],
+)
+def test_cron_next_after(expression, after, expected):
+    assert Cron(expression).next_after(after) == expected
+
+
+def test_cron_day_and_weekday_match_either():
+    # The 13th, or any Friday
+    cron = Cron("0 0 13 * 5")
+    runs = []
+    moment = datetime(2026, 1, 1)
+    for _ in range(4):
+        moment = cron.next_after(moment)
+        runs.append(moment.date().isoformat())
+    assert runs == ["2026-01-02", "2026-01-09", "2026-01-13", "2026-01-16"]
+
+
+def test_cron_restricted_day_with_any_weekday_needs_the_day():
+    cron = Cron("0 0 13 * *")
+    assert cron.next_after(datetime(2026, 1, 1)) == datetime(2026, 1, 13)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "* * * * 8", "5-1 * * * *"],
+)
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError, match="Invalid cron expression"):
+        Cron(expression)
+
+
+def test_cron_that_never_matches_raises():
+    with pytest.raises(ValueError, match="never matches"):
+        Cron("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+def test_cron_jitter_delays_the_run():
+    cron = Cron("0 * * * *", jitter=30)
+    now = datetime(2026, 1, 1, 12, 10)
+    for _ in range(50):
+        run = cron.next_run(now)
+        assert datetime(2026, 1, 1, 13, 0) <= run <= datetime(2026, 1, 1, 13, 0, 30)
+    assert str(cron) == "cron 0 * * * *"
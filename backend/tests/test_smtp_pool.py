@@ -0,0 +1,118 @@
+import asyncio
+import socket
+import time
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP
+
+from app.services.webhooks.smtp_pool import SMTPConnectionPool
+
+
+class Recorder:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.noops = 0
+        self.messages: list[str] = []
+
+    async def handle_NOOP(self, server, session, envelope, arg):  # noqa: N802
+        self.noops += 1
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):  # noqa: N802
+        self.messages.append(envelope.rcpt_tos[0])
+        return "250 Message accepted"
+
+
+class RecordingSMTP(SMTP):
+    def connection_made(self, transport):
+        self.event_handler.opened += 1
+        super().connection_made(transport)
+
+    def connection_lost(self, error):
+        self.event_handler.closed += 1
+        super().connection_lost(error)
+
+
+class RecordingController(Controller):
+    def factory(self):
+        return RecordingSMTP(self.handler, **self.SMTP_kwargs)
+
+
+@pytest.fixture
+def server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    controller = RecordingController(Recorder(), hostname="127.0.0.1", port=port)
+    controller.start()
+    # start() connects once to check that the server is up
+    deadline = time.monotonic() + 2
+    while controller.handler.closed < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    controller.handler.opened = controller.handler.closed = 0
+    yield controller
+    controller.stop()
+
+
+def _pool(server, **options) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        server.hostname, server.port, start_tls=False, max_size=2, timeout=5, **options
+    )
+
+
+def _message(to: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "info@example.org"
+    message["To"] = to
+    message["Subject"] = "Hello"
+    message.set_content("Hi")
+    return message
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+async def test_idle_connections_are_kept_alive(server):
+    recorder = server.handler
+    pool = _pool(server, keepalive_interval=0.1, max_idle=60)
+    await pool.send_message(_message("a@example.org"))
+    # No sends: the background task pings the idle connection
+    await _wait_for(lambda: recorder.noops >= 2)
+    await pool.send_message(_message("b@example.org"))
+    await pool.close()
+
+    assert recorder.messages == ["a@example.org", "b@example.org"]
+    assert recorder.opened == 1
+    await _wait_for(lambda: recorder.closed == 1)
+
+
+async def test_connections_idle_past_max_idle_are_closed(server):
+    recorder = server.handler
+    pool = _pool(server, keepalive_interval=0.05, max_idle=0.2)
+    await pool.send_message(_message("a@example.org"))
+    await _wait_for(lambda: recorder.closed == 1)
+    assert not pool._idle
+    await pool.close()
+
+
+def test_connections_from_a_finished_loop_are_closed(server):
+    recorder = server.handler
+    pool = _pool(server, keepalive_interval=60)
+    asyncio.run(pool.send_message(_message("a@example.org")))
+
+    async def send_again():
+        await pool.send_message(_message("b@example.org"))
+        # The first loop's connection was hung up, not left open
+        await _wait_for(lambda: recorder.closed == 1)
+        await pool.close()
+
+    asyncio.run(send_again())
+    assert recorder.opened == 2
+    assert recorder.messages == ["a@example.org", "b@example.org"]
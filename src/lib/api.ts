@@ -3,6 +3,11 @@ import { getAuthToken } from '@/lib/authToken'
 
 const API_BASE_URL = (import.meta as any).env.VITE_API_BASE_URL || 'http://localhost:8000'
 
+// Set by the API after a write; sent back so our next reads see that write
+// instead of a replica that has not caught up yet
+const PRIMARY_HEADER = 'X-DB-Primary-Until'
+let primaryUntil: string | null = null
+
 export const api = axios.create({
   baseURL: API_BASE_URL,
   headers: {
@@ -15,7 +20,18 @@ api.interceptors.request.use(async (config) => {
   if (clerkToken) {
     config.headers.Authorization = `Bearer ${clerkToken}`
   }
+  if (primaryUntil) {
+    config.headers[PRIMARY_HEADER] = primaryUntil
+  }
   return config
 })
 
+api.interceptors.response.use((response) => {
+  const until = response.headers[PRIMARY_HEADER.toLowerCase()]
+  if (until) {
+    primaryUntil = until
+  }
+  return response
+})
+
 export default api